@@ -284,3 +284,67 @@ SOCIALACCOUNT_FORMS = {"signup": "htmx_demo.users.forms.UserSocialSignupForm"}
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Per-process memory budget, in bytes, for the contact autocomplete index.
+# Above it, short live-search queries fall back to the database.
+EXAMPLES_AUTOCOMPLETE_MEMORY_BUDGET = env.int(
+    "EXAMPLES_AUTOCOMPLETE_MEMORY_BUDGET",
+    default=32 * 1024 * 1024,
+)
+# Typo tolerance for fuzzy contact search, as (minimum query token length,
+# allowed edits) pairs. Shorter tokens must match a name exactly.
+EXAMPLES_FUZZY_MAX_EDITS = ((3, 1), (7, 2))
+# Time budget, in milliseconds, for walking the fuzzy name index per query.
+EXAMPLES_FUZZY_TIME_BUDGET_MS = env.int("EXAMPLES_FUZZY_TIME_BUDGET_MS", default=50)
+# Per-process memory budget, in bytes, for the fuzzy name index.
+EXAMPLES_FUZZY_MEMORY_BUDGET = env.int(
+    "EXAMPLES_FUZZY_MEMORY_BUDGET",
+    default=64 * 1024 * 1024,
+)
+# Rebuild the fuzzy name index in a background thread instead of in the request.
+EXAMPLES_FUZZY_BACKGROUND_REBUILD = True
+# Threads shared by all global searches, and how long a search waits for its
+# sources before reporting the stragglers as timed out.
+EXAMPLES_GLOBAL_SEARCH_WORKERS = env.int("EXAMPLES_GLOBAL_SEARCH_WORKERS", default=8)
+EXAMPLES_GLOBAL_SEARCH_TIMEOUT_MS = env.int(
+    "EXAMPLES_GLOBAL_SEARCH_TIMEOUT_MS",
+    default=300,
+)
+# Fraction of live searches recorded for the search_report command, how many
+# recorded searches to hold in memory at most, and how often, in seconds, a
+# background thread writes them to the database.
+EXAMPLES_SEARCH_LOG_SAMPLE_RATE = env.float(
+    "EXAMPLES_SEARCH_LOG_SAMPLE_RATE",
+    default=0.1,
+)
+EXAMPLES_SEARCH_LOG_BUFFER_SIZE = 10000
+EXAMPLES_SEARCH_LOG_FLUSH_SECONDS = 5
+# Threads per process that render the next infinite-scroll page of products
+# ahead of time, and how long, in seconds, a prefetched page stays cached.
+EXAMPLES_PRODUCT_PREFETCH_WORKERS = env.int(
+    "EXAMPLES_PRODUCT_PREFETCH_WORKERS",
+    default=2,
+)
+EXAMPLES_PRODUCT_PREFETCH_TTL = 60
+# Row counts of at least this many rows come from planner estimates instead
+# of COUNT(*); counts are cached for this many seconds at most.
+EXAMPLES_COUNT_ESTIMATE_THRESHOLD = env.int(
+    "EXAMPLES_COUNT_ESTIMATE_THRESHOLD",
+    default=10000,
+)
+EXAMPLES_COUNT_CACHE_SECONDS = 300
+# How long, in seconds, rendered per-object fragments stay cached. Changed
+# objects get new keys, so this only bounds how long old versions linger.
+EXAMPLES_FRAGMENT_CACHE_SECONDS = 24 * 60 * 60
+# Task ranks longer than this many characters get the whole task list
+# re-ranked, in a background thread unless that is turned off.
+EXAMPLES_TASK_ORDER_MAX_LENGTH = 24
+EXAMPLES_TASK_ORDER_BACKGROUND_REBALANCE = True
+# Longest time, in seconds, cached task counts are used; any committed task
+# change invalidates them sooner.
+EXAMPLES_TASK_STATS_CACHE_SECONDS = 300
+# How long browsers may keep dependent dropdown options; pages put the
+# geography version in the URLs, so a change is seen on the next page load.
+EXAMPLES_GEOGRAPHY_MAX_AGE = 24 * 60 * 60
+# Longest time, in seconds, a coalesced request waits for the identical
+# request it joined before rendering its own response.
+EXAMPLES_COALESCE_WAIT_SECONDS = 10
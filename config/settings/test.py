@@ -36,3 +36,14 @@ TEMPLATES[0]["OPTIONS"]["debug"] = True  # type: ignore[index]
 MEDIA_URL = "http://media.testserver/"
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Build the fuzzy name index in the test's own thread and transaction.
+EXAMPLES_FUZZY_BACKGROUND_REBUILD = False
+# Run global search sources in the test's own thread and transaction.
+EXAMPLES_GLOBAL_SEARCH_WORKERS = 0
+# Record no searches unless a test opts in, and flush them explicitly.
+EXAMPLES_SEARCH_LOG_SAMPLE_RATE = 0
+EXAMPLES_SEARCH_LOG_FLUSH_SECONDS = None
+# Prefetch product pages in the test's own thread and transaction.
+EXAMPLES_PRODUCT_PREFETCH_WORKERS = 0
+# Rebalance task ranks in the test's own thread and transaction.
+EXAMPLES_TASK_ORDER_BACKGROUND_REBALANCE = False
@@ -1,19 +1,24 @@
 import asyncio
-import json
+import logging
 
-# Store active WebSocket connections
-active_connections = set()
+logger = logging.getLogger(__name__)
+
+# Path -> {send callable: event loop} of the open WebSocket connections.
+subscribers = {}
 
 
 async def websocket_application(scope, receive, send):
-    """Handle WebSocket connections for real-time notifications."""
+    """Handle WebSocket connections for real-time notifications.
+
+    Every connection subscribes to the broadcasts for its path.
+    """
     # Accept the connection
     await send({"type": "websocket.accept"})
-    
-    # Add this connection to active connections
-    connection = {"receive": receive, "send": send}
-    active_connections.add(id(connection))
-    
+
+    path = scope.get("path", "/")
+    connections = subscribers.setdefault(path, {})
+    connections[send] = asyncio.get_running_loop()
+
     try:
         while True:
             event = await receive()
@@ -27,12 +32,38 @@ async def websocket_application(scope, receive, send):
                     await send({"type": "websocket.send", "text": "pong!"})
     finally:
         # Remove connection when it closes
-        active_connections.discard(id(connection))
+        connections.pop(send, None)
+
+
+def has_subscribers(path):
+    """Return whether any WebSocket connection is open on ``path``."""
+    return bool(subscribers.get(path))
+
+
+async def _send_all(path, sends, text):
+    for send in sends:
+        try:
+            await send({"type": "websocket.send", "text": text})
+        except Exception:  # noqa: BLE001
+            # Closed under us; its receive loop will unsubscribe it.
+            subscribers.get(path, {}).pop(send, None)
+
 
+def broadcast(path, text):
+    """Send ``text`` to every WebSocket connection on ``path``.
 
-async def broadcast_notification(notification_html):
-    """Broadcast a notification to all connected WebSocket clients."""
-    # Create a list of tasks to send to all connections
-    # Note: This is a simplified implementation
-    # In production, you'd want a more robust connection management system
-    pass  # Actual broadcasting will be handled by the view using Django Channels or similar
+    Callable from any thread: the sends are scheduled on the event loops
+    serving the connections, and this returns without waiting for them.
+    Only reaches connections served by this process.
+    """
+    by_loop = {}
+    for send, loop in list(subscribers.get(path, {}).items()):
+        by_loop.setdefault(loop, []).append(send)
+    for loop, sends in by_loop.items():
+        try:
+            asyncio.run_coroutine_threadsafe(_send_all(path, sends, text), loop)
+        except RuntimeError:
+            # The loop has shut down.
+            for send in sends:
+                subscribers.get(path, {}).pop(send, None)
+            logger.warning("Dropped %d connections of a closed loop", len(sends))
@@ -2,12 +2,15 @@
 
 from django.contrib import admin
 
+from .counts import EstimatedCountPaginator
 from .models import City
 from .models import Contact
 from .models import Country
 from .models import Location
 from .models import Notification
 from .models import Product
+from .models import ProductFacetCount
+from .models import SearchQueryLog
 from .models import State
 from .models import SystemStatus
 from .models import Task
@@ -15,6 +18,8 @@ from .models import Task
 
 @admin.register(Contact)
 class ContactAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("first_name", "last_name", "email", "company", "created_at")
     search_fields = ("first_name", "last_name", "email", "company")
     list_filter = ("created_at",)
@@ -22,6 +27,8 @@ class ContactAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("name", "category", "price", "in_stock", "created_at")
     search_fields = ("name", "description")
     list_filter = ("category", "in_stock", "created_at")
@@ -29,6 +36,8 @@ class ProductAdmin(admin.ModelAdmin):
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("title", "completed", "created_at", "completed_at")
     search_fields = ("title", "description")
     list_filter = ("completed", "created_at")
@@ -70,8 +79,32 @@ class LocationAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("message", "notification_type", "created_at", "is_read")
     list_filter = ("notification_type", "is_read", "created_at")
     search_fields = ("message",)
     date_hierarchy = "created_at"
 
+
+@admin.register(SearchQueryLog)
+class SearchQueryLogAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_display = (
+        "query",
+        "endpoint",
+        "latency_ms",
+        "hit_count",
+        "htmx",
+        "created_at",
+    )
+    list_filter = ("endpoint", "htmx", "created_at")
+    search_fields = ("query",)
+    date_hierarchy = "created_at"
+
+
+@admin.register(ProductFacetCount)
+class ProductFacetCountAdmin(admin.ModelAdmin):
+    list_display = ("category", "in_stock", "price_bucket", "count")
+    list_filter = ("category", "in_stock", "price_bucket")
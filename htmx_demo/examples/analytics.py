@@ -0,0 +1,104 @@
+"""Sampled live-search analytics, recorded without slowing searches down.
+
+Search views call ``record_search``, which only appends to an in-memory ring
+buffer.  A background thread drains the buffer into ``SearchQueryLog`` with
+``bulk_create`` every ``EXAMPLES_SEARCH_LOG_FLUSH_SECONDS``, so no request
+waits on the insert.  When the buffer is full the oldest entries are dropped
+and counted in the ``search_log.dropped`` metric.
+"""
+
+import atexit
+import logging
+import random
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db import transaction
+
+from . import metrics
+from .counts import count_generation
+from .generations import bump_generation
+from .models import SearchQueryLog
+from .text import normalize_search_text
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_buffer = None
+_flusher = None
+
+
+def record_search(endpoint, query, latency_ms, hit_count, *, htmx=False):
+    """Buffer one search for the analytics log, subject to sampling."""
+    rate = settings.EXAMPLES_SEARCH_LOG_SAMPLE_RATE
+    if rate <= 0 or random.random() >= rate:  # noqa: S311
+        return
+
+    global _buffer  # noqa: PLW0603
+    entry = SearchQueryLog(
+        endpoint=endpoint,
+        query=normalize_search_text(query)[:200],
+        latency_ms=latency_ms,
+        hit_count=hit_count,
+        htmx=htmx,
+    )
+    with _lock:
+        if _buffer is None:
+            _buffer = deque(maxlen=settings.EXAMPLES_SEARCH_LOG_BUFFER_SIZE)
+        if len(_buffer) == _buffer.maxlen:
+            metrics.incr("search_log.dropped")
+        _buffer.append(entry)
+    _ensure_flusher()
+
+
+def flush():
+    """Write all buffered searches to the database and return how many."""
+    with _lock:
+        if not _buffer:
+            return 0
+        entries = list(_buffer)
+        _buffer.clear()
+    SearchQueryLog.objects.bulk_create(entries, batch_size=500)
+    # bulk_create() sends no post_save, which invalidates the cached counts.
+    transaction.on_commit(partial(bump_generation, count_generation(SearchQueryLog)))
+    return len(entries)
+
+
+def reset():
+    """Drop all buffered searches without writing them (for tests)."""
+    global _buffer  # noqa: PLW0603
+    with _lock:
+        _buffer = None
+
+
+def _flush_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except Exception:
+            logger.exception("Could not write the search log")
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    global _flusher  # noqa: PLW0603
+    interval = settings.EXAMPLES_SEARCH_LOG_FLUSH_SECONDS
+    if interval is None or _flusher is not None:
+        return
+    with _lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(
+            target=_flush_forever,
+            args=(interval,),
+            name="search-log-flusher",
+            daemon=True,
+        )
+        _flusher.start()
+    atexit.register(flush)
@@ -6,3 +6,5 @@ class ExamplesConfig(AppConfig):
     name = "htmx_demo.examples"
     verbose_name = "Examples"
 
+    def ready(self):
+        import htmx_demo.examples.signals  # noqa: F401, PLC0415
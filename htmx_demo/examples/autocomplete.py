@@ -0,0 +1,194 @@
+"""In-memory prefix index answering short live-search queries.
+
+Most live-search keystrokes are one to three character prefixes.  Rather than
+sending each of them to the database, every worker process keeps a sorted
+array of ``(key, contact id)`` pairs over first name, last name, company and
+email local-part, and answers a prefix with two binary searches.
+"""
+
+import heapq
+import logging
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
+
+from django.conf import settings
+
+from .generations import get_generation
+from .models import Contact
+from .text import normalize_search_text
+
+logger = logging.getLogger(__name__)
+
+CONTACTS_GENERATION = "contacts"
+# After exceeding the memory budget, wait this long before trying to rebuild.
+OVER_BUDGET_RETRY_SECONDS = 300
+# Approximate bytes per (key, id) pair and per contact, on top of the key strings.
+# Shared key strings are counted once per pair, so the estimate errs high.
+_PAIR_BYTES = 16
+_CONTACT_BYTES = 120
+
+
+def contact_prefix_keys(first_name, last_name, email, company):
+    """Return the distinct normalized keys a contact can be found under."""
+    keys = {
+        normalize_search_text(first_name),
+        normalize_search_text(last_name),
+        normalize_search_text(email.partition("@")[0]),
+        normalize_search_text(company),
+    }
+    keys.discard("")
+    return tuple(keys)
+
+
+class ContactPrefixIndex:
+    """Sorted prefix index over contacts, private to one worker process.
+
+    The index is built from the database on first use and then kept current
+    from committed saves and deletes in this process.  Changes committed by
+    other processes advance the shared ``contacts`` generation, which makes
+    the next lookup here rebuild.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._over_budget_until = 0.0
+        self._clear()
+
+    def _clear(self):
+        self._keys = []
+        self._ids = array("q")
+        self._keys_by_id = {}
+        self._size = 0
+        self._generation = None
+
+    def reset(self):
+        """Drop all state so the next lookup rebuilds from scratch."""
+        with self._lock:
+            self._clear()
+            self._over_budget_until = 0.0
+
+    def lookup(self, prefix, limit, after=None):
+        """Return the ids of the first ``limit`` contacts matching ``prefix``.
+
+        Contacts with a key equal to ``prefix`` come first, then those with a
+        key starting with it; each group is newest first.  ``after`` is the
+        ``(rank, id)`` of the last contact already shown, with rank 0 for an
+        exact and 1 for a prefix match.
+
+        Returns ``None`` when the index cannot answer right now (it is over its
+        memory budget or another thread is rebuilding it), in which case the
+        caller should query the database instead.
+        """
+        generation = get_generation(CONTACTS_GENERATION)
+        if generation != self._generation and not self._rebuild(generation):
+            return None
+        with self._lock:
+            start = bisect_left(self._keys, prefix)
+            exact_end = bisect_right(self._keys, prefix, start)
+            end = bisect_left(self._keys, prefix + "\U0010ffff", exact_end)
+            exact = set(self._ids[start:exact_end])
+            partial = set(self._ids[exact_end:end]) - exact
+        matches = [(0, -contact_id) for contact_id in exact]
+        matches.extend((1, -contact_id) for contact_id in partial)
+        if after is not None:
+            rank, contact_id = after
+            matches = [match for match in matches if match > (rank, -contact_id)]
+        return [-contact_id for _, contact_id in heapq.nsmallest(limit, matches)]
+
+    def apply(self, generation, contact_id, keys):
+        """Apply a committed change that advanced the generation to ``generation``.
+
+        ``keys`` holds the contact's new keys, or is empty for a deletion.  If
+        the change does not directly follow the generation the index reflects,
+        some other process changed contacts too and the index is marked stale.
+        """
+        with self._lock:
+            if self._generation is None or generation != self._generation + 1:
+                self._generation = None
+                return
+            self._discard(contact_id)
+            for key in keys:
+                position = bisect_left(self._keys, key)
+                self._keys.insert(position, key)
+                self._ids.insert(position, contact_id)
+                self._size += sys.getsizeof(key) + _PAIR_BYTES
+            if keys:
+                self._keys_by_id[contact_id] = keys
+                self._size += _CONTACT_BYTES
+            if self._size > settings.EXAMPLES_AUTOCOMPLETE_MEMORY_BUDGET:
+                self._give_up()
+                return
+            self._generation = generation
+
+    def _discard(self, contact_id):
+        keys = self._keys_by_id.pop(contact_id, ())
+        if keys:
+            self._size -= _CONTACT_BYTES
+        for key in keys:
+            position = bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._ids[position] == contact_id:
+                    del self._keys[position]
+                    del self._ids[position]
+                    self._size -= sys.getsizeof(key) + _PAIR_BYTES
+                    break
+                position += 1
+
+    def _give_up(self):
+        logger.warning(
+            "Contact prefix index exceeded %d bytes; falling back to database search",
+            settings.EXAMPLES_AUTOCOMPLETE_MEMORY_BUDGET,
+        )
+        self._clear()
+        self._over_budget_until = time.monotonic() + OVER_BUDGET_RETRY_SECONDS
+
+    def _rebuild(self, generation):
+        if time.monotonic() < self._over_budget_until:
+            return False
+        if not self._rebuild_lock.acquire(blocking=False):
+            return False
+        try:
+            budget = settings.EXAMPLES_AUTOCOMPLETE_MEMORY_BUDGET
+            interned = {}
+            pairs = []
+            keys_by_id = {}
+            size = 0
+            rows = Contact.objects.order_by().values_list(
+                "id",
+                "first_name",
+                "last_name",
+                "email",
+                "company",
+            )
+            for contact_id, *fields in rows.iterator(chunk_size=5000):
+                keys = []
+                for raw_key in contact_prefix_keys(*fields):
+                    key = interned.setdefault(raw_key, raw_key)
+                    keys.append(key)
+                    pairs.append((key, contact_id))
+                    size += sys.getsizeof(key) + _PAIR_BYTES
+                keys_by_id[contact_id] = tuple(keys)
+                size += _CONTACT_BYTES
+                if size > budget:
+                    with self._lock:
+                        self._give_up()
+                    return False
+
+            pairs.sort()
+            with self._lock:
+                self._keys = [key for key, _ in pairs]
+                self._ids = array("q", (contact_id for _, contact_id in pairs))
+                self._keys_by_id = keys_by_id
+                self._size = size
+                self._generation = generation
+            return True
+        finally:
+            self._rebuild_lock.release()
+
+
+contact_prefix_index = ContactPrefixIndex()
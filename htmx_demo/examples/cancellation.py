@@ -0,0 +1,82 @@
+"""Database work from async views that stops when the client goes away.
+
+Since Django 5.0 the ASGI handler listens for ``http.disconnect`` and cancels
+the task running an async view.  That alone does not stop a query already
+executing in the sync thread, so ``run_cancellable`` also asks the database to
+cancel it and records how much database time was spent for nothing.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RunningQuery:
+    """The database query a sync call is running, cancellable from another thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._raw_connection = None
+        self._vendor = None
+        self._cancelled = False
+        self.started = None
+
+    def run(self, func, *args, **kwargs):
+        """Call ``func`` in this thread, tracking its database connection."""
+        with self._lock:
+            if self._cancelled:
+                return None
+            connection.ensure_connection()
+            self._raw_connection = connection.connection
+            self._vendor = connection.vendor
+            self.started = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._raw_connection = None
+
+    def cancel(self):
+        """Cancel the running query, or keep ``run()`` from starting one."""
+        # Holding the lock keeps the worker thread from moving on to someone
+        # else's query on the same connection while the cancel request is sent.
+        with self._lock:
+            self._cancelled = True
+            if self._raw_connection is None:
+                return
+            if self._vendor == "postgresql":
+                self._raw_connection.cancel_safe()
+            elif self._vendor == "sqlite":
+                self._raw_connection.interrupt()
+
+
+async def run_cancellable(func, *args, metric, **kwargs):
+    """Run ``func`` in the sync thread, cancelling its query if we are cancelled.
+
+    ``metric`` prefixes the ``.cancelled`` and ``.wasted_db_ms`` counters
+    incremented when that happens.
+    """
+    running = RunningQuery()
+    try:
+        return await sync_to_async(running.run)(func, *args, **kwargs)
+    except asyncio.CancelledError:
+        wasted_ms = 0
+        if running.started is not None:
+            wasted_ms = round((time.monotonic() - running.started) * 1000)
+        asyncio.get_running_loop().run_in_executor(None, running.cancel)
+        metrics.incr(f"{metric}.cancelled")
+        metrics.incr(f"{metric}.wasted_db_ms", wasted_ms)
+        logger.info(
+            "Cancelled %s query after %d ms: client disconnected",
+            metric,
+            wasted_ms,
+        )
+        raise
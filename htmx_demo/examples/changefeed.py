@@ -0,0 +1,144 @@
+"""Committed model changes pushed to WebSocket clients as HTMX swaps.
+
+A second browser showing the task list or the status dashboard would have
+to poll to see what others change.  Instead, every committed save or delete
+of a ``Task``, ``Contact`` or ``SystemStatus`` is rendered once, with the
+same partials the HTMX endpoints return, and broadcast to the connections
+on ``CHANGE_FEED_PATH`` as out-of-band swaps: the htmx ``ws`` extension
+swaps each element into the page by its id.  New tasks go to the top of
+``#htmx-task-list``; other changes only update elements a page already
+shows.
+
+Nothing is rendered while no client is connected to this process.  The
+signal handlers in ``examples.signals`` publish ordinary saves and deletes;
+statements that fire no signals, like those in ``examples.tasks``, call
+``publish_changes`` themselves.  Counter: ``change_feed.broadcast``.
+"""
+
+import copy
+import logging
+from functools import partial
+
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+
+from config import websocket
+
+from . import metrics
+from .models import Contact
+from .models import SystemStatus
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+CHANGE_FEED_PATH = "/ws/changes/"
+
+
+def _task_html(task, *, created, position=None):
+    html = render_to_string(
+        "examples/partials/task_item.html",
+        {"task": task, "oob": not (created or position)},
+    )
+    if position:
+        swap, neighbour_id = position
+        # Out of its old place and into the new one, next to its neighbour.
+        return format_html(
+            '<div id="task-{}" hx-swap-oob="delete"></div>'
+            '<div hx-swap-oob="{}:#task-{}">{}</div>',
+            task.pk,
+            swap,
+            neighbour_id,
+            html,
+        )
+    if created:
+        return format_html(
+            '<div id="htmx-task-list" hx-swap-oob="afterbegin">{}</div>',
+            html,
+        )
+    return html
+
+
+def _contact_html(contact, *, created):
+    if created:
+        # Not on anyone's page yet.
+        return ""
+    return render_to_string(
+        "examples/partials/contact_results.html",
+        {"contacts": [contact], "oob": True},
+    )
+
+
+def _status_html(status, *, created):
+    return render_to_string(
+        "examples/partials/system_status.html",
+        {"statuses": [status]},
+    )
+
+
+def _task_stats_html():
+    # Imported here: examples.tasks publishes through this module.
+    from .tasks import task_stats  # noqa: PLC0415
+
+    return render_to_string(
+        "examples/partials/task_stats.html",
+        {"stats": task_stats(fresh=True), "oob": True},
+    )
+
+
+# Model -> (element id prefix, renderer of a saved instance).
+_FEEDS = {
+    Task: ("task", _task_html),
+    Contact: ("contact", _contact_html),
+    SystemStatus: ("status", _status_html),
+}
+
+
+def render_changes(model, saved=(), deleted_ids=(), *, created=False, position=None):
+    """Return the out-of-band swaps for the changed ``model`` instances.
+
+    ``saved`` are instances as saved, ``created`` if they are new, and
+    ``deleted_ids`` the primary keys of deleted ones.  Tasks moved in the
+    list pass their new ``position``: ``("afterend", id)`` or
+    ``("beforebegin", id)`` of a neighbouring task.
+    """
+    prefix, render = _FEEDS[model]
+    extra = {"position": position} if position else {}
+    parts = [render(instance, created=created, **extra) for instance in saved]
+    parts.extend(
+        format_html('<div id="{}-{}" hx-swap-oob="delete"></div>', prefix, pk)
+        for pk in deleted_ids
+    )
+    if model is Task:
+        parts.append(_task_stats_html())
+    return "".join(parts)
+
+
+def _broadcast_changes(model, saved, deleted_ids, options):
+    # After the commit: a failure here must not fail the request.
+    try:
+        html = render_changes(model, saved, deleted_ids, **options)
+        if html:
+            websocket.broadcast(CHANGE_FEED_PATH, html)
+            metrics.incr("change_feed.broadcast")
+    except Exception:
+        logger.exception("Could not broadcast %s changes", model.__name__)
+
+
+def publish_changes(model, saved=(), deleted_ids=(), *, using=None, **options):
+    """Broadcast changed ``model`` instances once the transaction commits.
+
+    Takes the arguments of ``render_changes``, its keyword-only ``options``
+    included; ``saved`` may be a queryset, which is only read if a client is
+    connected.  Does nothing while no client is connected to the change feed.
+    """
+    if not websocket.has_subscribers(CHANGE_FEED_PATH):
+        return
+    # As they are now: the instances may change again before the commit.
+    saved = [copy.copy(instance) for instance in saved]
+    if not (saved or deleted_ids):
+        return
+    transaction.on_commit(
+        partial(_broadcast_changes, model, saved, list(deleted_ids), options),
+        using=using,
+    )
@@ -0,0 +1,100 @@
+"""Cheap row counts for paginated endpoints and admin changelists.
+
+An exact ``COUNT(*)`` reads every matching row, which gets slow on large
+tables and is usually only shown as "about N results".  ``count_rows`` asks
+the PostgreSQL planner first: ``pg_class.reltuples`` for a whole table, the
+row estimate of ``EXPLAIN`` for a filtered queryset.  Only when the estimate
+is below ``EXAMPLES_COUNT_ESTIMATE_THRESHOLD``, where counting is cheap and
+the planner's guess is least reliable, does it run the exact count.
+
+Counts are cached per query and per model generation, which every committed
+save or delete of the model bumps (see ``examples.signals``).
+"""
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+from .generations import get_generation
+
+logger = logging.getLogger(__name__)
+
+
+def count_generation(model):
+    """Return the name of the generation that invalidates counts of ``model``."""
+    return f"count:{model._meta.label_lower}"  # noqa: SLF001
+
+
+def _table_estimate(queryset):
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],  # noqa: SLF001
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 until the table has been vacuumed or analyzed.
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+def _plan_estimate(queryset):
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(queryset):
+    """Return the planner's row estimate for ``queryset``, or None if unknown."""
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    if not queryset.query.where and not queryset.query.is_sliced:
+        return _table_estimate(queryset)
+    return _plan_estimate(queryset)
+
+
+def count_rows(queryset):
+    """Return the number of rows in ``queryset``, estimated for large results.
+
+    Returns ``(count, estimated)``; ``estimated`` is True when ``count`` is
+    the planner's estimate rather than an exact count.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(
+        f"{queryset.db}:{sql}:{params!r}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    generation = get_generation(count_generation(queryset.model))
+    key = f"examples:count:{generation}:{digest}"
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    estimate = estimate_count(queryset)
+    if estimate is not None and estimate >= settings.EXAMPLES_COUNT_ESTIMATE_THRESHOLD:
+        result = (estimate, True)
+    else:
+        result = (queryset.count(), False)
+    cache.set(key, result, timeout=settings.EXAMPLES_COUNT_CACHE_SECONDS)
+    return result
+
+
+class EstimatedCountPaginator(Paginator):
+    """A ``Paginator`` whose ``count`` comes from ``count_rows``.
+
+    For admin changelists of large tables; pair it with
+    ``show_full_result_count = False`` so the changelist does not count the
+    whole table separately.
+    """
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            return count_rows(self.object_list)[0]
+        return len(self.object_list)
@@ -0,0 +1,146 @@
+"""Facet counts for product browsing, kept in a summary table.
+
+Badges such as "Electronics (1,204)" need the number of products per
+category, stock state and price range under the current filters.  Counting
+them with ``GROUP BY`` reads the whole product table on every request.
+Instead, ``ProductFacetCount`` holds one row per (category, in_stock, price
+bucket) combination with its number of products.  There are at most a few
+dozen such cells, so facet counts for any filter come from summing cells
+rather than scanning products.
+
+Signal handlers (see ``examples.signals``) adjust the cells inside the same
+transaction as every product save and delete, so the counts are exact.
+Bulk operations such as ``QuerySet.update()`` bypass signals; run
+``manage.py rebuild_facet_counts`` after those.
+"""
+
+from decimal import Decimal
+
+from django.db import IntegrityError
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models import When
+
+from .models import Product
+from .models import ProductFacetCount
+
+# (key, label, lower bound inclusive, upper bound exclusive or None).
+PRICE_BUCKETS = (
+    ("0-25", "Under $25", Decimal(0), Decimal(25)),
+    ("25-50", "$25 to $50", Decimal(25), Decimal(50)),
+    ("50-100", "$50 to $100", Decimal(50), Decimal(100)),
+    ("100-250", "$100 to $250", Decimal(100), Decimal(250)),
+    ("250+", "$250 and up", Decimal(250), None),
+)
+FACET_FIELDS = ("category", "in_stock", "price_bucket")
+
+
+def price_bucket(price):
+    """Return the key of the price bucket ``price`` falls into."""
+    for key, _, low, high in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return key
+    # Negative prices are not expected; count them with the cheapest.
+    return PRICE_BUCKETS[0][0]
+
+
+def facet_cell(product):
+    """Return the (category, in_stock, price bucket) cell ``product`` counts in."""
+    return product.category, product.in_stock, price_bucket(Decimal(product.price))
+
+
+def adjust_count(cell, delta):
+    """Add ``delta`` to the number of products in ``cell``, atomically."""
+    cells = ProductFacetCount.objects.filter(
+        **dict(zip(FACET_FIELDS, cell, strict=True)),
+    )
+    if cells.update(count=F("count") + delta):
+        return
+    try:
+        with transaction.atomic():
+            ProductFacetCount.objects.create(
+                **dict(zip(FACET_FIELDS, cell, strict=True)),
+                count=delta,
+            )
+    except IntegrityError:
+        # Created concurrently since the update above.
+        cells.update(count=F("count") + delta)
+
+
+def rebuild_facet_counts():
+    """Recount every cell from the product table; returns the number of cells."""
+    bucket = Case(
+        *[
+            When(
+                Q(price__gte=low) & (Q(price__lt=high) if high is not None else Q()),
+                then=Value(key),
+            )
+            for key, _, low, high in PRICE_BUCKETS
+        ],
+        default=Value(PRICE_BUCKETS[0][0]),
+    )
+    rows = (
+        Product.objects.annotate(price_bucket=bucket)
+        .values(*FACET_FIELDS)
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    with transaction.atomic():
+        ProductFacetCount.objects.all().delete()
+        cells = ProductFacetCount.objects.bulk_create(
+            ProductFacetCount(**row) for row in rows
+        )
+    return len(cells)
+
+
+def _matches(cell, filters, ignore):
+    # A facet's own filter is ignored when counting its choices.
+    for field, value in filters.items():
+        if field != ignore and cell[field] != value:
+            return False
+    return True
+
+
+def _facet_labels():
+    categories = dict(Product._meta.get_field("category").choices)  # noqa: SLF001
+    return {
+        "category": categories,
+        "in_stock": {True: "In stock", False: "Out of stock"},
+        "price_bucket": {key: label for key, label, *_ in PRICE_BUCKETS},
+    }
+
+
+def product_facets(filters=None):
+    """Return facet counts for the product list under ``filters``.
+
+    ``filters`` maps ``category``, ``in_stock`` or ``price_bucket`` to the
+    selected value.  As usual for facets, the counts for one facet apply
+    all filters but its own, so the other choices of that facet show how
+    many products they would switch to.  Returns ``{facet: [choice]}`` where
+    each choice is a dict with ``value``, ``label`` and ``count``, for the
+    values that have products, in display order.
+    """
+    filters = filters or {}
+    cells = ProductFacetCount.objects.filter(count__gt=0).values(
+        *FACET_FIELDS,
+        "count",
+    )
+    totals = {field: {} for field in FACET_FIELDS}
+    for cell in cells:
+        for field in FACET_FIELDS:
+            if _matches(cell, filters, ignore=field):
+                value = cell[field]
+                totals[field][value] = totals[field].get(value, 0) + cell["count"]
+
+    facets = {}
+    for field, labels in _facet_labels().items():
+        facets[field] = [
+            {"value": value, "label": label, "count": totals[field][value]}
+            for value, label in labels.items()
+            if totals[field].get(value)
+        ]
+    return facets
@@ -0,0 +1,128 @@
+"""Per-object fragment caching ("Russian doll" caching) for list partials.
+
+A list of product cards is mostly the same cards over and over; only the
+products that changed since the last render need rendering again.  Each
+object's fragment is cached under its id, its version (``updated_at`` by
+default) and a digest of the template source, including the templates it
+includes, so saving the object or editing a template moves it to a new key
+and stale HTML is never served.
+A list render is one ``get_many`` for all of its fragments, rendering and
+``set_many`` for the misses only.
+
+Fragments are rendered without a request, so their templates must not rely
+on context processors or ``{% csrf_token %}``.
+"""
+
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.template.loader_tags import ExtendsNode
+from django.template.loader_tags import IncludeNode
+
+from . import metrics
+
+# Template name -> ((path, mtime) of each template it is made of, digest).
+_digests = {}
+
+
+def _mtime(path):
+    try:
+        return Path(path).stat().st_mtime_ns
+    except (OSError, TypeError):
+        # Not loaded from a file.
+        return None
+
+
+def _templates(template_name, found):
+    # template_name and all templates it includes or extends by a literal name.
+    if template_name not in found:
+        template = found[template_name] = get_template(template_name).template
+        for node in template.nodelist.get_nodes_by_type((IncludeNode, ExtendsNode)):
+            expression = (
+                node.template if isinstance(node, IncludeNode) else node.parent_name
+            )
+            if isinstance(expression.var, str):
+                _templates(expression.var, found)
+    return found
+
+
+def template_digest(template_name):
+    """Return a short digest of the source of ``template_name``.
+
+    The templates it includes or extends count too.  Digests are kept for
+    the life of the process; with ``DEBUG`` on, a digest is recomputed once
+    any of its template files has been modified.
+    """
+    memo = _digests.get(template_name)
+    if memo is not None:
+        mtimes, digest = memo
+        if not settings.DEBUG or all(_mtime(path) == mtime for path, mtime in mtimes):
+            return digest
+
+    templates = _templates(template_name, {})
+    source_hash = hashlib.md5(usedforsecurity=False)
+    for name in sorted(templates):
+        source_hash.update(templates[name].source.encode())
+    mtimes = tuple(
+        (template.origin.name, _mtime(template.origin.name))
+        for template in templates.values()
+    )
+    digest = source_hash.hexdigest()[:12]
+    _digests[template_name] = (mtimes, digest)
+    return digest
+
+
+def _field(obj, name):
+    return obj[name] if isinstance(obj, dict) else getattr(obj, name)
+
+
+def fragment_key(template_name, obj, version_field="updated_at"):
+    """Return the cache key of ``obj`` rendered with ``template_name``."""
+    version = _field(obj, version_field)
+    if hasattr(version, "isoformat"):
+        version = version.isoformat()
+    return (
+        f"examples:fragment:{template_name}:{template_digest(template_name)}:"
+        f"{_field(obj, 'id')}:{version}"
+    )
+
+
+def render_fragments(template_name, objects, name, *, version_field="updated_at"):
+    """Render ``template_name`` once per object, reusing cached fragments.
+
+    Each object is passed to the template as ``name``; objects may be model
+    instances or ``values()`` dicts with ``id`` and ``version_field``.
+    Returns the fragments in the order of ``objects``.
+    """
+    objects = list(objects)
+    keys = [fragment_key(template_name, obj, version_field) for obj in objects]
+    cached = cache.get_many(keys)
+
+    template = None
+    fragments = []
+    missing = {}
+    for key, obj in zip(keys, objects, strict=True):
+        html = cached.get(key)
+        if html is None:
+            template = template or get_template(template_name)
+            html = missing[key] = template.render({name: obj})
+        fragments.append(html)
+
+    if missing:
+        cache.set_many(missing, timeout=settings.EXAMPLES_FRAGMENT_CACHE_SECONDS)
+    metrics.incr("fragment_cache.hit", len(objects) - len(missing))
+    metrics.incr("fragment_cache.miss", len(missing))
+    return fragments
+
+
+def render_fragment(template_name, obj, name, *, version_field="updated_at"):
+    """Render a single object like ``render_fragments``."""
+    return render_fragments(template_name, [obj], name, version_field=version_field)[0]
+
+
+def reset():
+    """Forget this process's template digests (for tests)."""
+    _digests.clear()
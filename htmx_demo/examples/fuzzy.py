@@ -0,0 +1,340 @@
+"""Typo-tolerant contact matching over name tokens.
+
+A live search for "Jonh Deo" should still find John Doe.  Every worker process
+keeps a BK-tree over the distinct first- and last-name tokens of all contacts,
+plus the ids of the contacts carrying each token.  Names repeat a lot, so the
+tree grows with the number of distinct names rather than with the number of
+contacts, and a lookup only visits the branches that can hold a token within
+the allowed edit distance.
+
+The tree only proposes candidates: callers re-check the actual contact rows,
+so a tree that is a few changes behind can miss a contact but never returns a
+wrong one.
+"""
+
+import heapq
+import logging
+import sys
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+from .autocomplete import CONTACTS_GENERATION
+from .generations import get_generation
+from .models import Contact
+from .text import normalize_search_text
+
+logger = logging.getLogger(__name__)
+
+# After exceeding the memory budget, wait this long before trying to rebuild.
+OVER_BUDGET_RETRY_SECONDS = 300
+# Check the deadline every this many visited tree nodes.
+_DEADLINE_CHECK_INTERVAL = 64
+# Approximate bytes per tree node, per posting and per contact, on top of the
+# token strings themselves.
+_NODE_BYTES = 200
+_POSTING_BYTES = 8
+_CONTACT_BYTES = 120
+
+
+def damerau_levenshtein(a, b):
+    """Return the Damerau-Levenshtein distance between two strings.
+
+    Insertions, deletions, substitutions and transpositions of adjacent
+    characters each count as one edit.  Unlike the restricted "optimal string
+    alignment" variant this is a true metric, which the BK-tree relies on.
+    """
+    len_b = len(b)
+    width = len_b + 2
+    worst = len(a) + len_b
+    # A flattened (len(a) + 2) x (len(b) + 2) table; row and column 0 hold the
+    # sentinel, the usual DP table starts at 1.
+    table = [worst] * ((len(a) + 2) * width)
+    for i in range(len(a) + 1):
+        table[(i + 1) * width + 1] = i
+    for j in range(len_b + 1):
+        table[width + j + 1] = j
+
+    last_row_of = {}
+    for i, char_a in enumerate(a, 1):
+        last_match_column = 0
+        row = (i + 1) * width
+        above = i * width
+        for j, char_b in enumerate(b, 1):
+            swap_row = last_row_of.get(char_b, 0)
+            swap_column = last_match_column
+            if char_a == char_b:
+                best = table[above + j]
+                last_match_column = j
+            else:
+                best = table[above + j] + 1
+            # min() is markedly slower than comparisons in this hot loop.
+            if table[row + j] + 1 < best:  # noqa: PLR1730
+                best = table[row + j] + 1
+            if table[above + j + 1] + 1 < best:  # noqa: PLR1730
+                best = table[above + j + 1] + 1
+            transposed = (
+                table[swap_row * width + swap_column]
+                + (i - swap_row - 1)
+                + 1
+                + (j - swap_column - 1)
+            )
+            table[row + j + 1] = transposed if transposed < best else best
+        last_row_of[char_a] = i
+    return table[(len(a) + 1) * width + len_b + 1]
+
+
+def max_edits(token):
+    """Return how many edits a query token of this length may be away from a name."""
+    edits = 0
+    for min_length, allowed in settings.EXAMPLES_FUZZY_MAX_EDITS:
+        if len(token) >= min_length:
+            edits = allowed
+    return edits
+
+
+def contact_name_tokens(first_name, last_name):
+    """Return the distinct normalized name tokens of a contact."""
+    return tuple(
+        dict.fromkeys(normalize_search_text(f"{first_name} {last_name}").split()),
+    )
+
+
+def match_distance(query_tokens, name_tokens):
+    """Return the summed edit distance of the best match for every query token.
+
+    Returns ``None`` if some query token is not within its tolerance of any
+    of ``name_tokens``.
+    """
+    total = 0
+    for query_token in query_tokens:
+        allowed = max_edits(query_token)
+        best = min(
+            (damerau_levenshtein(query_token, name) for name in name_tokens),
+            default=allowed + 1,
+        )
+        if best > allowed:
+            return None
+        total += best
+    return total
+
+
+class _Node:
+    __slots__ = ("children", "token")
+
+    def __init__(self, token):
+        self.token = token
+        self.children = {}
+
+
+class _NameTree:
+    """The BK-tree itself, with the contact ids behind every token."""
+
+    def __init__(self):
+        self.root = None
+        self.postings = {}
+        self.tokens_by_id = {}
+        self.size = 0
+
+    def add_contact(self, contact_id, tokens):
+        for token in tokens:
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = array("q")
+                self.size += sys.getsizeof(token) + _NODE_BYTES
+                self._insert(token)
+            postings.append(contact_id)
+            self.size += _POSTING_BYTES
+        if tokens:
+            self.tokens_by_id[contact_id] = tokens
+            self.size += _CONTACT_BYTES
+
+    def remove_contact(self, contact_id):
+        # Tokens stay in the tree with an empty posting list; rebuilds prune them.
+        tokens = self.tokens_by_id.pop(contact_id, ())
+        if tokens:
+            self.size -= _CONTACT_BYTES
+        for token in tokens:
+            self.postings[token].remove(contact_id)
+            self.size -= _POSTING_BYTES
+
+    def _insert(self, token):
+        if self.root is None:
+            self.root = _Node(token)
+            return
+        node = self.root
+        while True:
+            distance = damerau_levenshtein(token, node.token)
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _Node(token)
+                return
+            node = child
+
+    def search(self, token, allowed, deadline):
+        """Return ``(token, distance)`` for tree tokens within ``allowed`` edits."""
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        visited = 0
+        while stack:
+            if visited % _DEADLINE_CHECK_INTERVAL == 0 and time.monotonic() > deadline:
+                metrics.incr("contact_fuzzy.deadline_exceeded")
+                logger.info("Fuzzy lookup for %r hit its time budget", token)
+                break
+            visited += 1
+            node = stack.pop()
+            distance = damerau_levenshtein(token, node.token)
+            if distance <= allowed and self.postings[node.token]:
+                matches.append((node.token, distance))
+            stack.extend(
+                child
+                for edge, child in node.children.items()
+                if distance - allowed <= edge <= distance + allowed
+            )
+        return matches
+
+
+class ContactNameIndex:
+    """BK-tree over contact name tokens, private to one worker process.
+
+    The tree is kept current from committed saves and deletes in this
+    process.  When another process changes contacts, the shared ``contacts``
+    generation moves on and the tree is rebuilt, in a background thread
+    unless ``EXAMPLES_FUZZY_BACKGROUND_REBUILD`` is off; lookups keep using
+    the previous tree meanwhile.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._over_budget_until = 0.0
+        self._clear()
+
+    def _clear(self):
+        self._tree = None
+        self._generation = None
+
+    def reset(self):
+        """Drop all state so the next lookup rebuilds from scratch."""
+        with self._lock:
+            self._clear()
+            self._over_budget_until = 0.0
+
+    def lookup(self, query_tokens, limit, deadline):
+        """Return up to ``limit`` ``(distance, id)`` candidates, closest first.
+
+        Stops walking the tree at ``deadline`` (a ``time.monotonic()`` value)
+        and ranks what it found by then.  Returns ``None`` when there is no
+        tree to search yet.
+        """
+        generation = get_generation(CONTACTS_GENERATION)
+        if generation != self._generation:
+            self._refresh(generation)
+
+        with self._lock:
+            tree = self._tree
+            if tree is None:
+                return None
+            per_token = []
+            for query_token in query_tokens:
+                best = {}
+                for token, distance in tree.search(
+                    query_token,
+                    max_edits(query_token),
+                    deadline,
+                ):
+                    for contact_id in tree.postings[token]:
+                        if distance < best.get(contact_id, distance + 1):
+                            best[contact_id] = distance
+                per_token.append(best)
+
+        per_token.sort(key=len)
+        scores = per_token[0] if per_token else {}
+        for best in per_token[1:]:
+            scores = {
+                contact_id: score + best[contact_id]
+                for contact_id, score in scores.items()
+                if contact_id in best
+            }
+        ranked = heapq.nsmallest(
+            limit,
+            ((score, -contact_id) for contact_id, score in scores.items()),
+        )
+        return [(score, -contact_id) for score, contact_id in ranked]
+
+    def apply(self, generation, contact_id, tokens):
+        """Apply a committed change that advanced the generation to ``generation``.
+
+        ``tokens`` holds the contact's new name tokens, or is empty for a
+        deletion.  If the change does not directly follow the generation the
+        tree reflects, the tree is marked stale.
+        """
+        with self._lock:
+            if self._generation is None or generation != self._generation + 1:
+                self._generation = None
+                return
+            self._tree.remove_contact(contact_id)
+            self._tree.add_contact(contact_id, tokens)
+            if self._tree.size > settings.EXAMPLES_FUZZY_MEMORY_BUDGET:
+                self._give_up()
+                return
+            self._generation = generation
+
+    def _give_up(self):
+        logger.warning(
+            "Contact name index exceeded %d bytes; fuzzy search disabled",
+            settings.EXAMPLES_FUZZY_MEMORY_BUDGET,
+        )
+        self._clear()
+        self._over_budget_until = time.monotonic() + OVER_BUDGET_RETRY_SECONDS
+
+    def _refresh(self, generation):
+        if time.monotonic() < self._over_budget_until:
+            return
+        if not settings.EXAMPLES_FUZZY_BACKGROUND_REBUILD:
+            self.rebuild(generation)
+            return
+        if self._rebuild_lock.locked():
+            return
+
+        def run():
+            try:
+                self.rebuild(generation)
+            finally:
+                connections.close_all()
+
+        threading.Thread(target=run, name="contact-name-index", daemon=True).start()
+
+    def rebuild(self, generation=None):
+        """Rebuild the tree from the database, unless a rebuild is running."""
+        if not self._rebuild_lock.acquire(blocking=False):
+            return
+        try:
+            if generation is None:
+                generation = get_generation(CONTACTS_GENERATION)
+            budget = settings.EXAMPLES_FUZZY_MEMORY_BUDGET
+            # Built on the side so lookups keep using the current tree meanwhile.
+            tree = _NameTree()
+            rows = Contact.objects.order_by("pk").values_list(
+                "id",
+                "first_name",
+                "last_name",
+            )
+            for contact_id, first_name, last_name in rows.iterator(chunk_size=5000):
+                tree.add_contact(contact_id, contact_name_tokens(first_name, last_name))
+                if tree.size > budget:
+                    with self._lock:
+                        self._give_up()
+                    return
+            with self._lock:
+                self._tree = tree
+                self._generation = generation
+        finally:
+            self._rebuild_lock.release()
+
+
+contact_name_index = ContactNameIndex()
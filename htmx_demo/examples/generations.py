@@ -0,0 +1,34 @@
+"""Shared generation counters for data derived from the examples models.
+
+A generation is a number stored in the default cache that is bumped after
+every committed change to a model.  Per-process indexes compare it against the
+generation they were built from, and cache keys embed it, so a change made by
+any worker invalidates derived data in all of them.
+"""
+
+import time
+
+from django.core.cache import cache
+
+
+def _cache_key(name):
+    return f"examples:generation:{name}"
+
+
+def get_generation(name):
+    """Return the current generation for ``name``."""
+    # Seed from the clock so a flushed cache never hands out an old generation again.
+    return cache.get_or_set(_cache_key(name), time.time_ns(), timeout=None)
+
+
+def bump_generation(name):
+    """Advance the generation for ``name`` and return the new value."""
+    key = _cache_key(name)
+    cache.add(key, time.time_ns(), timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); start over from a fresh seed.
+        generation = time.time_ns()
+        cache.set(key, generation, timeout=None)
+        return generation
@@ -0,0 +1,111 @@
+"""The country, state and city tree behind the dependent dropdowns, precomputed.
+
+Countries, states and cities hardly ever change, yet every change of a
+dropdown used to cost a query and a template render.  Instead, every worker
+process keeps the whole tree with the ``<option>`` list and the JSON body
+for the children of every country and state already rendered, so the
+dropdown endpoints only look them up.
+
+The tree is versioned by the shared ``geography`` generation, bumped by
+every committed change to the three models (see ``examples.signals``): a
+lookup rebuilds it when the generation moved.  The version doubles as the
+endpoints' ETag, and pages add it to the endpoint URLs so that browsers may
+cache the responses for a long time without ever showing a stale tree.
+"""
+
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.template.loader import render_to_string
+
+from .generations import get_generation
+from .models import City
+from .models import State
+
+logger = logging.getLogger(__name__)
+
+GEOGRAPHY_GENERATION = "geography"
+# Level -> (template of its options, fields of its JSON items).
+_LEVELS = {
+    "states": ("examples/partials/state_options.html", ("id", "name", "code")),
+    "cities": ("examples/partials/city_options.html", ("id", "name")),
+}
+
+_lock = threading.Lock()
+_tree = None
+
+
+class GeographyTree:
+    """The dropdown responses for every parent id, as of one generation.
+
+    ``level`` is ``"states"`` (children of a country) or ``"cities"``
+    (children of a state).  Parent ids are looked up as the strings found in
+    query parameters; unknown ones have no children.
+    """
+
+    def __init__(self, version, children):
+        self.version = version
+        self._html = {}
+        self._json = {}
+        for level, (template, fields) in _LEVELS.items():
+            self._html[level] = {"": render_to_string(template, {level: []})}
+            self._json[level] = {"": json.dumps({level: []})}
+            for parent_id, rows in children[level].items():
+                self._html[level][parent_id] = render_to_string(
+                    template,
+                    {level: rows},
+                )
+                items = [
+                    {field: getattr(row, field) for field in fields} for row in rows
+                ]
+                self._json[level][parent_id] = json.dumps({level: items})
+
+    def options_html(self, level, parent_id):
+        """Return the ``<option>`` list of the children of ``parent_id``."""
+        html = self._html[level]
+        return html.get(parent_id or "", html[""])
+
+    def options_json(self, level, parent_id):
+        """Return the JSON body listing the children of ``parent_id``."""
+        bodies = self._json[level]
+        return bodies.get(parent_id or "", bodies[""])
+
+
+def _build(version):
+    children = {level: defaultdict(list) for level in _LEVELS}
+    # In each model's default order, as the dropdowns list them.
+    for state in State.objects.only("id", "name", "code", "country_id"):
+        children["states"][str(state.country_id)].append(state)
+    for city in City.objects.only("id", "name", "state_id"):
+        children["cities"][str(city.state_id)].append(city)
+    tree = GeographyTree(version, children)
+    logger.info("Built the geography tree at generation %s", version)
+    return tree
+
+
+def geography_tree():
+    """Return the ``GeographyTree`` of the current generation."""
+    global _tree  # noqa: PLW0603
+    version = get_generation(GEOGRAPHY_GENERATION)
+    tree = _tree
+    if tree is not None and tree.version == version:
+        return tree
+    with _lock:
+        # Another thread may have rebuilt it meanwhile.
+        if _tree is None or _tree.version != version:
+            _tree = _build(version)
+        return _tree
+
+
+def geography_etag(request, *args, **kwargs):
+    """Return the ETag of the dropdown endpoints, for ``@condition``."""
+    return str(geography_tree().version)
+
+
+def reset():
+    """Drop this process's tree (for tests)."""
+    global _tree  # noqa: PLW0603
+    with _lock:
+        _tree = None
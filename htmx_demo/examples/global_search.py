@@ -0,0 +1,210 @@
+"""Federated search across the examples models.
+
+One search box queries contacts, products, locations and tasks.  The
+per-model queries run concurrently on a small shared thread pool, so a search
+takes about as long as its slowest source rather than the sum of all four.  A
+source that misses the deadline is cancelled and reported as timed out
+instead of holding up the others.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models import When
+
+from . import metrics
+from .cancellation import RunningQuery
+from .models import Location
+from .models import Product
+from .models import Task
+from .search import RANK_EXACT
+from .search import RANK_PREFIX
+from .search import RANK_SUBSTRING
+from .search import find_contacts
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _rank_by(queryset, field, query):
+    """Order ``queryset`` exact match first, then prefix, then substring match."""
+    rank = Case(
+        When(**{f"{field}__iexact": query}, then=Value(RANK_EXACT)),
+        When(**{f"{field}__istartswith": query}, then=Value(RANK_PREFIX)),
+        default=Value(RANK_SUBSTRING),
+    )
+    return queryset.annotate(search_rank=rank).order_by("search_rank", field, "pk")
+
+
+def _search_contacts(query, limit):
+    return [
+        {
+            "id": row["id"],
+            "rank": row["rank"],
+            "title": f"{row['first_name']} {row['last_name']}",
+            "subtitle": row["email"],
+            "object": row,
+        }
+        for row in find_contacts(query, limit=limit)
+    ]
+
+
+def _search_products(query, limit):
+    products = Product.objects.filter(
+        Q(name__icontains=query) | Q(description__icontains=query),
+    )
+    return [
+        {
+            "id": product.id,
+            "rank": product.search_rank,
+            "title": product.name,
+            "subtitle": f"${product.price}",
+            "object": product,
+        }
+        for product in _rank_by(products, "name", query)[:limit]
+    ]
+
+
+def _search_locations(query, limit):
+    locations = Location.objects.filter(
+        Q(name__icontains=query) | Q(address__icontains=query),
+    )
+    return [
+        {
+            "id": location.id,
+            "rank": location.search_rank,
+            "title": location.name,
+            "subtitle": location.address,
+            "object": location,
+        }
+        for location in _rank_by(locations, "name", query)[:limit]
+    ]
+
+
+def _search_tasks(query, limit):
+    tasks = Task.objects.filter(title__icontains=query)
+    return [
+        {
+            "id": task.id,
+            "rank": task.search_rank,
+            "title": task.title,
+            "subtitle": "Completed" if task.completed else "Open",
+            "object": task,
+        }
+        for task in _rank_by(tasks, "title", query)[:limit]
+    ]
+
+
+# (name, label, search function) for every source, in tie-breaking order.
+SOURCES = (
+    ("contacts", "Contacts", _search_contacts),
+    ("products", "Products", _search_products),
+    ("locations", "Locations", _search_locations),
+    ("tasks", "Tasks", _search_tasks),
+)
+
+
+class SourceResult:
+    """The hits one source returned, or why it returned none."""
+
+    def __init__(self, name, label, hits, *, timed_out=False, failed=False):
+        self.name = name
+        self.label = label
+        self.hits = hits
+        self.timed_out = timed_out
+        self.failed = failed
+
+    @property
+    def objects(self):
+        return [hit["object"] for hit in self.hits]
+
+    @property
+    def best_rank(self):
+        return min((hit["rank"] for hit in self.hits), default=RANK_SUBSTRING + 1)
+
+
+def _get_executor():
+    global _executor  # noqa: PLW0603
+    with _executor_lock:
+        if _executor is None and settings.EXAMPLES_GLOBAL_SEARCH_WORKERS:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.EXAMPLES_GLOBAL_SEARCH_WORKERS,
+                thread_name_prefix="global-search",
+            )
+        return _executor
+
+
+def _run_source(running, search, query, limit):
+    # Pool threads keep their own connections; recycle them as requests do.
+    close_old_connections()
+    try:
+        return running.run(search, query, limit)
+    finally:
+        close_old_connections()
+
+
+def global_search(query, limit=5):
+    """Search every source concurrently for ``query``, at most ``limit`` hits each.
+
+    Returns one ``SourceResult`` per source, the source with the best match
+    first, or an empty list when no source found anything.  Each hit is a
+    dict with ``id``, ``rank``, ``title``, ``subtitle`` and the matched
+    ``object``.
+    """
+    query = query.strip()
+    if not query:
+        return []
+
+    executor = _get_executor()
+    if executor is None:
+        # Sequential, in the calling thread and its transaction (for tests).
+        results = [
+            SourceResult(name, label, search(query, limit))
+            for name, label, search in SOURCES
+        ]
+    else:
+        submitted = []
+        for name, label, search in SOURCES:
+            running = RunningQuery()
+            future = executor.submit(_run_source, running, search, query, limit)
+            submitted.append((name, label, running, future))
+
+        deadline = time.monotonic() + settings.EXAMPLES_GLOBAL_SEARCH_TIMEOUT_MS / 1000
+        results = []
+        for name, label, running, future in submitted:
+            try:
+                hits = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except TimeoutError:
+                future.cancel()
+                running.cancel()
+                metrics.incr(f"global_search.{name}.timed_out")
+                logger.info("Global search source %s missed its deadline", name)
+                results.append(SourceResult(name, label, [], timed_out=True))
+            except Exception:
+                logger.exception("Global search source %s failed", name)
+                results.append(SourceResult(name, label, [], failed=True))
+            else:
+                results.append(SourceResult(name, label, hits or []))
+
+    if not any(result.hits or result.timed_out or result.failed for result in results):
+        return []
+    order = {name: position for position, (name, _, _) in enumerate(SOURCES)}
+    results.sort(key=lambda result: (result.best_rank, order[result.name]))
+    return results
+
+
+def merged_hits(results):
+    """Flatten ``global_search`` results into one list, best rank first."""
+    hits = [{**hit, "type": result.name} for result in results for hit in result.hits]
+    # Stable, so sources keep their order among hits of the same rank.
+    hits.sort(key=lambda hit: hit["rank"])
+    return hits
@@ -0,0 +1,13 @@
+"""Management command to give every task a short rank again."""
+
+from django.core.management.base import BaseCommand
+
+from htmx_demo.examples.tasks import rebalance_task_order
+
+
+class Command(BaseCommand):
+    help = "Re-ranks all tasks with short, evenly spaced ranks, keeping their order"
+
+    def handle(self, *args, **options):
+        count = rebalance_task_order()
+        self.stdout.write(self.style.SUCCESS(f"Re-ranked {count} tasks"))
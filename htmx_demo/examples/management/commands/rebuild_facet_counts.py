@@ -0,0 +1,13 @@
+"""Management command to recount the product facet summary table."""
+
+from django.core.management.base import BaseCommand
+
+from htmx_demo.examples.facets import rebuild_facet_counts
+
+
+class Command(BaseCommand):
+    help = "Recounts product facet counts, e.g. after bulk updates that skip signals"
+
+    def handle(self, *args, **options):
+        cells = rebuild_facet_counts()
+        self.stdout.write(self.style.SUCCESS(f"Recounted {cells} facet cells"))
@@ -0,0 +1,92 @@
+"""Management command to summarize recorded live searches by query prefix."""
+
+import math
+from datetime import timedelta
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Substr
+from django.utils import timezone
+
+from htmx_demo.examples.models import SearchQueryLog
+
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of an already sorted, non-empty list."""
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Command(BaseCommand):
+    help = "Reports live-search latency and zero-result rate per query prefix"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Only include searches from the last N days",
+        )
+        parser.add_argument(
+            "--prefix-length",
+            type=int,
+            default=3,
+            help="Group queries by their first N characters",
+        )
+        parser.add_argument(
+            "--min-count",
+            type=int,
+            default=1,
+            help="Skip prefixes with fewer searches than this",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Show at most this many prefixes, most searched first",
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options["days"])
+        # Sorted by prefix, then latency, so each group arrives ready for
+        # percentiles without holding more than one group in memory.
+        rows = (
+            SearchQueryLog.objects.filter(created_at__gte=since)
+            .annotate(prefix=Substr("query", 1, options["prefix_length"]))
+            .order_by("prefix", "latency_ms")
+            .values_list("prefix", "latency_ms", "hit_count")
+        )
+
+        report = []
+        for prefix, group in groupby(rows.iterator(), key=lambda row: row[0]):
+            latencies = []
+            zero_hits = 0
+            for _, latency_ms, hit_count in group:
+                latencies.append(latency_ms)
+                zero_hits += hit_count == 0
+            if len(latencies) < options["min_count"]:
+                continue
+            report.append(
+                (
+                    prefix,
+                    len(latencies),
+                    percentile(latencies, 0.5),
+                    percentile(latencies, 0.99),
+                    zero_hits / len(latencies),
+                ),
+            )
+
+        if not report:
+            self.stdout.write("No searches to report.")
+            return
+
+        report.sort(key=lambda line: (-line[1], line[0]))
+        self.stdout.write(
+            f"{'Prefix':<12} {'Searches':>8} {'p50 ms':>8} {'p99 ms':>8} "
+            f"{'Zero hits':>9}",
+        )
+        for prefix, count, p50, p99, zero_rate in report[: options["limit"]]:
+            self.stdout.write(
+                f"{prefix or '(empty)':<12} {count:>8} {p50:>8.1f} {p99:>8.1f} "
+                f"{zero_rate:>9.0%}",
+            )
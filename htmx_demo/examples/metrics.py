@@ -0,0 +1,29 @@
+"""In-process counters for the examples' performance features.
+
+Counters are per worker process and reset on restart; they are also logged
+by the code that increments them, so totals can be aggregated from logs.
+"""
+
+import threading
+from collections import Counter
+
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def incr(name, amount=1):
+    """Add ``amount`` to the counter ``name``."""
+    with _lock:
+        _counters[name] += amount
+
+
+def snapshot():
+    """Return a copy of all counters."""
+    with _lock:
+        return dict(_counters)
+
+
+def reset():
+    """Clear all counters."""
+    with _lock:
+        _counters.clear()
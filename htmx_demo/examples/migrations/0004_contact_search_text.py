@@ -0,0 +1,70 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:00
+
+import unicodedata
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+CONTACT_SEARCH_FIELDS = ('first_name', 'last_name', 'email', 'company')
+
+
+def normalize_search_text(value):
+    # Frozen copy of examples.text.normalize_search_text.
+    decomposed = unicodedata.normalize('NFKD', value)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def contact_search_document(contact):
+    # Frozen copy of examples.search.contact_search_document.
+    fields = [normalize_search_text(getattr(contact, name) or '') for name in CONTACT_SEARCH_FIELDS]
+    return '\n' + '\n'.join(fields) + '\n'
+
+
+def populate_search_text(apps, schema_editor):
+    Contact = apps.get_model('examples', 'Contact')
+    contacts = list(Contact.objects.using(schema_editor.connection.alias).all())
+    for contact in contacts:
+        contact.search_text = contact_search_document(contact)
+    Contact.objects.using(schema_editor.connection.alias).bulk_update(contacts, ['search_text'], batch_size=1000)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX examples_contact_search_trgm ON examples_contact USING gin (search_text gin_trgm_ops)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE examples_contact_fts USING fts5(search_text, tokenize='trigram')"
+        )
+        schema_editor.execute(
+            'INSERT INTO examples_contact_fts (rowid, search_text) SELECT id, search_text FROM examples_contact'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS examples_contact_search_trgm')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS examples_contact_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('examples', '0003_notification'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='contact',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(populate_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:41
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_duplicate_emails(apps, schema_editor):
+    # Contacts whose emails only differ in case would violate the new
+    # constraint.  Which of them to keep is for a person to decide, so list
+    # them and stop rather than deleting any.  Lower() is the function the
+    # constraint uses, so both fold case the same way.
+    Contact = apps.get_model('examples', 'Contact')
+    duplicates = list(
+        Contact.objects.using(schema_editor.connection.alias)
+        .values(lowered=Lower('email'))
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .order_by('lowered')
+        .values_list('lowered', flat=True)[:20],
+    )
+    if duplicates:
+        msg = (
+            'Contacts share emails that only differ in case, such as '
+            f"{', '.join(duplicates)}.  Merge or delete the duplicates, then "
+            'run the migration again.'
+        )
+        raise RuntimeError(msg)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('examples', '0005_searchquerylog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contact',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='contact',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='examples_contact_email_ci_unique', violation_error_message='This email is already registered'),
+        ),
+    ]
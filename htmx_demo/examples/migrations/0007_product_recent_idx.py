@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('examples', '0006_contact_email_ci_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', '-id'], name='examples_product_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:40
+
+from collections import Counter
+from decimal import Decimal
+
+from django.db import migrations, models
+
+FACET_FIELDS = ('category', 'in_stock', 'price_bucket')
+# Frozen copy of examples.facets.PRICE_BUCKETS: (key, low, high).
+PRICE_BUCKETS = (
+    ('0-25', Decimal(0), Decimal(25)),
+    ('25-50', Decimal(25), Decimal(50)),
+    ('50-100', Decimal(50), Decimal(100)),
+    ('100-250', Decimal(100), Decimal(250)),
+    ('250+', Decimal(250), None),
+)
+
+
+def facet_cell(product):
+    # Frozen copy of examples.facets.facet_cell.
+    price = Decimal(product.price)
+    for key, low, high in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return product.category, product.in_stock, key
+    return product.category, product.in_stock, PRICE_BUCKETS[0][0]
+
+
+def populate_facet_counts(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Product = apps.get_model('examples', 'Product')
+    ProductFacetCount = apps.get_model('examples', 'ProductFacetCount')
+    cells = Counter(facet_cell(product) for product in Product.objects.using(alias).iterator())
+    ProductFacetCount.objects.using(alias).bulk_create(
+        ProductFacetCount(**dict(zip(FACET_FIELDS, cell)), count=count) for cell, count in cells.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('examples', '0009_product_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=50)),
+                ('in_stock', models.BooleanField()),
+                ('price_bucket', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category', 'in_stock', 'price_bucket'), name='examples_facet_cell_unique')],
+            },
+        ),
+        migrations.RunPython(populate_facet_counts, migrations.RunPython.noop),
+    ]
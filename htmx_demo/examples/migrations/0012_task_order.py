@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-17 13:30
+
+from django.db import migrations, models
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+
+def spaced_ranks(count):
+    # Frozen copy of examples.ranks.spaced_ranks.
+    width = 1
+    while BASE**width // 3 < (count + 1) * BASE:
+        width += 1
+    start = BASE**width // 3
+    step = start // (count + 1)
+    ranks = []
+    for number in range(1, count + 1):
+        value = start + number * step
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append(''.join(reversed(digits)).rstrip('0'))
+    return ranks
+
+
+def use_c_collation(apps, schema_editor):
+    # Ranks compare byte by byte; SQLite's default collation already does.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Task = apps.get_model('examples', 'Task')
+    quote = schema_editor.quote_name
+    schema_editor.execute(
+        'ALTER TABLE %s ALTER COLUMN %s TYPE varchar(255) COLLATE "C"'
+        % (quote(Task._meta.db_table), quote('order'))
+    )
+
+
+def rank_existing_tasks(apps, schema_editor):
+    # Keep the current order: newest first.
+    alias = schema_editor.connection.alias
+    Task = apps.get_model('examples', 'Task')
+    tasks = list(Task.objects.using(alias).order_by('-created_at', '-id').only('id'))
+    for task, rank in zip(tasks, spaced_ranks(len(tasks))):
+        task.order = rank
+    Task.objects.using(alias).bulk_update(tasks, ['order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('examples', '0011_task_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['completed', 'order', 'id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='examples_task_open_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='examples_task_done_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='order',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(use_c_collation, migrations.RunPython.noop),
+        migrations.RunPython(rank_existing_tasks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['order', 'id'], name='examples_task_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', True)), fields=['order', 'id'], name='examples_task_done_idx'),
+        ),
+    ]
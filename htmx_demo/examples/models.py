@@ -1,26 +1,49 @@
 """Models for demonstration purposes in the examples app."""
 
+from django.db import connections
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 
+from .ranks import rank_between
+
+CONTACT_EMAIL_CONSTRAINT = "examples_contact_email_ci_unique"
+DUPLICATE_EMAIL_ERROR = "This email is already registered"
+
 
 class Contact(models.Model):
     """Contact model for form submission and search examples."""
 
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
-    email = models.EmailField(unique=True)
+    # Unique regardless of case, see Meta.constraints
+    email = models.EmailField()
     phone = models.CharField(max_length=20, blank=True)
     company = models.CharField(max_length=200, blank=True)
     message = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Case- and accent-folded copy of the searchable fields, see examples.search
+    search_text = models.TextField(blank=True, default="", editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                Lower("email"),
+                name=CONTACT_EMAIL_CONSTRAINT,
+                violation_error_message=DUPLICATE_EMAIL_ERROR,
+            ),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    @staticmethod
+    def is_duplicate_email(error):
+        """Return whether the ``IntegrityError`` ``error`` is a taken email."""
+        # Both PostgreSQL and SQLite name the violated index in the message.
+        return CONTACT_EMAIL_CONSTRAINT in str(error)
+
 
 class Product(models.Model):
     """Product model for infinite scroll and search examples."""
@@ -40,14 +63,91 @@ class Product(models.Model):
     )
     in_stock = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Versions the cached product fragments, see examples.fragments
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        # Each serves the keyset pagination in products.PRODUCT_ORDERING, for
+        # no filter and for each combination of the list filters, without a sort
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="examples_product_recent_idx",
+            ),
+            models.Index(
+                fields=["category", "-created_at", "-id"],
+                name="examples_product_cat_idx",
+            ),
+            models.Index(
+                fields=["in_stock", "-created_at", "-id"],
+                name="examples_product_stock_idx",
+            ),
+            models.Index(
+                fields=["category", "in_stock", "-created_at", "-id"],
+                name="examples_product_cat_stock_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+def _from_db(value, column, connection):
+    # The backend's conversions, as the ORM applies them to query results.
+    converters = connection.ops.get_db_converters(column)
+    for converter in converters + column.get_db_converters(connection):
+        value = converter(value, column, connection)
+    return value
+
+
+class TaskQuerySet(models.QuerySet):
+    def toggle_completion(self):
+        """Flip the completion of these tasks with one ``UPDATE ... RETURNING``.
+
+        Tasks that become completed get ``completed_at`` set to now, the
+        others have it cleared.  The rows are neither read first nor saved
+        whole, so concurrent toggles of a task never undo each other, and no
+        model signals are sent.  Returns the updated tasks.
+        """
+        # QuerySet.update() cannot return the rows it changed.
+        connection = connections[self.db]
+        opts = self.model._meta  # noqa: SLF001
+        quote = connection.ops.quote_name
+        completed = quote(opts.get_field("completed").column)
+        completed_at = opts.get_field("completed_at")
+        table = quote(opts.db_table)
+        pk = quote(opts.pk.column)
+        fields = opts.concrete_fields
+        returning = ", ".join(quote(field.column) for field in fields)
+        subquery, params = self.order_by().values("pk").query.sql_with_params()
+        now = completed_at.get_db_prep_value(timezone.now(), connection)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {completed} = NOT {completed}, "  # noqa: S608
+                # Evaluated against the row before the update.
+                f"{quote(completed_at.column)} = "
+                f"CASE WHEN {completed} THEN NULL ELSE %s END "
+                f"WHERE {pk} IN ({subquery}) RETURNING {returning}",
+                (now, *params),
+            )
+            rows = cursor.fetchall()
+
+        columns = [field.get_col(opts.db_table) for field in fields]
+        attnames = [field.attname for field in fields]
+        return [
+            self.model.from_db(
+                self.db,
+                attnames,
+                [
+                    _from_db(value, column, connection)
+                    for value, column in zip(row, columns, strict=True)
+                ],
+            )
+            for row in rows
+        ]
+
+
 class Task(models.Model):
     """Task model for dynamic list operations example."""
 
@@ -56,18 +156,55 @@ class Task(models.Model):
     completed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    # Position in the list as a fractional rank, see examples.ranks.  Ranks
+    # must compare byte by byte: migration 0012 gives the column the "C"
+    # collation on PostgreSQL; SQLite compares that way by default.
+    order = models.CharField(max_length=255, blank=True)
+
+    objects = TaskQuerySet.as_manager()
 
     class Meta:
-        ordering = ["completed", "-created_at"]
+        ordering = ["completed", "order", "id"]
+        indexes = [
+            # Open tasks first, each state in list order: see examples.tasks.
+            models.Index(
+                fields=["order", "id"],
+                condition=models.Q(completed=False),
+                name="examples_task_open_idx",
+            ),
+            models.Index(
+                fields=["order", "id"],
+                condition=models.Q(completed=True),
+                name="examples_task_done_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # New tasks go to the top of the list.
+        if not self.order:
+            first = self._first_rank()
+            if first == "":
+                # Unranked tasks, e.g. loaded from a fixture, sort first:
+                # rank them all before ranking this one above them.
+                from .tasks import rebalance_task_order  # noqa: PLC0415
+
+                rebalance_task_order()
+                first = self._first_rank()
+            self.order = rank_between(None, first)
+        super().save(*args, **kwargs)
+
+    def _first_rank(self):
+        ranks = Task.objects.exclude(pk=self.pk) if self.pk else Task.objects
+        return ranks.order_by("order").values_list("order", flat=True).first()
+
     def toggle_complete(self):
-        """Toggle task completion status."""
-        self.completed = not self.completed
-        self.completed_at = timezone.now() if self.completed else None
-        self.save()
+        """Toggle task completion status, see TaskQuerySet.toggle_completion."""
+        for task in Task.objects.filter(pk=self.pk).toggle_completion():
+            self.completed = task.completed
+            self.completed_at = task.completed_at
 
 
 class Country(models.Model):
@@ -202,3 +339,42 @@ class Notification(models.Model):
     def __str__(self):
         return f"{self.notification_type}: {self.message[:50]}"
 
+
+class SearchQueryLog(models.Model):
+    """Sampled live-search query, written in batches by examples.analytics."""
+
+    endpoint = models.CharField(max_length=100)
+    # Normalized query text, so reports group "Jo" and "jo" together
+    query = models.CharField(max_length=200, blank=True)
+    latency_ms = models.FloatField()
+    hit_count = models.PositiveIntegerField()
+    # Whether the request came from htmx (HX-Request header) or plain AJAX
+    htmx = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.endpoint}: {self.query!r} ({self.latency_ms:.0f} ms)"
+
+
+class ProductFacetCount(models.Model):
+    """Number of products per facet combination, maintained by examples.facets."""
+
+    category = models.CharField(max_length=50)
+    in_stock = models.BooleanField()
+    # Key of the price range, see examples.facets.PRICE_BUCKETS
+    price_bucket = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["category", "in_stock", "price_bucket"],
+                name="examples_facet_cell_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.category}/{self.in_stock}/{self.price_bucket}: {self.count}"
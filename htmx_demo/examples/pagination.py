@@ -0,0 +1,157 @@
+"""Keyset ("seek") pagination helpers.
+
+Instead of an OFFSET, a keyset page starts strictly after the sort key of the
+last row already shown, so fetching page fifty costs the same as page one.
+The sort key travels to the client as an opaque, URL-safe cursor.
+"""
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(*values):
+    """Pack the sort key values of the last row on a page into a cursor string."""
+    payload = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor, size):
+    """Unpack a cursor made by ``encode_cursor`` into a tuple of ``size`` values.
+
+    Raises ``ValueError`` for anything that is not such a cursor.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, UnicodeError, json.JSONDecodeError) as exc:
+        msg = "Malformed cursor"
+        raise ValueError(msg) from exc
+    if not isinstance(values, list) or len(values) != size:
+        msg = "Malformed cursor"
+        raise ValueError(msg)
+    return tuple(values)
+
+
+def keyset_filter(ordering, values):
+    """Return a ``Q`` selecting the rows that sort after ``values``.
+
+    ``ordering`` lists field names as passed to ``order_by()`` (a leading
+    ``-`` means descending) and must end in a unique field so that the
+    ordering is total.  The result also bounds the first field on its own,
+    which is redundant but lets the database use it as an index condition
+    instead of filtering the whole index.
+    """
+    first = ordering[0]
+    bound = "lte" if first.startswith("-") else "gte"
+    leading = Q(**{f"{first.removeprefix('-')}__{bound}": values[0]})
+    condition = Q(pk__in=[])
+    for position, field in enumerate(ordering):
+        name = field.removeprefix("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        equal = {
+            earlier.removeprefix("-"): value
+            for earlier, value in zip(ordering[:position], values, strict=False)
+        }
+        condition |= Q(**equal, **{f"{name}__{lookup}": values[position]})
+    return leading & condition
+
+
+class KeysetPage:
+    """One page of a ``KeysetPaginator``; iterate it for the rows.
+
+    ``next_cursor`` addresses the page after this one for ``get_page`` and
+    ``previous_cursor`` the page before it for ``get_page_before``; either is
+    None when there is no such page.
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """Paginate ``queryset`` by keyset on ``ordering`` instead of by page number.
+
+    A drop-in for the infinite-scroll uses of Django's ``Paginator``: pages
+    are addressed by the cursor of the previous page rather than a number,
+    and there is no ``COUNT(*)`` and no ``OFFSET``, so every page costs one
+    index range scan of ``per_page + 1`` rows however deep it is.  Pages
+    before a cursor are read by the same index scanned backwards.
+    ``ordering`` must end in a unique field, see ``keyset_filter``.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+
+    def get_page(self, cursor=None):
+        """Return the page after ``cursor``, or the first page for no cursor.
+
+        Raises ``ValueError`` for a malformed cursor.
+        """
+        queryset = self.queryset
+        if cursor:
+            queryset = self._seek(queryset, self.ordering, cursor)
+        # One extra row tells whether there is a next page without a count.
+        rows = list(queryset[: self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            next_cursor = self.cursor_for(rows[-1])
+        # Rows before the cursor exist: the one it was made from, at least.
+        previous_cursor = self.cursor_for(rows[0]) if cursor and rows else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def get_page_before(self, cursor):
+        """Return the ``per_page`` rows just before ``cursor``, in order.
+
+        Raises ``ValueError`` for a malformed cursor.
+        """
+        reverse = tuple(
+            field.removeprefix("-") if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        )
+        queryset = self._seek(self.queryset.order_by(*reverse), reverse, cursor)
+        rows = list(queryset[: self.per_page + 1])
+        previous_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            previous_cursor = self.cursor_for(rows[-1])
+        rows.reverse()
+        next_cursor = self.cursor_for(rows[-1]) if rows else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def cursor_for(self, row):
+        """Return the cursor of ``row``, which pages before and after it use."""
+        values = []
+        for field in self.ordering:
+            value = getattr(row, field.removeprefix("-"))
+            # isoformat() keeps the microseconds, which the seek depends on.
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return encode_cursor(*values)
+
+    def _seek(self, queryset, ordering, cursor):
+        values = decode_cursor(cursor, len(self.ordering))
+        try:
+            return queryset.filter(keyset_filter(ordering, values))
+        except (ValidationError, TypeError) as exc:
+            msg = "Malformed cursor"
+            raise ValueError(msg) from exc
@@ -0,0 +1,266 @@
+"""Product pages for the infinite-scroll example, prefetched one page ahead.
+
+Once a visitor is shown a page of products, the sentinel at its bottom will
+almost certainly ask for the next page within seconds.  ``products_htmx``
+therefore renders that next page in a background thread straight away and
+parks the HTML in the cache, so the ``revealed`` request is a cache hit.  At
+most ``EXAMPLES_PRODUCT_PREFETCH_WORKERS`` renders run at once per process;
+beyond that, prefetches are skipped rather than queued.
+
+Pages can also be read backwards from a cursor, and ``anchor_cursor`` gives
+the cursor of any product, so a client can keep a fixed-size window of the
+list and load the products before or after a given one when it scrolls
+back to pages it dropped.
+
+Counters (see ``examples.metrics``): ``product_prefetch.rendered``, ``.hit``
+and ``.miss`` for the hit rate, ``.skipped`` when the workers were busy, and
+``.wasted`` for prefetched pages nobody asked for before they expired.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.template.loader import render_to_string
+
+from . import metrics
+from .counts import count_rows
+from .facets import product_facets
+from .generations import get_generation
+from .models import Product
+from .pagination import KeysetPaginator
+
+logger = logging.getLogger(__name__)
+
+# Newest first; the id breaks ties so keyset pages never skip or repeat rows.
+PRODUCT_ORDERING = ("-created_at", "-id")
+PRODUCTS_PER_PAGE = 10
+PRODUCT_CATEGORIES = dict(Product._meta.get_field("category").choices)  # noqa: SLF001
+# Name of the shared generation bumped by every committed product change.
+PRODUCTS_GENERATION = "products"
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+_in_flight = set()
+# Cache key -> monotonic expiry of prefetched pages not yet known to be used.
+_unclaimed = {}
+
+
+def product_filters(params):
+    """Return the product list filters in the query parameters ``params``.
+
+    ``category`` must be a product category and ``in_stock`` "1" or "0"; an
+    empty value means no filter.  Raises ``ValueError`` for anything else.
+    """
+    filters = {}
+    category = params.get("category", "")
+    if category:
+        if category not in PRODUCT_CATEGORIES:
+            msg = f"Unknown category {category!r}"
+            raise ValueError(msg)
+        filters["category"] = category
+    in_stock = params.get("in_stock", "")
+    if in_stock:
+        if in_stock not in ("0", "1"):
+            msg = f"in_stock must be 0 or 1, not {in_stock!r}"
+            raise ValueError(msg)
+        filters["in_stock"] = in_stock
+    return filters
+
+
+def filtered_products(filters=None):
+    """Return the products matching ``filters`` from ``product_filters``."""
+    products = Product.objects.all()
+    filters = filters or {}
+    if "category" in filters:
+        products = products.filter(category=filters["category"])
+    if "in_stock" in filters:
+        products = products.filter(in_stock=filters["in_stock"] == "1")
+    return products
+
+
+def facet_filters(filters=None):
+    """Translate ``product_filters`` output for ``facets.product_facets``."""
+    filters = filters or {}
+    selected = {}
+    if "category" in filters:
+        selected["category"] = filters["category"]
+    if "in_stock" in filters:
+        selected["in_stock"] = filters["in_stock"] == "1"
+    return selected
+
+
+def _paginator(filters=None):
+    return KeysetPaginator(
+        filtered_products(filters),
+        PRODUCT_ORDERING,
+        PRODUCTS_PER_PAGE,
+    )
+
+
+def anchor_cursor(product_id):
+    """Return the cursor at the product with id ``product_id``.
+
+    The pages after and before it hold the products around that one.
+    Raises ``ValueError`` if there is no such product.
+    """
+    fields = [field.removeprefix("-") for field in PRODUCT_ORDERING]
+    try:
+        product = Product.objects.only(*fields).get(pk=product_id)
+    except (Product.DoesNotExist, ValueError, TypeError) as exc:
+        msg = f"Unknown product {product_id!r}"
+        raise ValueError(msg) from exc
+    return _paginator().cursor_for(product)
+
+
+def product_page(cursor=None, filters=None, *, backward=False):
+    """Return the ``KeysetPage`` of products matching ``filters`` after ``cursor``.
+
+    With ``backward``, return the page before ``cursor`` instead.  Raises
+    ``ValueError`` for a malformed cursor.
+    """
+    paginator = _paginator(filters)
+    if backward:
+        return paginator.get_page_before(cursor)
+    return paginator.get_page(cursor)
+
+
+def render_product_page(cursor=None, filters=None, *, backward=False):
+    """Return the product list partial after ``cursor`` and the next cursor.
+
+    The first page also shows how many products match, and the facet counts.
+    A ``backward`` page ends at ``cursor`` and starts with a sentinel for the
+    page before it instead of ending with one for the page after it.
+    """
+    page_obj = product_page(cursor, filters, backward=backward)
+    context = {
+        "products": page_obj,
+        "page_obj": page_obj,
+        "backward": backward,
+        "filter_query": urlencode(sorted((filters or {}).items())),
+    }
+    if cursor is None:
+        context["total_count"], context["total_is_estimate"] = count_rows(
+            filtered_products(filters),
+        )
+        context["facets"] = product_facets(facet_filters(filters))
+    html = render_to_string("examples/partials/product_list.html", context)
+    return html, page_obj.next_cursor
+
+
+def _page_key(cursor, filters):
+    generation = get_generation(PRODUCTS_GENERATION)
+    filter_query = urlencode(sorted((filters or {}).items()))
+    return f"examples:products:page:{generation}:{filter_query}:{cursor}"
+
+
+def _claim_key(page_key):
+    return f"{page_key}:claimed"
+
+
+def cached_product_page(cursor, filters=None):
+    """Return the prefetched ``(html, next_cursor)`` after ``cursor``, or None."""
+    key = _page_key(cursor, filters)
+    entry = cache.get(key)
+    if entry is None:
+        metrics.incr("product_prefetch.miss")
+        return None
+    metrics.incr("product_prefetch.hit")
+    # Any worker may serve the page; tell the one that rendered it.
+    cache.set(
+        _claim_key(key),
+        True,  # noqa: FBT003
+        timeout=settings.EXAMPLES_PRODUCT_PREFETCH_TTL * 10,
+    )
+    return entry
+
+
+def _get_executor():
+    global _executor, _slots  # noqa: PLW0603
+    with _lock:
+        if _executor is None and settings.EXAMPLES_PRODUCT_PREFETCH_WORKERS:
+            _slots = threading.BoundedSemaphore(
+                settings.EXAMPLES_PRODUCT_PREFETCH_WORKERS,
+            )
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.EXAMPLES_PRODUCT_PREFETCH_WORKERS,
+                thread_name_prefix="product-prefetch",
+            )
+        return _executor
+
+
+def _render_into_cache(key, cursor, filters):
+    try:
+        # Another request or worker may have prefetched it meanwhile.
+        if cache.get(key) is None:
+            ttl = settings.EXAMPLES_PRODUCT_PREFETCH_TTL
+            cache.set(key, render_product_page(cursor, filters), timeout=ttl)
+            metrics.incr("product_prefetch.rendered")
+            with _lock:
+                _unclaimed[key] = time.monotonic() + ttl
+    except Exception:
+        logger.exception("Could not prefetch the product page after %s", cursor)
+    finally:
+        with _lock:
+            _in_flight.discard(key)
+
+
+def _run_prefetch(key, cursor, filters):
+    # Pool threads keep their own connections; recycle them as requests do.
+    close_old_connections()
+    try:
+        _render_into_cache(key, cursor, filters)
+    finally:
+        _slots.release()
+        close_old_connections()
+
+
+def _count_wasted():
+    now = time.monotonic()
+    with _lock:
+        expired = [key for key, expires in _unclaimed.items() if expires <= now]
+        for key in expired:
+            del _unclaimed[key]
+    if expired:
+        claimed = cache.get_many([_claim_key(key) for key in expired])
+        wasted = len(expired) - len(claimed)
+        if wasted:
+            metrics.incr("product_prefetch.wasted", wasted)
+            logger.info("%d prefetched product pages expired unused", wasted)
+
+
+def prefetch_product_page(cursor, filters=None):
+    """Render the product page after ``cursor`` into the cache, in the background.
+
+    Returns immediately.  Does nothing if that page is already being
+    prefetched, and skips it if all prefetch workers are busy.
+    """
+    _count_wasted()
+    key = _page_key(cursor, filters)
+    executor = _get_executor()
+    with _lock:
+        if key in _in_flight:
+            return
+        if executor is not None and not _slots.acquire(blocking=False):
+            metrics.incr("product_prefetch.skipped")
+            return
+        _in_flight.add(key)
+
+    if executor is None:
+        # In the calling thread and its transaction (for tests).
+        _render_into_cache(key, cursor, filters)
+    else:
+        executor.submit(_run_prefetch, key, cursor, filters)
+
+
+def reset():
+    """Forget prefetches this process is tracking (for tests)."""
+    with _lock:
+        _in_flight.clear()
+        _unclaimed.clear()
@@ -0,0 +1,98 @@
+"""Fractional rank keys for manually ordered lists.
+
+A rank is a string of base-36 digits compared character by character, like
+a fraction ``0.d1d2d3...`` in base 36.  There is always another rank between
+two different ranks, so moving an item to a new position only rewrites that
+item's rank, never its neighbours'.  Ranks never end in ``0``, which is what
+guarantees that room: ``"a"`` and ``"a0"`` would be equal as fractions.
+
+Repeated inserts between the same two items make ranks longer by about one
+digit per five inserts.  Inserts at either end of the list, the usual case,
+step a fixed amount away from the end item instead, so ranks stay
+``STEP_WIDTH`` digits long for thousands of them.  ``spaced_ranks`` hands out
+short, evenly spaced ranks again for a whole list, leaving that room at both
+ends.  Store ranks in a column that compares them byte by byte (the ``"C"``
+collation on PostgreSQL) so that the database orders them the way Python does.
+"""
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+# Inserts before the first or after the last rank step by one unit in this
+# digit: about BASE**STEP_WIDTH / 3 of them fit next to spaced_ranks().
+STEP_WIDTH = 3
+
+
+def _digit(rank, position, default):
+    if rank is None or position >= len(rank):
+        return default
+    return DIGITS.index(rank[position])
+
+
+def _value(rank, width):
+    # The first ``width`` digits of ``rank`` as a number.
+    value = 0
+    for position in range(width):
+        value = value * BASE + _digit(rank, position, 0)
+    return value
+
+
+def _rank(value, width):
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits)).rstrip("0")
+
+
+def _step(rank, direction):
+    # One unit below or above ``rank`` in the STEP_WIDTH-th digit, or in a
+    # later one if ``rank`` is too close to the end of the key space.
+    width = STEP_WIDTH
+    while True:
+        value = _value(rank, width) + direction
+        if 0 < value < BASE**width:
+            return _rank(value, width)
+        width += 1
+
+
+def rank_between(before=None, after=None):
+    """Return a short rank sorting strictly between ``before`` and ``after``.
+
+    None stands for the start or the end of the list.  Raises ``ValueError``
+    unless ``before`` sorts before ``after``.
+    """
+    if after is not None and (after == "" or (before is not None and before >= after)):
+        msg = f"No rank between {before!r} and {after!r}"
+        raise ValueError(msg)
+    if before is None and after is not None:
+        return _step(after, -1)
+    if after is None and before is not None:
+        return _step(before, 1)
+    digits = []
+    position = 0
+    while True:
+        low = _digit(before, position, 0)
+        high = _digit(after, position, BASE)
+        if high - low > 1:
+            digits.append(DIGITS[(low + high) // 2])
+            return "".join(digits)
+        digits.append(DIGITS[low])
+        if high - low == 1:
+            # Already below ``after`` whatever follows.
+            after = None
+        position += 1
+
+
+def spaced_ranks(count):
+    """Return ``count`` short ranks in ascending order, evenly spaced.
+
+    They take the middle third of the key space, leaving the rest for
+    inserts at either end.
+    """
+    width = 1
+    # Leave about a digit's worth of room between neighbours.
+    while BASE**width // 3 < (count + 1) * BASE:
+        width += 1
+    start = BASE**width // 3
+    step = start // (count + 1)
+    return [_rank(start + number * step, width) for number in range(1, count + 1)]
@@ -0,0 +1,339 @@
+"""Indexed contact search for the live search examples.
+
+Every contact carries a denormalized ``search_text`` column holding its
+searchable fields, case- and accent-folded, one field per line.  On PostgreSQL
+the column is covered by a ``pg_trgm`` GIN index, so a substring lookup no
+longer scans the whole table.  On SQLite (``DATABASE_URL=sqlite://...``) the
+column is mirrored into an FTS5 shadow table using the trigram tokenizer.
+
+Live-search results are ranked: contacts with a field (or email local-part)
+equal to the query come first, then those with a field starting with it, then
+any other substring matches, newest first within each rank.  Further pages
+are fetched with a keyset cursor over ``(rank, id)``.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Case
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.expressions import RawSQL
+
+from . import metrics
+from .autocomplete import CONTACTS_GENERATION
+from .autocomplete import contact_prefix_index
+from .fuzzy import contact_name_index
+from .fuzzy import contact_name_tokens
+from .fuzzy import match_distance
+from .generations import get_generation
+from .models import Contact
+from .pagination import decode_cursor
+from .pagination import encode_cursor
+from .pagination import keyset_filter
+from .text import normalize_search_text
+
+CONTACT_SEARCH_FIELDS = ("first_name", "last_name", "email", "company")
+CONTACT_FTS_TABLE = "examples_contact_fts"
+# The FTS5 trigram tokenizer can only use its index for three or more characters.
+FTS_MIN_QUERY_LENGTH = 3
+# Queries up to this length look up their prefix matches in the prefix index.
+PREFIX_QUERY_MAX_LENGTH = 3
+# Live-search results are cached per normalized query and contacts generation.
+RESULT_CACHE_TIMEOUT = 300
+RESULT_FIELDS = ("id", "first_name", "last_name", "email", "company", "search_text")
+RESULT_ORDERING = ("rank", "-id")
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_SUBSTRING = 2
+SEARCH_PAGE_SIZE = 20
+
+
+def contact_search_document(contact):
+    """Build the ``search_text`` value for a contact.
+
+    Fields are newline-delimited, with a newline before the first and after the
+    last, so a match can never span two fields and ``"\\nsmith"`` matches the
+    start of any field.
+    """
+    fields = [
+        normalize_search_text(getattr(contact, name) or "")
+        for name in CONTACT_SEARCH_FIELDS
+    ]
+    return "\n" + "\n".join(fields) + "\n"
+
+
+def search_contacts(query, queryset=None):
+    """Filter contacts whose name, email or company contains ``query``."""
+    if queryset is None:
+        queryset = Contact.objects.all()
+
+    term = normalize_search_text(query)
+    if not term:
+        return queryset
+
+    if (
+        connections[queryset.db].vendor == "sqlite"
+        and len(term) >= FTS_MIN_QUERY_LENGTH
+    ):
+        phrase = '"{}"'.format(term.replace('"', '""'))
+        return queryset.filter(
+            pk__in=RawSQL(  # noqa: S611
+                f"SELECT rowid FROM {CONTACT_FTS_TABLE} "  # noqa: S608
+                f"WHERE {CONTACT_FTS_TABLE} MATCH %s",
+                (phrase,),
+            ),
+        )
+    return queryset.filter(search_text__contains=term)
+
+
+def is_prefix_query(term):
+    """Return whether the prefix index serves a normalized query's prefix matches."""
+    return len(term) <= PREFIX_QUERY_MAX_LENGTH and "@" not in term
+
+
+def contact_matches(search_text, term):
+    """Apply the live-search match for ``term`` to a contact's ``search_text``."""
+    return term in search_text
+
+
+def contact_rank(search_text, term):
+    """Rank a matching contact's ``search_text`` for ``term``; lower is better."""
+    if not term:
+        return RANK_SUBSTRING
+    if f"\n{term}\n" in search_text or f"\n{term}@" in search_text:
+        return RANK_EXACT
+    if f"\n{term}" in search_text:
+        return RANK_PREFIX
+    return RANK_SUBSTRING
+
+
+def _rank_queryset(queryset, term):
+    if not term:
+        rank = Value(RANK_SUBSTRING)
+    else:
+        rank = Case(
+            When(
+                Q(search_text__contains=f"\n{term}\n")
+                | Q(search_text__contains=f"\n{term}@"),
+                then=Value(RANK_EXACT),
+            ),
+            When(search_text__contains=f"\n{term}", then=Value(RANK_PREFIX)),
+            default=Value(RANK_SUBSTRING),
+        )
+    return queryset.annotate(rank=rank).order_by(*RESULT_ORDERING)
+
+
+def _rank_rows(rows, term):
+    rows = [{**row, "rank": contact_rank(row["search_text"], term)} for row in rows]
+    rows.sort(key=_row_sort_key)
+    return rows
+
+
+def _row_sort_key(row):
+    return row["rank"], -row["id"]
+
+
+def _page(rows, after, limit):
+    if after is not None:
+        rank, contact_id = after
+        rows = [row for row in rows if _row_sort_key(row) > (rank, -contact_id)]
+    return rows[:limit]
+
+
+def _result_cache_key(generation, term):
+    digest = hashlib.md5(term.encode(), usedforsecurity=False).hexdigest()
+    return f"examples:contact-search:ranked:{generation}:{digest}"
+
+
+def _cached_results(generation, term, limit, after):
+    """Answer ``term`` from the result cache, refining a shorter query if needed.
+
+    A complete result set (one that held fewer rows than its limit) for a
+    shorter query is a superset of the answer, so
+    it only needs filtering and re-ranking.  The exact query and all
+    candidates are fetched in a single cache round trip.  Only first pages
+    are cached, but a complete entry answers any page.
+    """
+    candidates = [term[:length] for length in range(len(term), -1, -1)]
+    keys = {
+        _result_cache_key(generation, candidate): candidate for candidate in candidates
+    }
+    entries = cache.get_many(keys)
+
+    exact = entries.get(_result_cache_key(generation, term))
+    if exact is not None:
+        if exact["complete"]:
+            return _page(exact["rows"], after, limit)
+        if after is None and len(exact["rows"]) >= limit:
+            return exact["rows"][:limit]
+
+    for candidate in candidates[1:]:
+        entry = entries.get(_result_cache_key(generation, candidate))
+        if entry is not None and entry["complete"]:
+            rows = _rank_rows(
+                [
+                    row
+                    for row in entry["rows"]
+                    if contact_matches(row["search_text"], term)
+                ],
+                term,
+            )
+            cache.set(
+                _result_cache_key(generation, term),
+                {"rows": rows, "complete": True},
+                RESULT_CACHE_TIMEOUT,
+            )
+            return _page(rows, after, limit)
+    return None
+
+
+def _ranked_rows(queryset, term, limit, after):
+    queryset = _rank_queryset(queryset, term)
+    if after is not None:
+        queryset = queryset.filter(keyset_filter(RESULT_ORDERING, after))
+    return list(queryset.values(*RESULT_FIELDS, "rank")[:limit])
+
+
+def _query_prefix_contacts(term, limit, after):
+    contact_ids = contact_prefix_index.lookup(term, limit, after=after)
+    if contact_ids is None:
+        queryset = Contact.objects.filter(search_text__contains="\n" + term)
+        return _ranked_rows(queryset, term, limit, after)
+    return _rank_rows(
+        Contact.objects.filter(pk__in=contact_ids).values(*RESULT_FIELDS),
+        term,
+    )
+
+
+def _query_contacts(term, limit, after):
+    if not (term and is_prefix_query(term)):
+        return _ranked_rows(search_contacts(term), term, limit, after)
+    rows = []
+    if after is None or after[0] < RANK_SUBSTRING:
+        rows = _query_prefix_contacts(term, limit, after)
+        if len(rows) == limit:
+            return rows
+        # Out of prefix matches: the rest match inside a field and rank after
+        # all of them.  Ids are positive, so (RANK_PREFIX, 0) sorts last.
+        after = (RANK_PREFIX, 0)
+    return rows + _ranked_rows(search_contacts(term), term, limit - len(rows), after)
+
+
+def find_contacts(query, limit=SEARCH_PAGE_SIZE, after=None):
+    """Return up to ``limit`` ranked contact rows (dicts) for a live-search query.
+
+    Queries match anywhere in a name, company or email.  For short queries,
+    the matches at the start of a field, which rank first, are resolved to
+    ids by the in-memory prefix index, so only the final rows are fetched;
+    the substring search only runs when they do not fill the page.  When the
+    index cannot answer, the prefix match runs against ``search_text``.
+
+    ``after`` is the ``(rank, id)`` of the last row already shown.  Each row
+    carries its ``rank``.
+
+    Results are cached per normalized query; typing "joh" after "jo" is
+    answered by filtering the cached "jo" rows when those were complete.
+    """
+    term = normalize_search_text(query)
+    generation = get_generation(CONTACTS_GENERATION)
+    rows = _cached_results(generation, term, limit, after)
+    if rows is None:
+        rows = _query_contacts(term, limit, after)
+        if after is None:
+            cache.set(
+                _result_cache_key(generation, term),
+                {"rows": rows, "complete": len(rows) < limit},
+                RESULT_CACHE_TIMEOUT,
+            )
+    return rows
+
+
+def decode_search_cursor(cursor):
+    """Turn a live-search ``cursor`` parameter into ``(rank, id)``, or ``None``.
+
+    Raises ``ValueError`` for a malformed cursor.
+    """
+    if not cursor:
+        return None
+    rank, contact_id = decode_cursor(cursor, 2)
+    if not isinstance(rank, int) or not isinstance(contact_id, int):
+        msg = "Malformed cursor"
+        raise ValueError(msg)  # noqa: TRY004
+    return rank, contact_id
+
+
+def find_fuzzy_contacts(query, limit=SEARCH_PAGE_SIZE):
+    """Return up to ``limit`` contact rows whose names are a few typos from ``query``.
+
+    Every word of the query must be within its edit tolerance (see
+    ``EXAMPLES_FUZZY_MAX_EDITS``) of a first- or last-name token.  Rows are
+    ordered by total edit distance, newest first, and carry it as
+    ``distance``.  Until this process has a name index, falls back to
+    ``find_contacts``.
+    """
+    query_tokens = normalize_search_text(query).split()
+    if not query_tokens:
+        return find_contacts(query, limit=limit)
+
+    deadline = time.monotonic() + settings.EXAMPLES_FUZZY_TIME_BUDGET_MS / 1000
+    candidates = contact_name_index.lookup(query_tokens, limit, deadline)
+    if candidates is None:
+        metrics.incr("contact_fuzzy.fallback")
+        return find_contacts(query, limit=limit)
+
+    rows = []
+    queryset = Contact.objects.filter(pk__in=[pk for _, pk in candidates])
+    for row in queryset.values(*RESULT_FIELDS):
+        name_tokens = contact_name_tokens(row["first_name"], row["last_name"])
+        distance = match_distance(query_tokens, name_tokens)
+        if distance is not None:
+            rows.append({**row, "distance": distance})
+    rows.sort(key=lambda row: (row["distance"], -row["id"]))
+    return rows
+
+
+def contact_search_page(query, after=None, per_page=SEARCH_PAGE_SIZE, *, fuzzy=False):
+    """Return one page of live-search rows and the cursor for the next page, if any.
+
+    Fuzzy results are a single page.
+    """
+    if fuzzy:
+        return find_fuzzy_contacts(query, limit=per_page), None
+    rows = find_contacts(query, limit=per_page + 1, after=after)
+    if len(rows) <= per_page:
+        return rows, None
+    last = rows[per_page - 1]
+    return rows[:per_page], encode_cursor(last["rank"], last["id"])
+
+
+def index_contact(contact, using="default"):
+    """Copy a saved contact into the SQLite FTS5 shadow table."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {CONTACT_FTS_TABLE} WHERE rowid = %s",  # noqa: S608
+            [contact.pk],
+        )
+        cursor.execute(
+            f"INSERT INTO {CONTACT_FTS_TABLE} (rowid, search_text) VALUES (%s, %s)",  # noqa: S608
+            [contact.pk, contact.search_text],
+        )
+
+
+def unindex_contact(contact_id, using="default"):
+    """Remove a deleted contact from the SQLite FTS5 shadow table."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {CONTACT_FTS_TABLE} WHERE rowid = %s",  # noqa: S608
+            [contact_id],
+        )
@@ -0,0 +1,145 @@
+"""Signal handlers keeping derived data in sync with the examples models."""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from . import search
+from .autocomplete import CONTACTS_GENERATION
+from .autocomplete import contact_prefix_index
+from .autocomplete import contact_prefix_keys
+from .changefeed import publish_changes
+from .counts import count_generation
+from .facets import adjust_count
+from .facets import facet_cell
+from .fuzzy import contact_name_index
+from .fuzzy import contact_name_tokens
+from .generations import bump_generation
+from .geography import GEOGRAPHY_GENERATION
+from .models import City
+from .models import Contact
+from .models import Country
+from .models import Product
+from .models import State
+from .models import SystemStatus
+from .models import Task
+from .products import PRODUCTS_GENERATION
+
+
+def _contact_committed(contact_id, keys, name_tokens):
+    generation = bump_generation(CONTACTS_GENERATION)
+    contact_prefix_index.apply(generation, contact_id, keys)
+    contact_name_index.apply(generation, contact_id, name_tokens)
+
+
+@receiver(pre_save, sender=Contact)
+def update_contact_search_text(sender, instance, **kwargs):
+    """Refresh the folded search document before every save, fixtures included."""
+    instance.search_text = search.contact_search_document(instance)
+
+
+@receiver(post_save, sender=Contact)
+def index_saved_contact(sender, instance, using, **kwargs):
+    search.index_contact(instance, using=using)
+    keys = contact_prefix_keys(
+        instance.first_name,
+        instance.last_name,
+        instance.email,
+        instance.company,
+    )
+    name_tokens = contact_name_tokens(instance.first_name, instance.last_name)
+    transaction.on_commit(
+        partial(_contact_committed, instance.pk, keys, name_tokens),
+        using=using,
+    )
+
+
+@receiver(post_delete, sender=Contact)
+def unindex_deleted_contact(sender, instance, using, **kwargs):
+    search.unindex_contact(instance.pk, using=using)
+    transaction.on_commit(
+        partial(_contact_committed, instance.pk, (), ()),
+        using=using,
+    )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_pages(sender, using, **kwargs):
+    transaction.on_commit(
+        partial(bump_generation, PRODUCTS_GENERATION),
+        using=using,
+    )
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=State)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=State)
+@receiver(post_delete, sender=City)
+def invalidate_geography_tree(sender, using, **kwargs):
+    transaction.on_commit(
+        partial(bump_generation, GEOGRAPHY_GENERATION),
+        using=using,
+    )
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_row_counts(sender, using, **kwargs):
+    if sender._meta.app_label != "examples":  # noqa: SLF001
+        return
+    transaction.on_commit(
+        partial(bump_generation, count_generation(sender)),
+        using=using,
+    )
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_facet_cell(sender, instance, raw, using, **kwargs):
+    # The cell the row counts in now; locked so concurrent edits of the same
+    # product each move it from where the previous one left it.
+    instance._facet_cell_before = None  # noqa: SLF001
+    if instance._state.adding and not raw:  # noqa: SLF001
+        return
+    rows = Product.objects.using(using).filter(pk=instance.pk)
+    if transaction.get_connection(using).in_atomic_block:
+        rows = rows.select_for_update()
+    before = rows.first()
+    if before is not None:
+        instance._facet_cell_before = facet_cell(before)  # noqa: SLF001
+
+
+@receiver(post_save, sender=Product)
+def count_saved_product(sender, instance, **kwargs):
+    before = instance._facet_cell_before  # noqa: SLF001
+    after = facet_cell(instance)
+    if before != after:
+        if before is not None:
+            adjust_count(before, -1)
+        adjust_count(after, 1)
+
+
+@receiver(post_delete, sender=Product)
+def uncount_deleted_product(sender, instance, **kwargs):
+    adjust_count(facet_cell(instance), -1)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Contact)
+@receiver(post_save, sender=SystemStatus)
+def publish_saved_change(sender, instance, created, raw, using, **kwargs):
+    if not raw:
+        publish_changes(sender, [instance], created=created, using=using)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Contact)
+@receiver(post_delete, sender=SystemStatus)
+def publish_deleted_change(sender, instance, using, **kwargs):
+    publish_changes(sender, deleted_ids=[instance.pk], using=using)
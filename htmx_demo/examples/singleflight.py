@@ -0,0 +1,181 @@
+"""Single-flight coalescing of identical concurrent read requests.
+
+When hundreds of tabs poll the same endpoint, or many users search the same
+popular term, identical requests arrive while the first one is still being
+computed.  ``coalesce_requests`` lets those followers wait for that in-flight
+computation and share its rendered response instead of repeating the query
+and the render.
+
+A follower of a sync view waits at most ``EXAMPLES_COALESCE_WAIT_SECONDS``
+and then renders its own response, so a stuck leader cannot tie up every
+worker thread.  Responses that set cookies are never shared: each follower
+renders its own.
+"""
+
+import asyncio
+import functools
+import threading
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+from . import metrics
+
+
+def request_key(view_name, request, view_kwargs):
+    """Identify a request by view, URL kwargs and query parameters.
+
+    Parameter values are taken as sent: a view may well treat ``"books "``
+    differently from ``"books"``.
+    """
+    params = tuple(sorted((key, tuple(values)) for key, values in request.GET.lists()))
+    return view_name, tuple(sorted(view_kwargs.items())), params
+
+
+def _snapshot(response):
+    # None for responses other requests must not get a copy of.
+    if response.cookies or response.streaming:
+        return None
+    return response.status_code, response.content, list(response.items())
+
+
+def _restore(snapshot):
+    status, content, headers = snapshot
+    response = HttpResponse(content, status=status)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+def _response(own, snapshot):
+    # The request's own response, else a copy of the shared one, else None if
+    # it must render its own.
+    if own:
+        return own[0]
+    if snapshot is None:
+        return None
+    return _restore(snapshot)
+
+
+class _SyncFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _AsyncFlight:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+_sync_flights = {}
+_sync_flights_lock = threading.Lock()
+_async_flights = {}
+
+
+def _coalesce_sync(key, compute):
+    with _sync_flights_lock:
+        flight = _sync_flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _sync_flights[key] = _SyncFlight()
+
+    if not leader:
+        if not flight.done.wait(settings.EXAMPLES_COALESCE_WAIT_SECONDS):
+            metrics.incr("coalesce.wait_timeout")
+            return compute()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = compute()
+    except Exception as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _sync_flights_lock:
+            del _sync_flights[key]
+        flight.done.set()
+    return flight.result
+
+
+def _land(key, flight, _task):
+    # Only if a new flight has not taken its place already.
+    if _async_flights.get(key) is flight:
+        del _async_flights[key]
+
+
+async def _coalesce_async(key, compute):
+    key = (id(asyncio.get_running_loop()), *key)
+    flight = _async_flights.get(key)
+    if flight is None:
+        flight = _async_flights[key] = _AsyncFlight(asyncio.ensure_future(compute()))
+        flight.task.add_done_callback(functools.partial(_land, key, flight))
+
+    flight.waiters += 1
+    try:
+        # Shielded so one client going away does not cancel the others' result.
+        return await asyncio.shield(flight.task)
+    finally:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            # Every waiter is gone, so nobody needs the result any more.  It
+            # leaves at once, so the next identical request starts afresh
+            # instead of joining the cancelled task.
+            if _async_flights.get(key) is flight:
+                del _async_flights[key]
+            flight.task.cancel()
+
+
+def coalesce_requests(view):
+    """Share one in-flight computation between concurrent identical GET requests.
+
+    Works for sync views (followers block on a thread event) and async views
+    (followers await a shared task).  Only use it on views whose response
+    depends on nothing but the URL and its query parameters.
+    """
+    view_name = f"{view.__module__}.{view.__qualname__}"
+
+    if iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method != "GET":
+                return await view(request, *args, **kwargs)
+            # The response this request rendered itself, if it did.
+            own = []
+
+            async def compute():
+                own.append(await view(request, *args, **kwargs))
+                return _snapshot(own[0])
+
+            key = request_key(view_name, request, kwargs)
+            response = _response(own, await _coalesce_async(key, compute))
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            return response
+
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return view(request, *args, **kwargs)
+        # The response this request rendered itself, if it did.
+        own = []
+
+        def compute():
+            own.append(view(request, *args, **kwargs))
+            return _snapshot(own[0])
+
+        key = request_key(view_name, request, kwargs)
+        response = _response(own, _coalesce_sync(key, compute))
+        if response is None:
+            response = view(request, *args, **kwargs)
+        return response
+
+    return wrapper
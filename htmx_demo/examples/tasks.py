@@ -0,0 +1,359 @@
+"""Task list pages and single-statement task changes for the dynamic list example.
+
+``task_page`` pages through the list, open tasks first and in list order
+within each state, as keyset pages.  Open and completed tasks each have a
+partial index in that order, so a page is one index range scan, or two
+where the open tasks run out, however long the list is.
+
+The list order is the fractional rank in ``Task.order`` (see
+``examples.ranks``): new tasks go to the top and ``move_task`` moves a task
+by rewriting its rank alone.  Ranks that grow past
+``EXAMPLES_TASK_ORDER_MAX_LENGTH`` characters get the whole list re-ranked
+by ``rebalance_task_order``, in a background thread.
+
+``task_stats`` counts tasks by state for the "3 of 12 done" badge in one
+conditional aggregate, cached until the next committed task change.
+
+Toggling a task by loading it and calling ``save()`` costs two queries and
+lets concurrent clicks undo each other; ``toggle_task`` flips it with one
+``UPDATE ... RETURNING`` instead.  Likewise, ``bulk_task_action`` applies one
+action to a whole selection of tasks with a single ``UPDATE`` or ``DELETE``
+rather than a request per task.  None of these fire model signals, so the
+row-count generation they would bump (see ``examples.signals``) is bumped,
+and the changes published to ``examples.changefeed``, from here.
+"""
+
+import logging
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import Q
+from django.utils import timezone
+
+from . import metrics
+from .changefeed import publish_changes
+from .counts import count_generation
+from .generations import bump_generation
+from .generations import get_generation
+from .models import Task
+from .pagination import KeysetPage
+from .pagination import KeysetPaginator
+from .pagination import decode_cursor
+from .pagination import encode_cursor
+from .pagination import keyset_filter
+from .ranks import rank_between
+from .ranks import spaced_ranks
+
+logger = logging.getLogger(__name__)
+
+# Within each completion state; see the partial indexes on Task.
+TASK_ORDERING = ("order", "id")
+TASKS_PER_PAGE = 20
+BULK_TASK_ACTIONS = ("toggle", "delete", "clear_completed")
+# Most tasks one bulk request may name.
+MAX_BULK_TASKS = 500
+
+_rebalance_lock = threading.Lock()
+
+
+def _state_paginator(per_page, *, completed):
+    return KeysetPaginator(
+        Task.objects.filter(completed=completed),
+        TASK_ORDERING,
+        per_page,
+    )
+
+
+def _task_cursor(state_cursor, *, completed):
+    return encode_cursor(completed, state_cursor)
+
+
+def task_page(cursor=None):
+    """Return the ``KeysetPage`` of tasks after ``cursor``, open tasks first.
+
+    A cursor holds the completion state it continues in and the keyset
+    cursor within that state.  Raises ``ValueError`` for a malformed cursor.
+    """
+    completed, state_cursor = False, ""
+    if cursor:
+        completed, state_cursor = decode_cursor(cursor, 2)
+        if not isinstance(completed, bool) or not isinstance(state_cursor, str):
+            msg = "Malformed cursor"
+            raise ValueError(msg)
+
+    paginator = _state_paginator(TASKS_PER_PAGE, completed=completed)
+    page = paginator.get_page(state_cursor or None)
+    rows = list(page)
+    next_cursor = page.next_cursor and _task_cursor(
+        page.next_cursor,
+        completed=completed,
+    )
+    remaining = TASKS_PER_PAGE - len(rows)
+    if not completed and not page.has_next():
+        # Out of open tasks: fill the page from the completed ones.
+        if remaining:
+            rest = _state_paginator(remaining, completed=True).get_page()
+            rows.extend(rest)
+            next_cursor = rest.next_cursor and _task_cursor(
+                rest.next_cursor,
+                completed=True,
+            )
+        elif Task.objects.filter(completed=True).exists():
+            next_cursor = _task_cursor("", completed=True)
+    return KeysetPage(rows, next_cursor)
+
+
+def bulk_task_request(params):
+    """Return the ``(action, task_ids)`` of a bulk request's POST ``params``.
+
+    ``action`` must be one of ``BULK_TASK_ACTIONS`` and ``task_ids`` list
+    between 1 and ``MAX_BULK_TASKS`` ids.  Raises ``ValueError`` otherwise.
+    """
+    action = params.get("action", "")
+    if action not in BULK_TASK_ACTIONS:
+        msg = f"Unknown action {action!r}"
+        raise ValueError(msg)
+    try:
+        task_ids = [int(task_id) for task_id in params.getlist("task_ids")]
+    except ValueError as exc:
+        msg = "Task ids must be integers"
+        raise ValueError(msg) from exc
+    task_ids = list(dict.fromkeys(task_ids))
+    if not task_ids or len(task_ids) > MAX_BULK_TASKS:
+        msg = f"Pass between 1 and {MAX_BULK_TASKS} task ids"
+        raise ValueError(msg)
+    return action, task_ids
+
+
+def _delete_returning_ids(queryset):
+    # QuerySet.delete() collects the rows first to send post_delete, which
+    # the examples signal handlers listen to for every model.
+    connection = connections[queryset.db]
+    opts = queryset.model._meta  # noqa: SLF001
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    table = connection.ops.quote_name(opts.db_table)
+    pk = connection.ops.quote_name(opts.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE {pk} IN ({sql}) RETURNING {pk}",  # noqa: S608
+            params,
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def _check_rank_length(rank):
+    if len(rank) > settings.EXAMPLES_TASK_ORDER_MAX_LENGTH:
+        transaction.on_commit(schedule_rebalance)
+
+
+def create_task(title):
+    """Create a task called ``title`` at the top of the list."""
+    task = Task.objects.create(title=title)
+    _check_rank_length(task.order)
+    return task
+
+
+def _neighbour_rank(task_id, rank, *, exclude, above):
+    # The rank of the task just above or below the given one, if any.
+    ordering = TASK_ORDERING
+    if above:
+        ordering = tuple(f"-{field}" for field in TASK_ORDERING)
+    return (
+        Task.objects.exclude(pk=exclude)
+        .filter(keyset_filter(ordering, (rank, task_id)))
+        .order_by(*ordering)
+        .values_list("order", flat=True)
+        .first()
+    )
+
+
+def _neighbour_ranks(task_id, after_id, before_id):
+    # The ranks the moved task goes between, None at either end of the list.
+    neighbours = [pk for pk in (after_id, before_id) if pk is not None]
+    ranks = dict(Task.objects.filter(pk__in=neighbours).values_list("pk", "order"))
+    if len(ranks) != len(set(neighbours)):
+        msg = "Unknown neighbouring task"
+        raise ValueError(msg)
+
+    if after_id is None:
+        above = _neighbour_rank(
+            before_id,
+            ranks[before_id],
+            exclude=task_id,
+            above=True,
+        )
+    else:
+        above = ranks[after_id]
+    if before_id is None:
+        below = _neighbour_rank(after_id, ranks[after_id], exclude=task_id, above=False)
+    else:
+        below = ranks[before_id]
+    return above, below
+
+
+def move_task(task_id, *, after_id=None, before_id=None):
+    """Move the task with id ``task_id`` with a single-row ``UPDATE``.
+
+    The task goes right after the task ``after_id`` and before the task
+    ``before_id``; with only one of them, next to that one.  Returns the new
+    rank, or None if there is no task ``task_id``.  Raises ``ValueError`` if
+    the neighbours are unknown or not in that order.
+    """
+    neighbours = [pk for pk in (after_id, before_id) if pk is not None]
+    if not neighbours or task_id in neighbours:
+        msg = "Pass another task to move the task after or before"
+        raise ValueError(msg)
+    above, below = _neighbour_ranks(task_id, after_id, before_id)
+    if "" in (above, below):
+        # Unranked tasks, e.g. loaded from a fixture, are ranked first.
+        rebalance_task_order()
+        above, below = _neighbour_ranks(task_id, after_id, before_id)
+    try:
+        rank = rank_between(above, below)
+    except ValueError as exc:
+        # Equal ranks, from concurrent moves to the same spot, are spread
+        # out again by a rebalance.
+        if above == below:
+            transaction.on_commit(schedule_rebalance)
+        msg = "Cannot place the task between those two, reload the list"
+        raise ValueError(msg) from exc
+
+    moved = Task.objects.filter(pk=task_id)
+    if not moved.update(order=rank):
+        return None
+    _check_rank_length(rank)
+    if after_id is None:
+        position = ("beforebegin", before_id)
+    else:
+        position = ("afterend", after_id)
+    publish_changes(Task, moved, position=position)
+    return rank
+
+
+def rebalance_task_order():
+    """Give every task a short rank again, keeping the list order.
+
+    Returns the number of tasks re-ranked.
+    """
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update()
+            .order_by(*TASK_ORDERING)
+            .only("id", "order"),
+        )
+        for task, rank in zip(tasks, spaced_ranks(len(tasks)), strict=True):
+            task.order = rank
+        Task.objects.bulk_update(tasks, ["order"], batch_size=500)
+    metrics.incr("task_order.rebalanced")
+    return len(tasks)
+
+
+def _rebalance():
+    if not _rebalance_lock.acquire(blocking=False):
+        return
+    try:
+        rebalance_task_order()
+    except Exception:
+        logger.exception("Could not rebalance the task order")
+    finally:
+        _rebalance_lock.release()
+
+
+def schedule_rebalance():
+    """Run ``rebalance_task_order`` in a background thread, unless one is running.
+
+    Runs in the calling thread if ``EXAMPLES_TASK_ORDER_BACKGROUND_REBALANCE``
+    is off.
+    """
+    if not settings.EXAMPLES_TASK_ORDER_BACKGROUND_REBALANCE:
+        _rebalance()
+        return
+    if _rebalance_lock.locked():
+        return
+
+    def run():
+        try:
+            _rebalance()
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=run, name="task-rebalance", daemon=True).start()
+
+
+def task_stats(*, fresh=False):
+    """Return the task counts for the task list badge, counted in one query.
+
+    Returns a dict of ``total``, ``open``, ``completed`` and
+    ``completed_today``, cached until a task is created, toggled or deleted.
+    Pass ``fresh`` in a request that has just changed tasks: the cache is
+    only invalidated once its transaction commits.
+    """
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    generation = get_generation(count_generation(Task))
+    key = f"examples:tasks:stats:{generation}:{today.date().isoformat()}"
+    stats = None if fresh else cache.get(key)
+    if stats is None:
+        # Aliased apart from the fields: filters would see the aggregates.
+        counts = Task.objects.aggregate(
+            total_tasks=Count("id"),
+            open_tasks=Count("id", filter=Q(completed=False)),
+            completed_tasks=Count("id", filter=Q(completed=True)),
+            completed_today_tasks=Count(
+                "id",
+                filter=Q(completed=True, completed_at__gte=today),
+            ),
+        )
+        stats = {
+            name: counts[f"{name}_tasks"]
+            for name in ("total", "open", "completed", "completed_today")
+        }
+        if not fresh:
+            cache.set(key, stats, timeout=settings.EXAMPLES_TASK_STATS_CACHE_SECONDS)
+    return stats
+
+
+def _tasks_changed():
+    # Invalidates task_stats() too.
+    transaction.on_commit(partial(bump_generation, count_generation(Task)))
+
+
+def toggle_task(task_id):
+    """Flip the completion of the task with id ``task_id`` in one statement.
+
+    Returns the task as it is now, or None if there is no such task.
+    """
+    tasks = Task.objects.filter(pk=task_id).toggle_completion()
+    if not tasks:
+        return None
+    _tasks_changed()
+    publish_changes(Task, tasks)
+    return tasks[0]
+
+
+def bulk_task_action(action, task_ids):
+    """Apply ``action`` to the tasks with ids in ``task_ids`` in one statement.
+
+    ``toggle`` flips each task's completion, ``delete`` removes the tasks
+    and ``clear_completed`` removes those of them that are completed.
+    Unknown ids are ignored.  Returns ``(tasks, deleted_ids)``: the toggled
+    tasks as they are now, and the ids of the deleted ones.
+    """
+    tasks = Task.objects.filter(pk__in=task_ids)
+    if action == "toggle":
+        toggled, deleted_ids = tasks.toggle_completion(), []
+        changed = len(toggled)
+    else:
+        if action == "clear_completed":
+            tasks = tasks.filter(completed=True)
+        toggled, deleted_ids = [], _delete_returning_ids(tasks)
+        changed = len(deleted_ids)
+
+    if changed:
+        _tasks_changed()
+        publish_changes(Task, toggled, deleted_ids)
+    return sorted(toggled, key=lambda task: task.pk), deleted_ids
@@ -0,0 +1,26 @@
+"""Template tags for per-object fragment caching, see examples.fragments."""
+
+from django import template
+from django.utils.safestring import mark_safe
+
+from htmx_demo.examples.fragments import render_fragments
+
+register = template.Library()
+
+
+@register.simple_tag
+def render_each_cached(template_name, objects, name, version_field="updated_at"):
+    """Render ``template_name`` for every object, like a loop over an include.
+
+    Usage::
+
+        {% render_each_cached "examples/partials/card.html" products "product" %}
+    """
+    fragments = render_fragments(
+        template_name,
+        objects,
+        name,
+        version_field=version_field,
+    )
+    # Each fragment was rendered, and escaped, by its own template.
+    return mark_safe("".join(fragments))  # noqa: S308
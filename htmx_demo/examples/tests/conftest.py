@@ -0,0 +1,20 @@
+import pytest
+from django.core.cache import cache
+
+from htmx_demo.examples import analytics
+from htmx_demo.examples import fragments
+from htmx_demo.examples import geography
+from htmx_demo.examples import products
+from htmx_demo.examples.autocomplete import contact_prefix_index
+from htmx_demo.examples.fuzzy import contact_name_index
+
+
+@pytest.fixture(autouse=True)
+def _reset_example_state():
+    cache.clear()
+    contact_prefix_index.reset()
+    contact_name_index.reset()
+    analytics.reset()
+    fragments.reset()
+    geography.reset()
+    products.reset()
@@ -0,0 +1,16 @@
+from factory import Faker
+from factory import Sequence
+from factory.django import DjangoModelFactory
+
+from htmx_demo.examples.models import Contact
+
+
+class ContactFactory(DjangoModelFactory[Contact]):
+    first_name = Faker("first_name")
+    last_name = Faker("last_name")
+    email = Sequence(lambda n: f"contact{n}@example.com")
+    company = Faker("company")
+    message = Faker("sentence")
+
+    class Meta:
+        model = Contact
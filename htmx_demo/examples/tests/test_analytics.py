@@ -0,0 +1,142 @@
+import threading
+import time
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from htmx_demo.examples import metrics
+from htmx_demo.examples import views
+from htmx_demo.examples.analytics import flush
+from htmx_demo.examples.analytics import record_search
+from htmx_demo.examples.counts import count_rows
+from htmx_demo.examples.models import SearchQueryLog
+from htmx_demo.examples.tests.factories import ContactFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def record_all(settings):
+    settings.EXAMPLES_SEARCH_LOG_SAMPLE_RATE = 1
+
+
+def test_record_search_buffers_until_flushed(record_all):
+    record_search("contact_search_htmx", "  Jo ", 12.5, 3, htmx=True)
+    assert not SearchQueryLog.objects.exists()
+
+    assert flush() == 1
+    assert flush() == 0
+    log = SearchQueryLog.objects.get()
+    assert (log.endpoint, log.query, log.latency_ms, log.hit_count, log.htmx) == (
+        "contact_search_htmx",
+        "jo",
+        12.5,
+        3,
+        True,
+    )
+
+
+def test_record_search_samples(settings):
+    settings.EXAMPLES_SEARCH_LOG_SAMPLE_RATE = 0
+    record_search("contact_search_ajax", "jo", 1, 1)
+    assert flush() == 0
+
+
+def test_full_buffer_drops_oldest_searches(record_all, settings):
+    size = 2
+    settings.EXAMPLES_SEARCH_LOG_BUFFER_SIZE = size
+    metrics.reset()
+    for query in ["a", "b", "c"]:
+        record_search("contact_search_ajax", query, 1, 1)
+
+    assert flush() == size
+    assert sorted(SearchQueryLog.objects.values_list("query", flat=True)) == ["b", "c"]
+    assert metrics.snapshot()["search_log.dropped"] == 1
+
+
+def test_search_views_record_searches(client, record_all):
+    ContactFactory(first_name="Grace", last_name="Hopper", company="")
+
+    client.get(reverse("examples:contact_search_ajax"), {"q": "grace"})
+    client.get(
+        reverse("examples:contact_search_htmx"),
+        {"q": "nobody"},
+        headers={"HX-Request": "true"},
+    )
+    flush()
+
+    logs = SearchQueryLog.objects.order_by("endpoint")
+    assert [(log.endpoint, log.query, log.hit_count, log.htmx) for log in logs] == [
+        ("contact_search_ajax", "grace", 1, False),
+        ("contact_search_htmx", "nobody", 0, True),
+    ]
+
+
+def test_flushed_searches_invalidate_cached_counts(
+    record_all,
+    django_capture_on_commit_callbacks,
+):
+    assert count_rows(SearchQueryLog.objects.all()) == (0, False)
+    record_search("contact_search_htmx", "ada", 1.0, 1)
+    with django_capture_on_commit_callbacks(execute=True):
+        flush()
+    assert count_rows(SearchQueryLog.objects.all()) == (1, False)
+
+
+def test_search_report():
+    for latency_ms, hit_count in [(10, 1), (20, 0), (30, 2), (400, 0)]:
+        SearchQueryLog.objects.create(
+            endpoint="contact_search_htmx",
+            query="john",
+            latency_ms=latency_ms,
+            hit_count=hit_count,
+        )
+    SearchQueryLog.objects.create(
+        endpoint="contact_search_htmx",
+        query="",
+        latency_ms=5,
+        hit_count=20,
+    )
+
+    out = StringIO()
+    call_command("search_report", stdout=out)
+    lines = out.getvalue().splitlines()
+    assert lines[1].split() == ["joh", "4", "20.0", "400.0", "50%"]
+    assert lines[2].split() == ["(empty)", "1", "5.0", "5.0", "0%"]
+
+    out = StringIO()
+    call_command("search_report", "--min-count", "5", stdout=out)
+    assert out.getvalue() == "No searches to report.\n"
+
+
+def test_coalesced_searches_are_each_recorded(rf, record_all, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_search(query, **kwargs):
+        started.set()
+        release.wait(5)
+        return [], ""
+
+    monkeypatch.setattr(views, "contact_search_page", slow_search)
+    threads = [
+        threading.Thread(
+            target=views.contact_search_ajax,
+            args=[rf.get("/", {"q": "popular"})],
+        )
+        for _ in range(3)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    flush()
+
+    logged = SearchQueryLog.objects.values_list("query", "hit_count")
+    assert list(logged) == [("popular", 0)] * len(threads)
@@ -0,0 +1,114 @@
+import pytest
+
+from htmx_demo.examples.autocomplete import CONTACTS_GENERATION
+from htmx_demo.examples.autocomplete import contact_prefix_index
+from htmx_demo.examples.autocomplete import contact_prefix_keys
+from htmx_demo.examples.generations import bump_generation
+from htmx_demo.examples.models import Contact
+from htmx_demo.examples.search import find_contacts
+from htmx_demo.examples.tests.factories import ContactFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_contact_prefix_keys():
+    keys = contact_prefix_keys("Zoë", "Smith", "ZS@example.com", "")
+    assert sorted(keys) == ["smith", "zoe", "zs"]
+
+
+def test_lookup_returns_newest_matches_first():
+    older = ContactFactory(first_name="Joan", last_name="Park", company="")
+    newer = ContactFactory(first_name="Ann", last_name="Jones", company="")
+    ContactFactory(
+        first_name="Bea",
+        last_name="Major",
+        email="bea@example.com",
+        company="",
+    )
+
+    assert contact_prefix_index.lookup("jo", 10) == [newer.pk, older.pk]
+    assert contact_prefix_index.lookup("jo", 1) == [newer.pk]
+    assert contact_prefix_index.lookup("x", 10) == []
+
+
+def test_lookup_puts_exact_matches_first_and_pages_after_cursor():
+    exact = ContactFactory(first_name="Jo", last_name="Park", company="")
+    prefix = ContactFactory(first_name="Joan", last_name="Lee", company="")
+    newest_exact = ContactFactory(first_name="Ann", last_name="Jo", company="")
+
+    assert contact_prefix_index.lookup("jo", 10) == [
+        newest_exact.pk,
+        exact.pk,
+        prefix.pk,
+    ]
+    assert contact_prefix_index.lookup("jo", 10, after=(0, exact.pk)) == [prefix.pk]
+    assert contact_prefix_index.lookup("jo", 1, after=(0, newest_exact.pk)) == [
+        exact.pk,
+    ]
+
+
+def test_committed_changes_update_index_in_place(
+    django_capture_on_commit_callbacks,
+    django_assert_num_queries,
+):
+    contact_prefix_index.lookup("a", 10)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        contact = ContactFactory(first_name="Kim", last_name="Park", company="")
+    with django_assert_num_queries(0):
+        assert contact_prefix_index.lookup("ki", 10) == [contact.pk]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        contact.delete()
+    with django_assert_num_queries(0):
+        assert contact_prefix_index.lookup("ki", 10) == []
+
+
+def test_changes_from_other_processes_trigger_rebuild():
+    contact_prefix_index.lookup("a", 10)
+    contact = Contact.objects.bulk_create(
+        [Contact(first_name="Lee", last_name="Ng", email="lee@example.com")],
+    )[0]
+    assert contact_prefix_index.lookup("le", 10) == []
+
+    bump_generation(CONTACTS_GENERATION)
+    assert contact_prefix_index.lookup("le", 10) == [contact.pk]
+
+
+def test_over_budget_falls_back_to_database(settings):
+    settings.EXAMPLES_AUTOCOMPLETE_MEMORY_BUDGET = 100
+    contact = ContactFactory(first_name="Mia", last_name="Park", company="")
+
+    assert contact_prefix_index.lookup("mi", 10) is None
+    assert [row["id"] for row in find_contacts("Mi")] == [contact.pk]
+
+
+def test_find_contacts_short_queries_match_field_prefixes():
+    jane = ContactFactory(
+        first_name="Jane",
+        last_name="Smith",
+        email="js@example.com",
+        company="",
+    )
+    ContactFactory(
+        first_name="Bob",
+        last_name="Hamish",
+        email="bob@example.com",
+        company="",
+    )
+
+    assert [row["id"] for row in find_contacts("smi")] == [jane.pk]
+    assert [row["first_name"] for row in find_contacts("mish")] == ["Bob"]
+
+
+def test_find_contacts_short_queries_still_match_substrings(
+    django_assert_num_queries,
+):
+    fred = ContactFactory(first_name="Fred", last_name="Park", company="")
+    edna = ContactFactory(first_name="Edna", last_name="Park", company="")
+
+    # A page of prefix matches needs no substring search.
+    contact_prefix_index.lookup("ed", 1)
+    with django_assert_num_queries(1):
+        assert [row["id"] for row in find_contacts("ed", limit=1)] == [edna.pk]
+    assert [row["id"] for row in find_contacts("ed")] == [edna.pk, fred.pk]
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.urls import reverse
+
+from htmx_demo.examples import metrics
+from htmx_demo.examples.cancellation import run_cancellable
+from htmx_demo.examples.tests.factories import ContactFactory
+
+# The slow query runs this long before the search is cancelled.
+CANCEL_AFTER_SECONDS = 0.3
+# Far less than the query would take to finish.
+MAX_RELEASE_SECONDS = 2
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.reset()
+
+
+def _slow_query():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_sleep(5)")
+
+
+# async_to_sync() runs the sync parts of these coroutines back on the test
+# thread, so they share its database connection and test transaction.
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="uses pg_sleep")
+@pytest.mark.django_db
+def test_cancelling_the_caller_cancels_the_query():
+    async def main():
+        search = asyncio.ensure_future(
+            run_cancellable(_slow_query, metric="test_search"),
+        )
+        await asyncio.sleep(CANCEL_AFTER_SECONDS)
+        search.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await search
+        started = time.monotonic()
+        # The sync thread is free again as soon as the slow query is cancelled.
+        await sync_to_async(lambda: None)()
+        return time.monotonic() - started
+
+    assert async_to_sync(main)() < MAX_RELEASE_SECONDS
+    counters = metrics.snapshot()
+    assert counters["test_search.cancelled"] == 1
+    # Allowing for the time the query took to start.
+    assert counters["test_search.wasted_db_ms"] >= CANCEL_AFTER_SECONDS * 1000 / 2
+
+
+@pytest.mark.django_db
+def test_async_contact_search_view(async_client):
+    ContactFactory(first_name="Grace", last_name="Hopper")
+
+    async def main():
+        return await async_client.get(
+            reverse("examples:contact_search_htmx"),
+            {"q": "hopp"},
+        )
+
+    response = async_to_sync(main)()
+    assert response.status_code == HTTPStatus.OK
+    assert "Grace" in response.content.decode()
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from config import websocket
+from htmx_demo.examples import changefeed
+from htmx_demo.examples.changefeed import CHANGE_FEED_PATH
+from htmx_demo.examples.changefeed import render_changes
+from htmx_demo.examples.models import SystemStatus
+from htmx_demo.examples.models import Task
+from htmx_demo.examples.tasks import bulk_task_action
+from htmx_demo.examples.tasks import move_task
+from htmx_demo.examples.tasks import toggle_task
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def broadcasts(monkeypatch):
+    sent = []
+    monkeypatch.setattr(changefeed.websocket, "has_subscribers", lambda path: True)
+    monkeypatch.setattr(
+        changefeed.websocket,
+        "broadcast",
+        lambda path, text: sent.append((path, text)),
+    )
+    return sent
+
+
+def test_saves_and_deletes_are_broadcast_after_commit(
+    broadcasts,
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        task = Task.objects.create(title="Write docs")
+        assert not broadcasts
+    [(path, html)] = broadcasts
+    assert path == CHANGE_FEED_PATH
+    assert html.startswith('<div id="htmx-task-list" hx-swap-oob="afterbegin">')
+    assert f'id="task-{task.pk}"' in html
+    assert 'id="task-stats"' in html
+
+    broadcasts.clear()
+    task_id = task.pk
+    with django_capture_on_commit_callbacks(execute=True):
+        task.title = "Write more docs"
+        task.save()
+        task.delete()
+    # Rendered as saved, although deleted by the time they are sent.
+    saved, deleted = (html for path, html in broadcasts)
+    assert f'id="task-{task_id}" hx-swap-oob="true"' in saved
+    assert "Write more docs" in saved
+    assert f'<div id="task-{task_id}" hx-swap-oob="delete"></div>' in deleted
+
+
+def test_signal_less_task_changes_are_broadcast(
+    broadcasts,
+    django_capture_on_commit_callbacks,
+):
+    tasks = Task.objects.bulk_create(Task(title=f"Task {n}") for n in range(3))
+    with django_capture_on_commit_callbacks(execute=True):
+        toggle_task(tasks[0].pk)
+        bulk_task_action("delete", [tasks[1].pk, tasks[2].pk])
+    toggled, deleted = (html for path, html in broadcasts)
+    assert f'id="task-{tasks[0].pk}" hx-swap-oob="true"' in toggled
+    for task in tasks[1:]:
+        assert f'<div id="task-{task.pk}" hx-swap-oob="delete"></div>' in deleted
+
+
+def test_moves_are_broadcast_next_to_the_neighbour(
+    broadcasts,
+    django_capture_on_commit_callbacks,
+):
+    a, b, c = (Task.objects.create(title=title) for title in ["A", "B", "C"])
+    with django_capture_on_commit_callbacks(execute=True):
+        move_task(c.pk, after_id=b.pk)
+        move_task(a.pk, before_id=c.pk)
+    after, before = (html for path, html in broadcasts)
+    assert after.startswith(
+        f'<div id="task-{c.pk}" hx-swap-oob="delete"></div>'
+        f'<div hx-swap-oob="afterend:#task-{b.pk}"><div class="task-item',
+    )
+    assert f'<div hx-swap-oob="beforebegin:#task-{c.pk}">' in before
+
+
+def test_nothing_is_rendered_without_subscribers(
+    monkeypatch,
+    django_capture_on_commit_callbacks,
+):
+    rendered = []
+    monkeypatch.setattr(changefeed, "render_changes", rendered.append)
+    with django_capture_on_commit_callbacks(execute=True):
+        Task.objects.create(title="Unseen")
+    assert not rendered
+
+
+def test_status_changes_swap_the_status_card():
+    status = SystemStatus.objects.create(service_name="API", status="degraded")
+    html = render_changes(SystemStatus, [status])
+    assert f'id="status-{status.pk}" class="status-card" hx-swap-oob="true"' in html
+    assert render_changes(SystemStatus, deleted_ids=[status.pk]) == (
+        f'<div id="status-{status.pk}" hx-swap-oob="delete"></div>'
+    )
+
+
+def test_broadcast_reaches_connections_on_the_path():
+    async def session():
+        received = []
+        incoming = asyncio.Queue()
+
+        async def send(message):
+            received.append(message)
+
+        connection = asyncio.create_task(
+            websocket.websocket_application(
+                {"type": "websocket", "path": "/ws/test/"},
+                incoming.get,
+                send,
+            ),
+        )
+        await asyncio.sleep(0)
+        assert websocket.has_subscribers("/ws/test/")
+        # From another thread, as on_commit callbacks of sync views run.
+        await asyncio.to_thread(websocket.broadcast, "/ws/test/", "<div></div>")
+        await asyncio.to_thread(websocket.broadcast, "/ws/other/", "elsewhere")
+        await asyncio.sleep(0.01)
+        await incoming.put({"type": "websocket.disconnect"})
+        await connection
+        return received
+
+    received = asyncio.run(session())
+    assert received == [
+        {"type": "websocket.accept"},
+        {"type": "websocket.send", "text": "<div></div>"},
+    ]
+    assert not websocket.has_subscribers("/ws/test/")
@@ -0,0 +1,58 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import IntegrityError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from htmx_demo.examples.models import Contact
+from htmx_demo.examples.tests.factories import ContactFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def _form(email):
+    return {
+        "first_name": "Ada",
+        "last_name": "Lovelace",
+        "email": email,
+        "message": "Hello",
+    }
+
+
+def test_email_is_unique_regardless_of_case():
+    ContactFactory(email="ada@example.com")
+    with pytest.raises(IntegrityError):
+        ContactFactory(email="ADA@example.com")
+
+
+@pytest.mark.parametrize("name", ["contact_submit_ajax", "contact_submit_htmx"])
+def test_submit_rejects_duplicate_email_in_one_insert(client, name):
+    url = reverse(f"examples:{name}")
+    response = client.post(url, _form("Ada@Example.com"))
+    assert response.status_code == HTTPStatus.OK
+
+    with CaptureQueriesContext(connection) as captured:
+        response = client.post(url, _form("ada@example.COM"))
+    statements = [
+        query["sql"]
+        for query in captured.captured_queries
+        if "SAVEPOINT" not in query["sql"]
+    ]
+    assert len(statements) == 1
+    assert statements[0].startswith("INSERT")
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "This email is already registered" in response.content.decode()
+    assert Contact.objects.count() == 1
+
+
+@pytest.mark.parametrize("name", ["contact_submit_ajax", "contact_submit_htmx"])
+def test_submit_reraises_other_integrity_errors(client, monkeypatch, name):
+    def create(**kwargs):
+        msg = 'null value in column "first_name" violates not-null constraint'
+        raise IntegrityError(msg)
+
+    monkeypatch.setattr(Contact.objects, "create", create)
+    with pytest.raises(IntegrityError):
+        client.post(reverse(f"examples:{name}"), _form("ada@example.com"))
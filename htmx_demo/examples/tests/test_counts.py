@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from htmx_demo.examples.counts import EstimatedCountPaginator
+from htmx_demo.examples.counts import count_rows
+from htmx_demo.examples.models import Product
+
+pytestmark = pytest.mark.django_db
+
+
+def _products(count, **fields):
+    Product.objects.bulk_create(
+        Product(name=f"P{number}", description="", price="1", **fields)
+        for number in range(count)
+    )
+
+
+def _analyze():
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE examples_product")
+
+
+def test_small_counts_are_exact_and_cached(
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    _products(3)
+    assert count_rows(Product.objects.all()) == (3, False)
+    with django_assert_num_queries(0):
+        assert count_rows(Product.objects.all()) == (3, False)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Product.objects.create(name="New", description="", price="1")
+    assert count_rows(Product.objects.all()) == (4, False)
+
+
+def test_large_counts_come_from_the_planner(settings, django_assert_num_queries):
+    if connection.vendor != "postgresql":
+        pytest.skip("Planner estimates need PostgreSQL")
+    settings.EXAMPLES_COUNT_ESTIMATE_THRESHOLD = 20
+    _products(30, in_stock=True)
+    _products(10, in_stock=False)
+    _analyze()
+
+    with django_assert_num_queries(1) as captured:
+        assert count_rows(Product.objects.all()) == (40, True)
+    assert "COUNT" not in captured.captured_queries[0]["sql"]
+
+    count, estimated = count_rows(Product.objects.filter(in_stock=True))
+    assert estimated
+    assert count > 0
+    # Below the threshold the estimate is only used to decide to count.
+    assert count_rows(Product.objects.filter(in_stock=False)) == (10, False)
+
+
+def test_estimated_count_paginator(settings):
+    settings.EXAMPLES_COUNT_ESTIMATE_THRESHOLD = 10**9
+    _products(25)
+    paginator = EstimatedCountPaginator(Product.objects.all(), 10)
+    assert (paginator.count, paginator.num_pages) == (25, 3)
+
+
+def test_admin_changelist_uses_estimated_counts(admin_client):
+    _products(3)
+    response = admin_client.get(reverse("admin:examples_product_changelist"))
+    assert response.status_code == HTTPStatus.OK
+    assert "3 products" in response.content.decode()
+
+
+def test_first_product_page_reports_total(client):
+    _products(12)
+    data = client.get(reverse("examples:products_ajax")).json()
+    assert (data["total_count"], data["total_is_estimate"]) == (12, False)
+    content = client.get(reverse("examples:products_htmx")).content.decode()
+    assert "12 products" in content
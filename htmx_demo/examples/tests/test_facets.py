@@ -0,0 +1,93 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from htmx_demo.examples.facets import price_bucket
+from htmx_demo.examples.facets import product_facets
+from htmx_demo.examples.facets import rebuild_facet_counts
+from htmx_demo.examples.models import Product
+
+pytestmark = pytest.mark.django_db
+
+
+def _product(category, price, *, in_stock=True):
+    return Product.objects.create(
+        name=f"{category} {price}",
+        description="",
+        price=price,
+        category=category,
+        in_stock=in_stock,
+    )
+
+
+def _counts(facets):
+    return {
+        field: {choice["value"]: choice["count"] for choice in choices}
+        for field, choices in facets.items()
+    }
+
+
+@pytest.mark.parametrize(
+    ("price", "bucket"),
+    [("0", "0-25"), ("24.99", "0-25"), ("25", "25-50"), ("249.99", "100-250")],
+)
+def test_price_bucket(price, bucket):
+    assert price_bucket(Decimal(price)) == bucket
+
+
+def test_signals_keep_facet_counts_exact():
+    book = _product("books", "12.50")
+    _product("books", "30", in_stock=False)
+    lamp = _product("home", "300")
+
+    book.category = "home"
+    book.price = Decimal("60")
+    book.save()
+    lamp.delete()
+    Product.objects.get(pk=book.pk).save()
+
+    expected = {
+        "category": {"books": 1, "home": 1},
+        "in_stock": {True: 1, False: 1},
+        "price_bucket": {"25-50": 1, "50-100": 1},
+    }
+    assert _counts(product_facets()) == expected
+    rebuild_facet_counts()
+    assert _counts(product_facets()) == expected
+
+
+def test_facet_counts_ignore_their_own_filter(django_assert_num_queries):
+    _product("books", "10")
+    _product("books", "10", in_stock=False)
+    _product("home", "40")
+
+    with django_assert_num_queries(1):
+        facets = product_facets({"category": "books", "in_stock": True})
+    assert _counts(facets) == {
+        "category": {"books": 1, "home": 1},
+        "in_stock": {True: 1, False: 1},
+        "price_bucket": {"0-25": 1},
+    }
+
+
+def test_first_product_page_shows_facets(client):
+    _product("books", "10")
+    _product("books", "10", in_stock=False)
+
+    data = client.get(reverse("examples:products_ajax"), {"in_stock": "1"}).json()
+    assert data["facets"]["category"] == [
+        {"value": "books", "label": "Books", "count": 1},
+    ]
+    content = client.get(reverse("examples:products_htmx")).content.decode()
+    assert "Books (2)" in content
+    assert "Out of stock (1)" in content
+
+
+def test_rebuild_facet_counts_command():
+    _product("books", "10")
+    out = StringIO()
+    call_command("rebuild_facet_counts", stdout=out)
+    assert "Recounted 1 facet cells" in out.getvalue()
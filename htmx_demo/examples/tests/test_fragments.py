@@ -0,0 +1,98 @@
+import os
+
+import pytest
+from django.urls import reverse
+
+from htmx_demo.examples import metrics
+from htmx_demo.examples.fragments import fragment_key
+from htmx_demo.examples.fragments import render_fragments
+from htmx_demo.examples.fragments import template_digest
+from htmx_demo.examples.models import Product
+
+pytestmark = pytest.mark.django_db
+
+CARD = "examples/partials/product_card.html"
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.reset()
+
+
+def _products(*names):
+    return [
+        Product.objects.create(name=name, description="", price="1") for name in names
+    ]
+
+
+def test_only_changed_objects_are_rendered_again():
+    products = _products("Lamp", "Desk", "Chair")
+
+    first = render_fragments(CARD, products, "product")
+    assert "Desk" in first[1]
+    assert metrics.snapshot()["fragment_cache.miss"] == len(products)
+
+    products[1].name = "Standing desk"
+    products[1].save()
+    second = render_fragments(CARD, products, "product")
+    assert second[0] == first[0]
+    assert "Standing desk" in second[1]
+    counters = metrics.snapshot()
+    assert (counters["fragment_cache.miss"], counters["fragment_cache.hit"]) == (4, 2)
+
+
+def test_fragment_key_covers_id_version_and_template():
+    product = _products("Lamp")[0]
+    key = fragment_key(CARD, product)
+    assert template_digest(CARD) in key
+    assert key.endswith(f":{product.pk}:{product.updated_at.isoformat()}")
+    assert fragment_key(CARD, {"id": product.pk, "version": 3}, "version") != key
+
+
+def test_product_views_use_cached_fragments(client):
+    product = _products("Lamp")[0]
+
+    client.get(reverse("examples:products_htmx"))
+    client.get(reverse("examples:product_detail_htmx", args=[product.pk]))
+    response = client.get(reverse("examples:product_detail_htmx", args=[product.pk]))
+    assert "Lamp" in response.content.decode()
+    counters = metrics.snapshot()
+    assert (counters["fragment_cache.miss"], counters["fragment_cache.hit"]) == (2, 1)
+
+
+@pytest.fixture
+def template_dir(settings, tmp_path):
+    settings.TEMPLATES = [
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [str(tmp_path)],
+            # Uncached, so edited files are read again.
+            "OPTIONS": {"loaders": ["django.template.loaders.filesystem.Loader"]},
+        },
+    ]
+    (tmp_path / "card.html").write_text('<div>{% include "title.html" %}</div>')
+    (tmp_path / "title.html").write_text("{{ product.name }}")
+    return tmp_path
+
+
+def _edit(path, text):
+    path.write_text(text)
+    stat = path.stat()
+    # Past the file system's timestamp resolution.
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_template_digest_covers_included_templates(settings, template_dir):
+    settings.DEBUG = True
+    digest = template_digest("card.html")
+    assert template_digest("card.html") == digest
+
+    _edit(template_dir / "title.html", "<b>{{ product.name }}</b>")
+    assert template_digest("card.html") != digest
+
+
+def test_template_digest_is_kept_without_debug(settings, template_dir):
+    settings.DEBUG = False
+    digest = template_digest("card.html")
+    _edit(template_dir / "title.html", "<b>{{ product.name }}</b>")
+    assert template_digest("card.html") == digest
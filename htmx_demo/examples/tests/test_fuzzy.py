@@ -0,0 +1,89 @@
+import time
+
+import pytest
+from django.urls import reverse
+
+from htmx_demo.examples import metrics
+from htmx_demo.examples.fuzzy import contact_name_index
+from htmx_demo.examples.fuzzy import damerau_levenshtein
+from htmx_demo.examples.fuzzy import max_edits
+from htmx_demo.examples.search import find_fuzzy_contacts
+from htmx_demo.examples.tests.factories import ContactFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    ("a", "b", "distance"),
+    [
+        ("john", "john", 0),
+        ("jonh", "john", 1),
+        ("deo", "doe", 1),
+        ("smith", "smyth", 1),
+        ("ca", "abc", 2),
+        ("", "ann", 3),
+    ],
+)
+def test_damerau_levenshtein(a, b, distance):
+    assert damerau_levenshtein(a, b) == distance
+    assert damerau_levenshtein(b, a) == distance
+
+
+def test_max_edits_depends_on_token_length(settings):
+    settings.EXAMPLES_FUZZY_MAX_EDITS = ((4, 1), (8, 2))
+    assert [max_edits(token) for token in ["ann", "anna", "christina"]] == [0, 1, 2]
+
+
+def test_find_fuzzy_contacts_tolerates_typos():
+    john = ContactFactory(first_name="John", last_name="Doe", company="")
+    jon = ContactFactory(first_name="Jon", last_name="Doe", company="")
+    exact_surname = ContactFactory(first_name="John", last_name="Deo", company="")
+    ContactFactory(first_name="Joan", last_name="Doe", company="")
+
+    rows = find_fuzzy_contacts("Jonh Deo")
+    assert [row["id"] for row in rows] == [exact_surname.pk, jon.pk, john.pk]
+    assert [row["distance"] for row in rows] == [1, 2, 2]
+    assert find_fuzzy_contacts("Xavier") == []
+
+
+def test_fuzzy_index_follows_committed_changes(
+    django_capture_on_commit_callbacks,
+    django_assert_num_queries,
+):
+    contact_name_index.rebuild()
+    with django_capture_on_commit_callbacks(execute=True):
+        contact = ContactFactory(first_name="Siobhan", last_name="Kelly", company="")
+    assert [row["id"] for row in find_fuzzy_contacts("shiobhan")] == [contact.pk]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        contact.first_name = "Aoife"
+        contact.save()
+    with django_assert_num_queries(0):
+        assert contact_name_index.lookup(["siobhan"], 10, time.monotonic() + 1) == []
+
+
+def test_fuzzy_lookup_stops_at_deadline():
+    for number in range(200):
+        ContactFactory(first_name=f"Name{number:03}", last_name="Park", company="")
+    contact_name_index.rebuild()
+
+    assert contact_name_index.lookup(["name050"], 10, time.monotonic() - 1) == []
+    assert metrics.snapshot()["contact_fuzzy.deadline_exceeded"] >= 1
+    assert contact_name_index.lookup(["name050"], 10, time.monotonic() + 5)
+
+
+def test_fuzzy_search_views(client):
+    ContactFactory(first_name="Margaret", last_name="Hamilton", company="")
+
+    response = client.get(
+        reverse("examples:contact_search_htmx"),
+        {"q": "margret hamiltn", "fuzzy": "1"},
+    )
+    assert "Margaret" in response.content.decode()
+
+    response = client.get(
+        reverse("examples:contact_search_ajax"),
+        {"q": "margret", "fuzzy": "1"},
+    )
+    assert response.json()["count"] == 1
+    assert response.json()["next_cursor"] is None
@@ -0,0 +1,84 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from htmx_demo.examples.geography import geography_tree
+from htmx_demo.examples.models import City
+from htmx_demo.examples.models import Country
+from htmx_demo.examples.models import State
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def geography():
+    country = Country.objects.create(name="Canada", code="CA")
+    ontario = State.objects.create(name="Ontario", code="ON", country=country)
+    quebec = State.objects.create(name="Quebec", code="QC", country=country)
+    City.objects.create(name="Toronto", state=ontario)
+    City.objects.create(name="Ottawa", state=ontario)
+    return country, ontario, quebec
+
+
+def test_dropdowns_are_looked_up_without_queries(client, geography):
+    country, ontario, quebec = geography
+    geography_tree()
+    with CaptureQueriesContext(connection) as captured:
+        states = client.get(
+            reverse("examples:states_htmx"),
+            {"country_id": country.pk},
+        )
+        cities = client.get(reverse("examples:cities_ajax"), {"state_id": ontario.pk})
+        unknown = client.get(reverse("examples:cities_htmx"), {"state_id": "nope"})
+    # Only the savepoints of ATOMIC_REQUESTS.
+    assert all("SAVEPOINT" in query["sql"] for query in captured.captured_queries)
+    content = states.content.decode()
+    assert content.index("Ontario") < content.index("Quebec")
+    assert f'<option value="{quebec.pk}">Quebec</option>' in content
+    assert json.loads(cities.content) == {
+        "cities": [
+            {"id": city.pk, "name": city.name}
+            for city in City.objects.filter(state=ontario)
+        ],
+    }
+    assert unknown.content.decode().strip() == '<option value="">Select a city</option>'
+
+
+def test_unchanged_tree_is_not_modified(client, geography):
+    country = geography[0]
+    url = reverse("examples:states_ajax")
+    response = client.get(url, {"country_id": country.pk})
+    assert "max-age=86400" in response["Cache-Control"]
+    assert "public" in response["Cache-Control"]
+    etag = response["ETag"]
+
+    response = client.get(url, {"country_id": country.pk}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert "max-age=86400" in response["Cache-Control"]
+
+
+def test_committed_changes_rebuild_the_tree(
+    client,
+    geography,
+    django_capture_on_commit_callbacks,
+):
+    country = geography[0]
+    url = reverse("examples:states_htmx")
+    etag = client.get(url, {"country_id": country.pk})["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        State.objects.create(name="Alberta", code="AB", country=country)
+    response = client.get(url, {"country_id": country.pk}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response["ETag"] != etag
+    assert "Alberta" in response.content.decode()
+
+
+def test_pages_version_the_dropdown_urls(client, geography):
+    version = geography_tree().version
+    response = client.get(reverse("examples:comparison_dependent_dropdowns"))
+    assert f"{reverse('examples:states_htmx')}?v={version}" in response.content.decode()
@@ -0,0 +1,113 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.urls import reverse
+
+from htmx_demo.examples import global_search as global_search_module
+from htmx_demo.examples.global_search import global_search
+from htmx_demo.examples.global_search import merged_hits
+from htmx_demo.examples.models import Location
+from htmx_demo.examples.models import Product
+from htmx_demo.examples.models import Task
+from htmx_demo.examples.tests.factories import ContactFactory
+
+pytestmark = pytest.mark.django_db
+
+TIMEOUT_MS = 500
+# How long a source takes; four of them in a row would take 0.8s.
+SOURCE_SECONDS = 0.2
+
+
+@pytest.fixture
+def pool(monkeypatch, settings):
+    settings.EXAMPLES_GLOBAL_SEARCH_TIMEOUT_MS = TIMEOUT_MS
+    executor = ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(global_search_module, "_executor", executor)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def _sleeping_source(seconds, title):
+    def search(query, limit):
+        time.sleep(seconds)
+        return [{"id": 1, "rank": 2, "title": title, "subtitle": "", "object": None}]
+
+    return search
+
+
+def test_sources_run_concurrently(pool, monkeypatch):
+    sources = tuple(
+        (name, name.title(), _sleeping_source(SOURCE_SECONDS, name))
+        for name in ["contacts", "products", "locations", "tasks"]
+    )
+    monkeypatch.setattr(global_search_module, "SOURCES", sources)
+
+    started = time.monotonic()
+    results = global_search("anything")
+    assert time.monotonic() - started < SOURCE_SECONDS * 3
+    assert [result.name for result in results] == [
+        "contacts",
+        "products",
+        "locations",
+        "tasks",
+    ]
+
+
+def test_slow_source_times_out_without_holding_up_others(pool, monkeypatch):
+    sources = (
+        ("contacts", "Contacts", _sleeping_source(0, "fast")),
+        ("products", "Products", _sleeping_source(1, "slow")),
+    )
+    monkeypatch.setattr(global_search_module, "SOURCES", sources)
+
+    started = time.monotonic()
+    results = global_search("anything")
+    assert time.monotonic() - started < TIMEOUT_MS / 1000 + SOURCE_SECONDS * 2
+    by_name = {result.name: result for result in results}
+    assert by_name["products"].timed_out
+    assert [hit["title"] for hit in by_name["contacts"].hits] == ["fast"]
+
+
+def test_global_search_merges_ranked_results():
+    ContactFactory(first_name="Lamp", last_name="Lighter", company="")
+    Product.objects.create(name="Lamp", description="Desk lamp", price="19.99")
+    Location.objects.create(
+        name="Lamplight Cafe",
+        latitude="40.0",
+        longitude="-74.0",
+    )
+    Task.objects.create(title="Buy a new lamp")
+
+    results = global_search("lamp")
+    assert [result.name for result in results] == [
+        "contacts",
+        "products",
+        "locations",
+        "tasks",
+    ]
+    assert [(hit["type"], hit["rank"]) for hit in merged_hits(results)] == [
+        ("contacts", 0),
+        ("products", 0),
+        ("locations", 1),
+        ("tasks", 2),
+    ]
+    assert global_search("zzz") == []
+
+
+def test_global_search_views(client):
+    Product.objects.create(name="Walnut Desk", description="Solid wood", price="300")
+    Task.objects.create(title="Assemble the desk")
+
+    response = client.get(reverse("examples:global_search_htmx"), {"q": "desk"})
+    content = response.content.decode()
+    assert "Walnut Desk" in content
+    assert "Assemble the desk" in content
+    assert content.index("Walnut Desk") < content.index("Assemble the desk")
+
+    data = client.get(reverse("examples:global_search_ajax"), {"q": "desk"}).json()
+    assert [hit["type"] for hit in data["results"]] == ["products", "tasks"]
+    assert data["timed_out"] == []
+
+    response = client.get(reverse("examples:global_search_htmx"), {"q": "nothing"})
+    assert 'Nothing found for "nothing"' in response.content.decode()
@@ -0,0 +1,161 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from htmx_demo.examples.models import Product
+from htmx_demo.examples.models import Task
+from htmx_demo.examples.pagination import KeysetPaginator
+from htmx_demo.examples.pagination import decode_cursor
+from htmx_demo.examples.pagination import encode_cursor
+from htmx_demo.examples.pagination import keyset_filter
+from htmx_demo.examples.products import PRODUCTS_PER_PAGE
+
+pytestmark = pytest.mark.django_db
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(1, 42, "café")
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 3) == (1, 42, "café")
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", encode_cursor(1), "bm90IGpzb24"])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError, match="Malformed cursor"):
+        decode_cursor(cursor, 2)
+
+
+def test_keyset_filter_continues_after_last_row():
+    tasks = [
+        Task.objects.create(title=title, completed=completed)
+        for title, completed in [("a", False), ("b", True), ("c", False), ("d", True)]
+    ]
+    ordering = ("completed", "-id")
+    ordered = list(Task.objects.order_by(*ordering))
+    assert ordered == [tasks[2], tasks[0], tasks[3], tasks[1]]
+
+    after = Task.objects.filter(keyset_filter(ordering, (False, tasks[0].pk))).order_by(
+        *ordering,
+    )
+    assert list(after) == [tasks[3], tasks[1]]
+
+
+def _products(count):
+    products = [
+        Product.objects.create(name=f"P{number}", description="", price="1")
+        for number in range(count)
+    ]
+    # Ties on created_at must be broken by id, not skipped or repeated.
+    Product.objects.update(created_at=timezone.now())
+    return products
+
+
+def test_keyset_paginator_walks_every_row_once(django_assert_num_queries):
+    products = _products(7)
+    paginator = KeysetPaginator(Product.objects.all(), ("-created_at", "-id"), 3)
+
+    seen = []
+    cursor = None
+    while True:
+        # One query per page, without COUNT(*) or OFFSET.
+        with django_assert_num_queries(1) as captured:
+            page = paginator.get_page(cursor)
+        sql = captured.captured_queries[0]["sql"]
+        assert "COUNT" not in sql
+        assert "OFFSET" not in sql
+        seen.extend(page)
+        if not page.has_next():
+            break
+        cursor = page.next_cursor
+    assert seen == products[::-1]
+
+
+def test_keyset_paginator_walks_back_from_a_row(django_assert_num_queries):
+    products = _products(7)
+    paginator = KeysetPaginator(Product.objects.all(), ("-created_at", "-id"), 3)
+
+    seen = []
+    cursor = paginator.cursor_for(Product.objects.get(pk=products[0].pk))
+    while True:
+        with django_assert_num_queries(1):
+            page = paginator.get_page_before(cursor)
+        seen[:0] = page
+        if not page.has_previous():
+            break
+        cursor = page.previous_cursor
+    # Every row before the oldest one, newest first as on the way down.
+    assert seen == products[:0:-1]
+    assert paginator.get_page(page.next_cursor).object_list == seen[3:6]
+
+
+def test_keyset_pages_link_both_ways():
+    _products(7)
+    paginator = KeysetPaginator(Product.objects.all(), ("-created_at", "-id"), 3)
+
+    first = paginator.get_page()
+    assert not first.has_previous()
+    second = paginator.get_page(first.next_cursor)
+    assert second.has_previous()
+    assert list(paginator.get_page_before(second.previous_cursor)) == list(first)
+    assert (
+        list(paginator.get_page_before(paginator.cursor_for(first.object_list[0])))
+        == []
+    )
+
+
+def test_keyset_paginator_rejects_bad_cursor():
+    paginator = KeysetPaginator(Product.objects.all(), ("-created_at", "-id"), 3)
+    with pytest.raises(ValueError, match="Malformed cursor"):
+        paginator.get_page(encode_cursor("yesterday", 1))
+    with pytest.raises(ValueError, match="Malformed cursor"):
+        paginator.get_page_before(encode_cursor("yesterday", 1))
+
+
+def test_product_views_page_by_cursor(client):
+    _products(PRODUCTS_PER_PAGE + 2)
+
+    data = client.get(reverse("examples:products_ajax")).json()
+    assert len(data["products"]) == PRODUCTS_PER_PAGE
+    assert data["has_next"]
+    assert "total_pages" not in data
+    data = client.get(
+        reverse("examples:products_ajax"),
+        {"cursor": data["next_cursor"]},
+    ).json()
+    assert [product["name"] for product in data["products"]] == ["P1", "P0"]
+    assert data["next_cursor"] is None
+
+    content = client.get(reverse("examples:products_htmx")).content.decode()
+    assert "?cursor=" in content
+    response = client.get(reverse("examples:products_htmx"), {"cursor": "!!!"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_product_views_page_around_a_product(client):
+    products = _products(25)
+    anchor = products[12]
+
+    data = client.get(reverse("examples:products_ajax"), {"after": anchor.pk}).json()
+    assert [p["id"] for p in data["products"]] == [p.pk for p in products[11:1:-1]]
+    assert data["has_previous"]
+    assert "total_count" not in data
+    data = client.get(reverse("examples:products_ajax"), {"before": anchor.pk}).json()
+    assert [p["id"] for p in data["products"]] == [p.pk for p in products[22:12:-1]]
+    assert data["has_previous"]
+
+    content = client.get(
+        reverse("examples:products_htmx"),
+        {"before": anchor.pk, "in_stock": "1"},
+    ).content.decode()
+    # Earlier pages are loaded above, so the sentinel leads the page.
+    assert content.index("?before=") < content.index("data-product-id")
+    assert "?cursor=" not in content
+    assert "&amp;in_stock=1" in content
+
+    response = client.get(reverse("examples:products_ajax"), {"after": "0"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "Unknown product" in response.json()["error"]
+    response = client.get(reverse("examples:products_htmx"), {"before": "x"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.urls import reverse
+
+from htmx_demo.examples import metrics
+from htmx_demo.examples import products as products_module
+from htmx_demo.examples.models import Product
+from htmx_demo.examples.products import cached_product_page
+from htmx_demo.examples.products import prefetch_product_page
+from htmx_demo.examples.products import product_page
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.reset()
+
+
+def _products(count):
+    for number in range(count):
+        Product.objects.create(name=f"P{number}", description="", price="1")
+
+
+def test_next_page_is_served_from_prefetch(client):
+    _products(25)
+    url = reverse("examples:products_htmx")
+
+    client.get(url)
+    second_cursor = product_page().next_cursor
+    assert metrics.snapshot()["product_prefetch.rendered"] == 1
+
+    metrics.reset()
+    content = client.get(url, {"cursor": second_cursor}).content.decode()
+    assert "P14" in content
+    assert "P15" not in content
+    counters = metrics.snapshot()
+    assert counters["product_prefetch.hit"] == 1
+    assert "product_prefetch.miss" not in counters
+    # Serving page two prefetched page three in turn.
+    assert counters["product_prefetch.rendered"] == 1
+
+
+def test_product_change_invalidates_prefetched_pages(
+    client,
+    django_capture_on_commit_callbacks,
+):
+    _products(15)
+    client.get(reverse("examples:products_htmx"))
+    cursor = product_page().next_cursor
+    assert cached_product_page(cursor) is not None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Product.objects.create(name="New", description="", price="1")
+    assert cached_product_page(cursor) is None
+
+
+def test_expired_unused_prefetch_counts_as_wasted(client, settings):
+    settings.EXAMPLES_PRODUCT_PREFETCH_TTL = 0
+    _products(15)
+    url = reverse("examples:products_htmx")
+
+    client.get(url)
+    client.get(url)
+    assert metrics.snapshot()["product_prefetch.wasted"] == 1
+
+
+def test_prefetch_skips_when_workers_are_busy(monkeypatch):
+    release = threading.Event()
+
+    def slow_render(cursor, filters):
+        release.wait(5)
+        return "", None
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(products_module, "_executor", executor)
+    monkeypatch.setattr(products_module, "_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(products_module, "render_product_page", slow_render)
+    try:
+        started = time.monotonic()
+        prefetch_product_page("first")
+        prefetch_product_page("second")
+        assert time.monotonic() - started < 1
+        assert metrics.snapshot()["product_prefetch.skipped"] == 1
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+    assert metrics.snapshot()["product_prefetch.rendered"] == 1
@@ -0,0 +1,65 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from htmx_demo.examples.models import Product
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def products():
+    return [
+        Product.objects.create(name=name, description="", price="5")
+        for name in ["Lamp", "Desk", "Chair"]
+    ]
+
+
+def _statements(captured):
+    # Requests are atomic, which adds savepoints inside the test transaction.
+    return [
+        query["sql"]
+        for query in captured.captured_queries
+        if "SAVEPOINT" not in query["sql"]
+    ]
+
+
+def test_batch_ajax_returns_details_keyed_by_id(client, products):
+    lamp, _, chair = products
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(
+            reverse("examples:product_batch_ajax"),
+            {"ids": f"{chair.pk},{lamp.pk},{chair.pk},999999"},
+        )
+    assert len(_statements(captured)) == 1
+    data = response.json()["products"]
+    assert list(data) == [str(chair.pk), str(lamp.pk)]
+    assert data[str(lamp.pk)]["name"] == "Lamp"
+
+
+def test_batch_htmx_returns_modal_templates(
+    client,
+    products,
+    django_assert_num_queries,
+):
+    ids = ",".join(str(product.pk) for product in products)
+    url = reverse("examples:product_batch_htmx")
+    client.get(url, {"ids": ids})
+
+    # Modals rendered before come from the fragment cache.
+    with CaptureQueriesContext(connection) as captured:
+        content = client.get(url, {"ids": ids}).content.decode()
+    assert len(_statements(captured)) == 1
+    assert content.count("<template data-product-id=") == len(products)
+    assert f'<template data-product-id="{products[1].pk}">' in content
+    assert content.index("Lamp") < content.index("Desk") < content.index("Chair")
+
+
+@pytest.mark.parametrize("ids", ["", "1,x", ",".join(str(n) for n in range(51))])
+def test_batch_endpoints_reject_bad_ids(client, ids):
+    for name in ["product_batch_ajax", "product_batch_htmx"]:
+        response = client.get(reverse(f"examples:{name}"), {"ids": ids})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from htmx_demo.examples.models import Product
+from htmx_demo.examples.pagination import keyset_filter
+from htmx_demo.examples.products import PRODUCT_ORDERING
+from htmx_demo.examples.products import filtered_products
+
+pytestmark = pytest.mark.django_db
+
+
+def _product(name, category, *, in_stock=True):
+    return Product.objects.create(
+        name=name,
+        description="",
+        price="1",
+        category=category,
+        in_stock=in_stock,
+    )
+
+
+def test_product_views_filter_by_category_and_stock(client):
+    books = 12
+    for number in range(books):
+        _product(f"Book {number}", "books")
+    _product("Sold out book", "books", in_stock=False)
+    _product("Lamp", "home")
+
+    data = client.get(
+        reverse("examples:products_ajax"),
+        {"category": "books", "in_stock": "1"},
+    ).json()
+    assert data["total_count"] == books
+    assert all(product["category"] == "Books" for product in data["products"])
+    data = client.get(
+        reverse("examples:products_ajax"),
+        {"category": "books", "in_stock": "1", "cursor": data["next_cursor"]},
+    ).json()
+    assert [product["name"] for product in data["products"]] == ["Book 1", "Book 0"]
+
+    content = client.get(
+        reverse("examples:products_htmx"),
+        {"category": "books", "in_stock": "0"},
+    ).content.decode()
+    assert "Sold out book" in content
+    assert "Lamp" not in content
+
+    content = client.get(
+        reverse("examples:products_htmx"),
+        {"category": "books"},
+    ).content.decode()
+    # The sentinel keeps the filter for the next page.
+    assert "&amp;category=books" in content
+
+
+@pytest.mark.parametrize(
+    ("params", "error"),
+    [({"category": "toys"}, "Unknown category"), ({"in_stock": "yes"}, "in_stock")],
+)
+def test_product_views_reject_bad_filters(client, params, error):
+    response = client.get(reverse("examples:products_ajax"), params)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert error in response.json()["error"]
+    response = client.get(reverse("examples:products_htmx"), params)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+# Out of stock products are rare, which is where the stock indexes pay off; for
+# in stock ones the recent index with a filter is the better plan.
+@pytest.mark.parametrize(
+    ("filters", "index"),
+    [
+        ({}, "examples_product_recent_idx"),
+        ({"category": "books"}, "examples_product_cat_idx"),
+        ({"in_stock": "0"}, "examples_product_stock_idx"),
+        ({"category": "books", "in_stock": "0"}, "examples_product_cat_stock_idx"),
+    ],
+)
+@pytest.mark.parametrize("seek", [None, "after", "before"])
+def test_filtered_scroll_walks_an_index_without_sorting(filters, index, seek):
+    if connection.vendor != "postgresql":
+        pytest.skip("Query plans are checked on PostgreSQL")
+    # Enough rows, mostly in stock, for the planner to tell the indexes apart.
+    first, *_ = Product.objects.bulk_create(
+        Product(
+            name=f"P{number}",
+            description="",
+            price="1",
+            category=("books", "home", "sports")[number % 3],
+            in_stock=number % 50 != 0,
+        )
+        for number in range(3000)
+    )
+    last = _product("Lamp", "books")
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE examples_product")
+    ordering = PRODUCT_ORDERING
+    anchor = last
+    if seek == "before":
+        # Pages before a product read the same index backwards.
+        ordering = ("created_at", "id")
+        anchor = first
+    products = filtered_products(filters).order_by(*ordering)
+    if seek:
+        values = (anchor.created_at.isoformat(), anchor.pk)
+        products = products.filter(keyset_filter(ordering, values))
+
+    plan = products[:11].explain()
+    assert index in plan
+    assert "Sort" not in plan
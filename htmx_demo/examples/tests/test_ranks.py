@@ -0,0 +1,52 @@
+import pytest
+
+from htmx_demo.examples.ranks import rank_between
+from htmx_demo.examples.ranks import spaced_ranks
+
+
+def test_rank_between_sorts_strictly_between():
+    ranks = []
+    for step in range(2000):
+        # Prepends, appends, inserts into one ever narrower gap in the
+        # middle and inserts scattered over the list.
+        count = len(ranks)
+        position = [0, count, count // 2, step * 7919 % (count + 1)][step % 4]
+        before = ranks[position - 1] if position else None
+        after = ranks[position] if position < len(ranks) else None
+        rank = rank_between(before, after)
+        assert before is None or before < rank
+        assert after is None or rank < after
+        assert not rank.endswith("0")
+        ranks.insert(position, rank)
+
+
+@pytest.mark.parametrize(
+    ("before", "after", "rank"),
+    [
+        (None, None, "i"),
+        (None, "i", "hzz"),
+        (None, "0001", "0000z"),
+        ("a", "a5", "a2"),
+        ("a", "a1", "a0i"),
+        ("z", None, "z01"),
+        ("zzz", None, "zzz1"),
+    ],
+)
+def test_rank_between_examples(before, after, rank):
+    assert rank_between(before, after) == rank
+
+
+@pytest.mark.parametrize(("before", "after"), [("b", "a"), ("a", "a"), (None, "")])
+def test_rank_between_rejects_bounds_out_of_order(before, after):
+    with pytest.raises(ValueError, match="No rank between"):
+        rank_between(before, after)
+
+
+def test_spaced_ranks_are_short_and_ascending():
+    ranks = spaced_ranks(1000)
+    assert ranks == sorted(set(ranks))
+    assert {len(rank) for rank in ranks} == {3, 4}
+    # The first and last thirds of the key space are left free.
+    assert "c" < ranks[0] < ranks[-1] < "o"
+    assert not any(rank.endswith("0") for rank in ranks)
+    assert spaced_ranks(0) == []
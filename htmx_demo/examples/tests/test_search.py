@@ -0,0 +1,222 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from htmx_demo.examples.models import Contact
+from htmx_demo.examples.pagination import encode_cursor
+from htmx_demo.examples.search import SEARCH_PAGE_SIZE
+from htmx_demo.examples.search import contact_search_document
+from htmx_demo.examples.search import contact_search_page
+from htmx_demo.examples.search import find_contacts
+from htmx_demo.examples.search import search_contacts
+from htmx_demo.examples.tests.factories import ContactFactory
+from htmx_demo.examples.text import normalize_search_text
+
+pytestmark = pytest.mark.django_db
+
+
+def test_normalize_search_text_folds_case_and_accents():
+    assert normalize_search_text("  Zoë  ÅNGSTRÖM ") == "zoe angstrom"
+    assert normalize_search_text("STRASSE") == normalize_search_text("straße")
+
+
+def test_contact_search_document_keeps_fields_apart():
+    contact = Contact(
+        first_name="José",
+        last_name="Núñez",
+        email="JN@Example.com",
+        company="",
+    )
+    assert contact_search_document(contact) == "\njose\nnunez\njn@example.com\n\n"
+
+
+def test_search_text_follows_saves():
+    contact = ContactFactory(first_name="Renée", last_name="Park", company="Acme")
+    assert list(search_contacts("renee")) == [contact]
+
+    contact.first_name = "Irene"
+    contact.save()
+    assert list(search_contacts("renee")) == []
+    assert list(search_contacts("IRÈNE")) == [contact]
+
+
+def test_search_matches_substrings_of_any_field():
+    jane = ContactFactory(
+        first_name="Jane",
+        last_name="Smith",
+        email="jane@globex.com",
+        company="",
+    )
+    ContactFactory(
+        first_name="Bob",
+        last_name="Jones",
+        email="bob@initech.com",
+        company="Initech",
+    )
+
+    assert list(search_contacts("mit")) == [jane]
+    assert list(search_contacts("globex")) == [jane]
+    assert list(search_contacts("e s")) == []
+
+
+def test_search_text_is_filled_for_fixtures():
+    call_command("loaddata", "sample_data", verbosity=0)
+    assert not Contact.objects.filter(search_text="").exists()
+
+
+def test_contact_search_views_use_index(client):
+    ContactFactory(
+        first_name="Åsa",
+        last_name="Berg",
+        email="asa@example.com",
+        company="",
+    )
+
+    response = client.get(reverse("examples:contact_search_htmx"), {"q": "asa"})
+    assert "Åsa" in response.content.decode()
+
+    response = client.get(reverse("examples:contact_search_ajax"), {"q": "BERG"})
+    assert response.json()["count"] == 1
+
+
+def test_find_contacts_refines_cached_complete_results(django_assert_num_queries):
+    john = ContactFactory(first_name="John", last_name="Doe", company="")
+    ContactFactory(first_name="Joan", last_name="Roe", company="")
+
+    assert [row["id"] for row in find_contacts("jo")] == [
+        row["id"] for row in find_contacts("JO")
+    ]
+    with django_assert_num_queries(0):
+        assert [row["first_name"] for row in find_contacts("joh")] == ["John"]
+
+    assert [row["id"] for row in find_contacts("john d")] == []
+    assert [row["id"] for row in find_contacts("john")] == [john.pk]
+    with django_assert_num_queries(0):
+        assert [row["id"] for row in find_contacts("johnn")] == []
+
+
+def test_find_contacts_does_not_refine_truncated_results():
+    for _ in range(3):
+        ContactFactory(first_name="Sam", last_name="Park", company="")
+    ContactFactory(first_name="Sue", last_name="Park", company="")
+
+    limit = 2
+    assert len(find_contacts("s", limit=limit)) == limit
+    assert [row["first_name"] for row in find_contacts("su", limit=limit)] == ["Sue"]
+
+
+def test_find_contacts_cache_follows_contacts_generation(
+    django_capture_on_commit_callbacks,
+):
+    assert find_contacts("ada") == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        contact = ContactFactory(first_name="Ada", last_name="Park", company="")
+    assert [row["id"] for row in find_contacts("ada")] == [contact.pk]
+
+
+def test_find_contacts_ranks_exact_then_prefix_then_substring():
+    substring = ContactFactory(
+        first_name="Joanna",
+        last_name="Lee",
+        email="jl@example.com",
+        company="",
+    )
+    prefix = ContactFactory(
+        first_name="Annabel",
+        last_name="Ng",
+        email="an@example.com",
+        company="",
+    )
+    exact = ContactFactory(
+        first_name="Kim",
+        last_name="Park",
+        email="anna@example.com",
+        company="",
+    )
+
+    rows = find_contacts("anna")
+    assert [row["id"] for row in rows] == [exact.pk, prefix.pk, substring.pk]
+    assert [row["rank"] for row in rows] == [0, 1, 2]
+
+    # Short queries rank the same way.
+    ann = ContactFactory(
+        first_name="Ann",
+        last_name="Ross",
+        email="ar@example.com",
+        company="",
+    )
+    assert [row["id"] for row in find_contacts("ann")] == [
+        ann.pk,
+        exact.pk,
+        prefix.pk,
+        substring.pk,
+    ]
+
+
+def _walk_pages(query, per_page):
+    seen = []
+    after = None
+    while True:
+        rows, next_cursor = contact_search_page(query, after=after, per_page=per_page)
+        seen.extend(row["id"] for row in rows)
+        if next_cursor is None:
+            return seen
+        after = (rows[-1]["rank"], rows[-1]["id"])
+
+
+def test_contact_search_page_walks_every_match_once():
+    mo, moe, mona, mo_again, amos = (
+        ContactFactory(first_name=name, last_name="Park", company="")
+        for name in ["Mo", "Moe", "Mona", "Mo", "Amos"]
+    )
+
+    assert _walk_pages("mo", per_page=2) == [
+        mo_again.pk,
+        mo.pk,
+        mona.pk,
+        moe.pk,
+        amos.pk,
+    ]
+    assert _walk_pages("amos", per_page=1) == [amos.pk]
+    assert _walk_pages("", per_page=3) == [amos.pk, mo_again.pk, mona.pk, moe.pk, mo.pk]
+
+
+def test_contact_search_htmx_loads_more_when_revealed(client):
+    remaining = 5
+    for number in range(SEARCH_PAGE_SIZE + remaining):
+        ContactFactory(first_name=f"Zed{number}", last_name="Park", company="")
+
+    url = reverse("examples:contact_search_htmx")
+    first = client.get(url, {"q": "zed"}).content.decode()
+    assert first.count("contact-item") == SEARCH_PAGE_SIZE
+    assert 'hx-trigger="revealed"' in first
+    cursor = first.split("cursor=")[1].split('"')[0]
+
+    second = client.get(url, {"q": "zed", "cursor": cursor}).content.decode()
+    assert second.count("contact-item") == remaining
+    assert 'hx-trigger="revealed"' not in second
+    assert "No contacts found" not in second
+
+    response = client.get(url, {"q": "zed", "cursor": "not-a-cursor"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_contact_search_ajax_returns_next_cursor(client):
+    for number in range(SEARCH_PAGE_SIZE + 1):
+        ContactFactory(first_name=f"Quin{number}", last_name="Park", company="")
+
+    url = reverse("examples:contact_search_ajax")
+    data = client.get(url, {"q": "quinn"}).json()
+    assert data["next_cursor"] is None
+
+    data = client.get(url, {"q": "quin"}).json()
+    assert data["count"] == SEARCH_PAGE_SIZE
+    data = client.get(url, {"q": "quin", "cursor": data["next_cursor"]}).json()
+    assert data["count"] == 1
+    assert data["next_cursor"] is None
+
+    response = client.get(url, {"q": "quin", "cursor": encode_cursor("a", 1)})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from htmx_demo.examples.singleflight import coalesce_requests
+
+
+def test_concurrent_sync_requests_share_one_render(rf: RequestFactory):
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    @coalesce_requests
+    def view(request):
+        calls.append(request.GET["q"])
+        started.set()
+        release.wait(5)
+        return HttpResponse("shared", headers={"X-Rendered": "once"})
+
+    responses = []
+    threads = [
+        threading.Thread(
+            target=lambda q=q: responses.append(view(rf.get("/", {"q": q}))),
+        )
+        for q in ("term", "term")
+    ]
+    threads[0].start()
+    started.wait(5)
+    threads[1].start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["term"]
+    assert [(r.content, r["X-Rendered"]) for r in responses] == [
+        (b"shared", "once"),
+    ] * 2
+
+
+def test_sync_requests_with_different_params_are_not_coalesced(rf: RequestFactory):
+    calls = []
+
+    @coalesce_requests
+    def view(request):
+        calls.append(request.GET["q"])
+        return HttpResponse(request.GET["q"])
+
+    assert view(rf.get("/", {"q": "a"})).content == b"a"
+    assert view(rf.get("/", {"q": "b"})).content == b"b"
+    # Views decide themselves whether surrounding spaces matter.
+    assert view(rf.get("/", {"q": "b "})).content == b"b "
+    assert calls == ["a", "b", "b "]
+
+
+def test_async_waiters_share_one_task(rf: RequestFactory):
+    calls = []
+
+    @coalesce_requests
+    async def view(request):
+        calls.append(request.path)
+        await asyncio.sleep(0.01)
+        return HttpResponse("ok")
+
+    async def main():
+        leaving = asyncio.ensure_future(view(rf.get("/status/")))
+        staying = asyncio.ensure_future(view(rf.get("/status/")))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        return await staying
+
+    assert asyncio.run(main()).content == b"ok"
+    assert calls == ["/status/"]
+
+
+def test_async_task_is_cancelled_once_every_waiter_leaves(rf: RequestFactory):
+    cancelled = []
+
+    @coalesce_requests
+    async def view(request):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return HttpResponse("too late")
+
+    async def main():
+        waiters = [asyncio.ensure_future(view(rf.get("/search/"))) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [True]
+
+
+def _run_concurrently(view, requests, started):
+    # Starts the first request, and the others once it is rendering.
+    responses = [None] * len(requests)
+
+    def run(index):
+        responses[index] = view(requests[index])
+
+    threads = [threading.Thread(target=run, args=[i]) for i in range(len(requests))]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    return threads, responses
+
+
+def test_followers_stop_waiting_for_a_stuck_leader(rf: RequestFactory, settings):
+    settings.EXAMPLES_COALESCE_WAIT_SECONDS = 0.05
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    @coalesce_requests
+    def view(request):
+        calls.append(request)
+        number = len(calls)
+        started.set()
+        if number == 1:
+            release.wait(5)
+        return HttpResponse(str(number))
+
+    threads, responses = _run_concurrently(view, [rf.get("/")] * 2, started)
+    threads[1].join(5)
+    # Rendered its own response without waiting for the leader.
+    assert responses[1].content == b"2"
+    release.set()
+    threads[0].join(5)
+    assert responses[0].content == b"1"
+
+
+def test_responses_setting_cookies_are_not_shared(rf: RequestFactory):
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    @coalesce_requests
+    def view(request):
+        calls.append(request)
+        started.set()
+        release.wait(5)
+        response = HttpResponse("mine")
+        response.set_cookie("owner", str(len(calls)))
+        return response
+
+    threads, responses = _run_concurrently(view, [rf.get("/")] * 2, started)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert sorted(r.cookies["owner"].value for r in responses) == ["1", "2"]
+
+
+def test_request_after_all_waiters_left_starts_a_new_flight(rf: RequestFactory):
+    calls = []
+
+    started = asyncio.Event()
+
+    @coalesce_requests
+    async def view(request):
+        calls.append(request.path)
+        started.set()
+        await asyncio.sleep(0.01)
+        return HttpResponse(str(len(calls)))
+
+    async def main():
+        abandoned = asyncio.ensure_future(view(rf.get("/status/")))
+        await started.wait()
+        abandoned.cancel()
+        await asyncio.sleep(0)
+        # Arrives before the cancelled flight has finished unwinding.
+        return await view(rf.get("/status/"))
+
+    assert asyncio.run(main()).content == b"2"
+    assert calls == ["/status/"] * 2
@@ -0,0 +1,412 @@
+import re
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from htmx_demo.examples import metrics
+from htmx_demo.examples.models import Task
+from htmx_demo.examples.pagination import encode_cursor
+from htmx_demo.examples.pagination import keyset_filter
+from htmx_demo.examples.ranks import STEP_WIDTH
+from htmx_demo.examples.ranks import spaced_ranks
+from htmx_demo.examples.tasks import TASK_ORDERING
+from htmx_demo.examples.tasks import create_task
+from htmx_demo.examples.tasks import move_task
+from htmx_demo.examples.tasks import task_page
+from htmx_demo.examples.tasks import task_stats
+from htmx_demo.examples.tasks import toggle_task
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tasks():
+    return [
+        Task.objects.create(title="Write", completed=completed)
+        for completed in [False, True, False]
+    ]
+
+
+def _statements(captured):
+    # Requests are atomic, which adds savepoints inside the test transaction.
+    return [
+        query["sql"]
+        for query in captured.captured_queries
+        if "SAVEPOINT" not in query["sql"]
+    ]
+
+
+def test_toggle_completion_updates_and_returns_rows_in_one_statement(tasks):
+    open_task, done, _ = tasks
+    with CaptureQueriesContext(connection) as captured:
+        toggled = Task.objects.filter(pk__lte=done.pk).toggle_completion()
+    assert len(captured.captured_queries) == 1
+    assert "RETURNING" in captured.captured_queries[0]["sql"]
+    toggled = {task.pk: task for task in toggled}
+    assert toggled[open_task.pk].completed
+    assert toggled[open_task.pk].completed_at is not None
+    assert toggled[open_task.pk].title == "Write"
+    assert not toggled[done.pk].completed
+    assert toggled[done.pk].completed_at is None
+
+
+def test_toggles_from_stale_copies_do_not_undo_each_other(tasks):
+    task = tasks[0]
+    stale = Task.objects.get(pk=task.pk)
+    task.toggle_complete()
+    stale.toggle_complete()
+    # Both flips applied, not the same flip twice.
+    assert not Task.objects.get(pk=task.pk).completed
+    assert not stale.completed
+
+
+@pytest.mark.parametrize("name", ["task_toggle_ajax", "task_toggle_htmx"])
+def test_toggle_views_use_one_statement(client, tasks, name):
+    task = tasks[0]
+    with CaptureQueriesContext(connection) as captured:
+        response = client.post(reverse(f"examples:{name}", args=[task.pk]))
+    assert response.status_code == HTTPStatus.OK
+    statements = _statements(captured)
+    assert statements[0].startswith("UPDATE")
+    # The HTMX response also carries the task counts, which take one query.
+    assert len(statements) == (2 if name == "task_toggle_htmx" else 1)
+    task.refresh_from_db()
+    assert task.completed
+
+    response = client.post(reverse(f"examples:{name}", args=[999999]))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_task_pages_list_open_tasks_first(monkeypatch):
+    per_page = 3
+    monkeypatch.setattr("htmx_demo.examples.tasks.TASKS_PER_PAGE", per_page)
+    created = [
+        Task.objects.create(title=f"T{number}", completed=number % 3 == 0)
+        for number in range(8)
+    ]
+    open_ids = [task.pk for task in reversed(created) if not task.completed]
+    done_ids = [task.pk for task in reversed(created) if task.completed]
+
+    seen = []
+    cursor = None
+    while True:
+        page = task_page(cursor)
+        assert len(page) <= per_page
+        seen.extend(task.pk for task in page)
+        if not page.has_next():
+            break
+        cursor = page.next_cursor
+    assert seen == open_ids + done_ids
+
+
+def test_task_page_rejects_bad_cursor():
+    with pytest.raises(ValueError, match="Malformed cursor"):
+        task_page(encode_cursor("yes", ""))
+    with pytest.raises(ValueError, match="Malformed cursor"):
+        task_page(encode_cursor(False, "!!!"))  # noqa: FBT003
+
+
+@pytest.mark.parametrize(
+    ("completed", "index"),
+    [
+        (False, "examples_task_open_idx"),
+        (True, "examples_task_done_idx"),
+    ],
+)
+def test_task_pages_use_partial_indexes(completed, index):
+    if connection.vendor != "postgresql":
+        pytest.skip("Query plans are checked on PostgreSQL")
+    first, *_ = Task.objects.bulk_create(
+        Task(title=f"T{number}", completed=number % 2 == 0, order=rank)
+        for number, rank in enumerate(spaced_ranks(3000))
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE examples_task")
+    tasks = Task.objects.filter(completed=completed).order_by(*TASK_ORDERING)
+    values = (first.order, first.pk)
+    tasks = tasks.filter(keyset_filter(TASK_ORDERING, values))
+
+    plan = tasks[:21].explain()
+    assert index in plan
+    assert "Sort" not in plan
+
+
+def test_task_list_views_page_by_cursor(client, monkeypatch):
+    per_page = 2
+    monkeypatch.setattr("htmx_demo.examples.tasks.TASKS_PER_PAGE", per_page)
+    for completed in [True, False, False]:
+        Task.objects.create(title="Write", completed=completed)
+
+    data = client.get(reverse("examples:tasks_ajax")).json()
+    assert [task["completed"] for task in data["tasks"]] == [False, False]
+    data = client.get(
+        reverse("examples:tasks_ajax"),
+        {"cursor": data["next_cursor"]},
+    ).json()
+    assert [task["completed"] for task in data["tasks"]] == [True]
+    assert not data["has_next"]
+
+    content = client.get(reverse("examples:tasks_htmx")).content.decode()
+    assert content.count('class="task-item') == per_page
+    assert "?cursor=" in content
+    response = client.get(reverse("examples:tasks_htmx"), {"cursor": "!!!"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def _listed():
+    return list(Task.objects.order_by(*TASK_ORDERING).values_list("title", flat=True))
+
+
+def test_new_tasks_go_to_the_top():
+    for title in ["A", "B", "C"]:
+        Task.objects.create(title=title)
+    assert _listed() == ["C", "B", "A"]
+
+
+def test_inserts_at_the_top_keep_ranks_short(django_capture_on_commit_callbacks):
+    metrics.reset()
+    Task.objects.bulk_create(
+        Task(title="Old", order=rank) for rank in spaced_ranks(1000)
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        for number in range(300):
+            create_task(f"New {number}")
+    ranks = Task.objects.values_list("order", flat=True)
+    assert max(map(len, ranks)) <= STEP_WIDTH + 1
+    assert "task_order.rebalanced" not in metrics.snapshot()
+    assert _listed()[:2] == ["New 299", "New 298"]
+
+
+@pytest.mark.parametrize(
+    ("after", "before", "listed"),
+    [
+        ("B", "A", ["B", "C", "A"]),
+        ("A", None, ["B", "A", "C"]),
+        (None, "B", ["C", "B", "A"]),
+        ("B", None, ["B", "C", "A"]),
+    ],
+)
+def test_move_task_updates_one_row(after, before, listed):
+    tasks = {title: Task.objects.create(title=title) for title in ["A", "B", "C"]}
+    # Listed C, B, A; C is moved.
+    moved = tasks["C"]
+    with CaptureQueriesContext(connection) as captured:
+        move_task(
+            moved.pk,
+            after_id=tasks[after].pk if after else None,
+            before_id=tasks[before].pk if before else None,
+        )
+    updates = [
+        query["sql"]
+        for query in captured.captured_queries
+        if query["sql"].startswith("UPDATE")
+    ]
+    assert len(updates) == 1
+    assert _listed() == listed
+
+
+def test_move_task_rejects_neighbours_out_of_order():
+    a, b, c = (Task.objects.create(title=title) for title in ["A", "B", "C"])
+    with pytest.raises(ValueError, match="Cannot place"):
+        move_task(c.pk, after_id=a.pk, before_id=b.pk)
+    with pytest.raises(ValueError, match="Unknown"):
+        move_task(c.pk, after_id=999999)
+    with pytest.raises(ValueError, match="Pass another task"):
+        move_task(c.pk)
+    assert move_task(999999, after_id=a.pk) is None
+
+
+def test_unranked_tasks_are_ranked_before_placing_one():
+    # As loaded by a fixture without ranks, listed A, B, C.
+    a, b, c = Task.objects.bulk_create(
+        Task(title=title, order="") for title in ["A", "B", "C"]
+    )
+    move_task(c.pk, after_id=a.pk)
+    assert _listed() == ["A", "C", "B"]
+
+    Task.objects.filter(pk__in=[a.pk, b.pk]).update(order="")
+    create_task("New")
+    assert _listed()[0] == "New"
+    assert "" not in Task.objects.values_list("order", flat=True)
+
+
+def test_long_ranks_trigger_a_rebalance(
+    settings,
+    django_capture_on_commit_callbacks,
+):
+    settings.EXAMPLES_TASK_ORDER_MAX_LENGTH = 4
+    a, b, c = Task.objects.bulk_create(
+        Task(title=title, order=rank)
+        for title, rank in [("A", "0000001"), ("B", "0000002"), ("C", "0000003")]
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        move_task(c.pk, after_id=a.pk, before_id=b.pk)
+    assert _listed() == ["A", "C", "B"]
+    ranks = Task.objects.values_list("order", flat=True)
+    assert max(map(len, ranks)) == 1
+
+
+@pytest.mark.parametrize("name", ["task_move_ajax", "task_move_htmx"])
+def test_move_views(client, name):
+    a, b, c = (Task.objects.create(title=title) for title in ["A", "B", "C"])
+    url = reverse(f"examples:{name}", args=[c.pk])
+    response = client.post(url, {"after": b.pk, "before": a.pk})
+    assert response.status_code in (200, 204)
+    assert _listed() == ["B", "C", "A"]
+
+    response = client.post(url, {"after": "x"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    response = client.post(reverse(f"examples:{name}", args=[999999]), {"after": a.pk})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_bulk_toggle_flips_each_task_in_one_update(client, tasks):
+    open_task, done, _ = tasks
+    with CaptureQueriesContext(connection) as captured:
+        response = client.post(
+            reverse("examples:task_bulk_ajax"),
+            {"action": "toggle", "task_ids": [open_task.pk, done.pk, 999999]},
+        )
+    statements = _statements(captured)
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE")
+    data = response.json()
+    assert {task["id"]: task["completed"] for task in data["tasks"]} == {
+        open_task.pk: True,
+        done.pk: False,
+    }
+    assert data["deleted"] == []
+    open_task.refresh_from_db()
+    done.refresh_from_db()
+    assert open_task.completed_at is not None
+    assert done.completed_at is None
+
+
+@pytest.mark.parametrize(
+    ("action", "remaining"),
+    [("delete", [2]), ("clear_completed", [0, 2])],
+)
+def test_bulk_delete_runs_one_delete(client, tasks, action, remaining):
+    selected = [task.pk for task in tasks[:2]]
+    with CaptureQueriesContext(connection) as captured:
+        response = client.post(
+            reverse("examples:task_bulk_ajax"),
+            {"action": action, "task_ids": selected},
+        )
+    statements = _statements(captured)
+    assert len(statements) == 1
+    assert statements[0].startswith("DELETE")
+    kept = [tasks[index].pk for index in remaining]
+    assert response.json()["deleted"] == sorted(set(selected) - set(kept))
+    assert sorted(Task.objects.values_list("pk", flat=True)) == kept
+
+
+def test_bulk_htmx_swaps_every_task_out_of_band(client, tasks):
+    open_task, done, _ = tasks
+    response = client.post(
+        reverse("examples:task_bulk_htmx"),
+        {"action": "toggle", "task_ids": [open_task.pk, done.pk]},
+    )
+    content = response.content.decode()
+    assert re.findall(r'id="([\w-]+)"[^>]* hx-swap-oob="true"', content) == [
+        f"task-{open_task.pk}",
+        f"task-{done.pk}",
+        "task-stats",
+    ]
+
+    response = client.post(
+        reverse("examples:task_bulk_htmx"),
+        {"action": "clear_completed", "task_ids": [task.pk for task in tasks]},
+    )
+    assert response.content.decode().startswith(
+        f'<div id="task-{open_task.pk}" hx-swap-oob="delete"></div>',
+    )
+
+
+def test_bulk_actions_submit_only_selected_tasks(client, tasks):
+    content = client.get(reverse("examples:tasks_htmx")).content.decode()
+    # Checkboxes: the bulk form includes the checked ones only.
+    assert 'type="hidden" name="task_ids"' not in content
+    selectable = re.findall(
+        r'<input type="checkbox"\s+class="[^"]*task-select"\s+'
+        r'name="task_ids"\s+value="(\d+)"',
+        content,
+    )
+    assert sorted(map(int, selectable)) == sorted(task.pk for task in tasks)
+    page = client.get(reverse("examples:comparison_dynamic_lists")).content.decode()
+    assert 'hx-include="#htmx-task-list .task-select"' in page
+
+
+@pytest.mark.parametrize(
+    ("data", "error"),
+    [
+        ({"action": "archive", "task_ids": ["1"]}, "Unknown action"),
+        ({"action": "delete", "task_ids": ["one"]}, "must be integers"),
+        ({"action": "delete"}, "Pass between 1 and"),
+    ],
+)
+def test_bulk_rejects_bad_requests(client, data, error):
+    response = client.post(reverse("examples:task_bulk_ajax"), data)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert error in response.json()["error"]
+    response = client.post(reverse("examples:task_bulk_htmx"), data)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_task_stats_count_in_one_cached_query(
+    tasks,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    Task.objects.filter(pk=tasks[1].pk).update(completed_at=timezone.now())
+    Task.objects.create(
+        title="Yesterday",
+        completed=True,
+        completed_at=timezone.now() - timedelta(days=1),
+    )
+    with django_assert_num_queries(1):
+        stats = task_stats()
+    assert stats == {"total": 4, "open": 2, "completed": 2, "completed_today": 1}
+    with django_assert_num_queries(0):
+        assert task_stats() == stats
+
+    # Changed by signal-less paths too, once committed.
+    with django_capture_on_commit_callbacks(execute=True):
+        toggle_task(tasks[0].pk)
+    assert task_stats()["completed_today"] == stats["completed_today"] + 1
+
+
+@pytest.mark.parametrize(
+    ("method", "name", "completed"),
+    [
+        ("post", "task_create_htmx", 1),
+        ("post", "task_toggle_htmx", 2),
+        ("delete", "task_delete_htmx", 0),
+    ],
+)
+def test_task_views_swap_the_counts_out_of_band(
+    client,
+    tasks,
+    method,
+    name,
+    completed,
+):
+    task_stats()  # Cached before the change.
+    if name == "task_create_htmx":
+        response = client.post(reverse(f"examples:{name}"), {"title": "Plan"})
+        total = 4
+    else:
+        url = reverse(
+            f"examples:{name}",
+            args=[tasks[0].pk if completed else tasks[1].pk],
+        )
+        response = getattr(client, method)(url)
+        total = 3 if completed else 2
+    content = response.content.decode()
+    assert 'id="task-stats" class="badge bg-secondary" hx-swap-oob="true"' in content
+    assert f"{completed} of {total} done" in content
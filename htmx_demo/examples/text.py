@@ -0,0 +1,10 @@
+"""Text normalization shared by the contact search indexes."""
+
+import unicodedata
+
+
+def normalize_search_text(value):
+    """Fold case, strip accents and collapse whitespace in ``value``."""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
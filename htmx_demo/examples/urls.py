@@ -32,13 +32,21 @@ urlpatterns = [
     # Pattern 4: Modal Dialogs
     path("api/products/<int:product_id>/", views.product_detail_ajax, name="product_detail_ajax"),
     path("htmx/products/<int:product_id>/", views.product_detail_htmx, name="product_detail_htmx"),
+    path("api/products/batch/", views.product_batch_ajax, name="product_batch_ajax"),
+    path("htmx/products/batch/", views.product_batch_htmx, name="product_batch_htmx"),
     # Pattern 5: Dynamic List Operations
+    path("api/tasks/", views.tasks_ajax, name="tasks_ajax"),
     path("api/tasks/create/", views.task_create_ajax, name="task_create_ajax"),
     path("api/tasks/<int:task_id>/delete/", views.task_delete_ajax, name="task_delete_ajax"),
     path("api/tasks/<int:task_id>/toggle/", views.task_toggle_ajax, name="task_toggle_ajax"),
+    path("api/tasks/<int:task_id>/move/", views.task_move_ajax, name="task_move_ajax"),
+    path("api/tasks/bulk/", views.task_bulk_ajax, name="task_bulk_ajax"),
+    path("htmx/tasks/", views.tasks_htmx, name="tasks_htmx"),
     path("htmx/tasks/create/", views.task_create_htmx, name="task_create_htmx"),
     path("htmx/tasks/<int:task_id>/delete/", views.task_delete_htmx, name="task_delete_htmx"),
     path("htmx/tasks/<int:task_id>/toggle/", views.task_toggle_htmx, name="task_toggle_htmx"),
+    path("htmx/tasks/<int:task_id>/move/", views.task_move_htmx, name="task_move_htmx"),
+    path("htmx/tasks/bulk/", views.task_bulk_htmx, name="task_bulk_htmx"),
     # Pattern 6: Dependent Dropdowns
     path("api/states/", views.states_ajax, name="states_ajax"),
     path("api/cities/", views.cities_ajax, name="cities_ajax"),
@@ -55,5 +63,8 @@ urlpatterns = [
     path("api/notifications/list/", views.notifications_list_ajax, name="notifications_list_ajax"),
     path("htmx/notifications/create/", views.notifications_create_htmx, name="notifications_create_htmx"),
     path("htmx/notifications/list/", views.notifications_list_htmx, name="notifications_list_htmx"),
+    # Global Search
+    path("api/search/", views.global_search_ajax, name="global_search_ajax"),
+    path("htmx/search/", views.global_search_htmx, name="global_search_htmx"),
 ]
 
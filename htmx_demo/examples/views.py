@@ -3,25 +3,67 @@
 import random
 import time
 from decimal import Decimal
+from http import HTTPStatus
 
+from django.conf import settings
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db import IntegrityError
+from django.db import transaction
+from django.http import Http404
 from django.http import HttpResponse
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.html import escape
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.views.decorators.http import require_http_methods
 
-from .models import City
+from .analytics import record_search
+from .cancellation import run_cancellable
+from .counts import count_rows
+from .facets import product_facets
+from .fragments import render_fragment
+from .fragments import render_fragments
+from .geography import geography_etag
+from .geography import geography_tree
+from .global_search import global_search
+from .global_search import merged_hits
+from .models import DUPLICATE_EMAIL_ERROR
 from .models import Contact
 from .models import Country
 from .models import Location
 from .models import Notification
 from .models import Product
-from .models import State
 from .models import SystemStatus
 from .models import Task
+from .products import PRODUCT_CATEGORIES
+from .products import anchor_cursor
+from .products import cached_product_page
+from .products import facet_filters
+from .products import filtered_products
+from .products import prefetch_product_page
+from .products import product_filters
+from .products import product_page
+from .products import render_product_page
+from .search import contact_search_page
+from .search import decode_search_cursor
+from .singleflight import coalesce_requests
+from .tasks import bulk_task_action
+from .tasks import bulk_task_request
+from .tasks import create_task
+from .tasks import move_task
+from .tasks import task_page
+from .tasks import task_stats
+from .tasks import toggle_task
+
+# Number of contacts a search response lists.
+RESULT_COUNT_HEADER = "X-Result-Count"
+# Most products one batch detail request may ask for.
+MAX_BATCH_PRODUCTS = 50
 
 
 # Main Pages
@@ -49,7 +91,11 @@ def comparison_live_search(request):
 
 def comparison_infinite_scroll(request):
     """Infinite scroll comparison page."""
-    return render(request, "examples/patterns/comparison_infinite_scroll.html")
+    return render(
+        request,
+        "examples/patterns/comparison_infinite_scroll.html",
+        {"categories": PRODUCT_CATEGORIES.items()},
+    )
 
 
 def comparison_modal_dialogs(request):
@@ -74,12 +120,21 @@ def comparison_modal_dialogs(request):
 
 def comparison_dynamic_lists(request):
     """Dynamic lists comparison page."""
-    return render(request, "examples/patterns/comparison_dynamic_lists.html")
+    return render(
+        request,
+        "examples/patterns/comparison_dynamic_lists.html",
+        {"task_stats": task_stats()},
+    )
 
 
 def comparison_dependent_dropdowns(request):
     """Dependent dropdowns comparison page."""
-    return render(request, "examples/patterns/comparison_dependent_dropdowns.html")
+    # In the endpoint URLs, so cached options are never kept past a change
+    return render(
+        request,
+        "examples/patterns/comparison_dependent_dropdowns.html",
+        {"geography_version": geography_tree().version},
+    )
 
 
 def comparison_polling(request):
@@ -99,8 +154,7 @@ def comparison_websockets(request):
 
 def htmx_deep_dive(request):
     """HTMX deep dive page with comprehensive examples."""
-    # Get initial data for the page
-    tasks = Task.objects.all()[:5]
+    # Get initial data for the page; the task list loads itself page by page
     products = Product.objects.all()[:10]
     contacts = Contact.objects.all()[:10]
     countries = Country.objects.all()
@@ -109,10 +163,11 @@ def htmx_deep_dive(request):
         request,
         "examples/htmx_deep_dive.html",
         {
-            "tasks": tasks,
+            "task_stats": task_stats(),
             "products": products,
             "contacts": contacts,
             "countries": countries,
+            "geography_version": geography_tree().version,
         },
     )
 
@@ -147,22 +202,29 @@ def contact_submit_ajax(request):
     if not message:
         errors["message"] = "Message is required"
 
-    # Check if email already exists
-    if email and Contact.objects.filter(email=email).exists():
-        errors["email"] = "This email is already registered"
-
     if errors:
         return JsonResponse({"success": False, "errors": errors}, status=400)
 
-    # Create contact
-    contact = Contact.objects.create(
-        first_name=first_name,
-        last_name=last_name,
-        email=email,
-        phone=phone,
-        company=company,
-        message=message,
-    )
+    # Create contact.  The case-insensitive unique index on email rejects
+    # duplicates in the same statement, so there is no separate lookup and
+    # no race between concurrent sign-ups.
+    try:
+        with transaction.atomic():
+            contact = Contact.objects.create(
+                first_name=first_name,
+                last_name=last_name,
+                email=email,
+                phone=phone,
+                company=company,
+                message=message,
+            )
+    except IntegrityError as error:
+        if not Contact.is_duplicate_email(error):
+            raise
+        return JsonResponse(
+            {"success": False, "errors": {"email": DUPLICATE_EMAIL_ERROR}},
+            status=400,
+        )
 
     return JsonResponse(
         {
@@ -200,10 +262,6 @@ def contact_submit_htmx(request):
     if not message:
         errors["message"] = "Message is required"
 
-    # Check if email already exists
-    if email and Contact.objects.filter(email=email).exists():
-        errors["email"] = "This email is already registered"
-
     if errors:
         # Return error messages as HTML
         return render(
@@ -213,15 +271,26 @@ def contact_submit_htmx(request):
             status=400,
         )
 
-    # Create contact
-    contact = Contact.objects.create(
-        first_name=first_name,
-        last_name=last_name,
-        email=email,
-        phone=phone,
-        company=company,
-        message=message,
-    )
+    # Create contact, see contact_submit_ajax
+    try:
+        with transaction.atomic():
+            contact = Contact.objects.create(
+                first_name=first_name,
+                last_name=last_name,
+                email=email,
+                phone=phone,
+                company=company,
+                message=message,
+            )
+    except IntegrityError as error:
+        if not Contact.is_duplicate_email(error):
+            raise
+        return render(
+            request,
+            "examples/partials/form_errors.html",
+            {"errors": {"email": DUPLICATE_EMAIL_ERROR}},
+            status=400,
+        )
 
     # Return success message
     return render(
@@ -234,69 +303,130 @@ def contact_submit_htmx(request):
 # Pattern 2: Live Search/Filtering (jQuery endpoints)
 # ============================================================================
 
-def contact_search_ajax(request):
-    """jQuery AJAX endpoint for contact search."""
+def _record_contact_search(endpoint, request, started, response):
+    # Once per request: coalesced requests share one response, but the
+    # search analytics count each of them.
+    if response.status_code != HTTPStatus.OK:
+        return
+    record_search(
+        endpoint,
+        request.GET.get("q", "").strip(),
+        (time.monotonic() - started) * 1000,
+        int(response[RESULT_COUNT_HEADER]),
+        htmx=request.headers.get("HX-Request") == "true",
+    )
+
+
+@coalesce_requests
+def _contact_search_ajax(request):
     query = request.GET.get("q", "").strip()
+    try:
+        after = decode_search_cursor(request.GET.get("cursor", ""))
+    except ValueError:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
 
-    if not query:
-        contacts = Contact.objects.all()[:20]
-    else:
-        contacts = Contact.objects.filter(
-            Q(first_name__icontains=query)
-            | Q(last_name__icontains=query)
-            | Q(email__icontains=query)
-            | Q(company__icontains=query)
-        )[:20]
+    fuzzy = request.GET.get("fuzzy") == "1"
+
+    contacts, next_cursor = contact_search_page(query, after=after, fuzzy=fuzzy)
 
     data = [
         {
-            "id": c.id,
-            "first_name": c.first_name,
-            "last_name": c.last_name,
-            "email": c.email,
-            "company": c.company,
+            "id": c["id"],
+            "first_name": c["first_name"],
+            "last_name": c["last_name"],
+            "email": c["email"],
+            "company": c["company"],
         }
         for c in contacts
     ]
 
-    return JsonResponse({"results": data, "count": len(data)})
+    return JsonResponse(
+        {"results": data, "count": len(data), "next_cursor": next_cursor},
+        headers={RESULT_COUNT_HEADER: len(contacts)},
+    )
+
+
+def contact_search_ajax(request):
+    """jQuery AJAX endpoint for contact search."""
+    started = time.monotonic()
+    response = _contact_search_ajax(request)
+    _record_contact_search("contact_search_ajax", request, started, response)
+    return response
 
 
 # Pattern 2: Live Search/Filtering (HTMX endpoints)
 # ============================================================================
 
-def contact_search_htmx(request):
-    """HTMX endpoint for contact search."""
+@coalesce_requests
+async def _contact_search_htmx(request):
     query = request.GET.get("q", "").strip()
+    cursor = request.GET.get("cursor", "")
+    try:
+        after = decode_search_cursor(cursor)
+    except ValueError:
+        return HttpResponse(
+            '<div class="alert alert-danger">Invalid cursor</div>',
+            status=400,
+        )
 
-    if not query:
-        contacts = Contact.objects.all()[:20]
-    else:
-        contacts = Contact.objects.filter(
-            Q(first_name__icontains=query)
-            | Q(last_name__icontains=query)
-            | Q(email__icontains=query)
-            | Q(company__icontains=query)
-        )[:20]
+    contacts, next_cursor = await run_cancellable(
+        contact_search_page,
+        query,
+        after=after,
+        fuzzy=request.GET.get("fuzzy") == "1",
+        metric="contact_search",
+    )
 
-    return render(
+    response = render(
         request,
         "examples/partials/contact_results.html",
-        {"contacts": contacts, "query": query},
+        {
+            "contacts": contacts,
+            "query": query,
+            "cursor": cursor,
+            "next_cursor": next_cursor,
+        },
     )
+    response[RESULT_COUNT_HEADER] = len(contacts)
+    return response
+
+
+@transaction.non_atomic_requests
+async def contact_search_htmx(request):
+    """HTMX endpoint for contact search.
+
+    Async so that when the browser abandons a superseded keystroke, the
+    in-flight query is cancelled instead of running to completion.  Results
+    are ranked; ``cursor`` continues after the previous page.  ``fuzzy=1``
+    tolerates typos in names instead.
+    """
+    started = time.monotonic()
+    response = await _contact_search_htmx(request)
+    _record_contact_search("contact_search_htmx", request, started, response)
+    return response
 
 
 # Pattern 3: Infinite Scroll/Lazy Loading (jQuery endpoints)
 # ============================================================================
 
+@coalesce_requests
 def products_ajax(request):
-    """jQuery AJAX endpoint for paginated products."""
-    page = int(request.GET.get("page", 1))
-    per_page = 10
-
-    products = Product.objects.all()
-    paginator = Paginator(products, per_page)
-    page_obj = paginator.get_page(page)
+    """jQuery AJAX endpoint for paginated products.
+
+    Pass the previous response's ``next_cursor`` as ``cursor`` for the next
+    page, with the same ``category`` and ``in_stock`` filters.  A client
+    keeping a window of the list asks for the page ``before`` or ``after``
+    a product id instead.
+    """
+    try:
+        filters = product_filters(request.GET)
+        cursor, backward = _requested_position(request)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    try:
+        page_obj = product_page(cursor, filters, backward=backward)
+    except ValueError:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
 
     data = {
         "products": [
@@ -311,44 +441,76 @@ def products_ajax(request):
             for p in page_obj
         ],
         "has_next": page_obj.has_next(),
-        "next_page": page_obj.next_page_number() if page_obj.has_next() else None,
-        "total_pages": paginator.num_pages,
+        "next_cursor": page_obj.next_cursor,
+        "has_previous": page_obj.has_previous(),
     }
+    if cursor is None:
+        data["total_count"], data["total_is_estimate"] = count_rows(
+            filtered_products(filters),
+        )
+        data["facets"] = product_facets(facet_filters(filters))
 
     return JsonResponse(data)
 
 
+def _requested_position(request):
+    # Returns the cursor to page from and whether to page backwards from it.
+    if request.GET.get("before"):
+        return anchor_cursor(request.GET["before"]), True
+    if request.GET.get("after"):
+        return anchor_cursor(request.GET["after"]), False
+    return request.GET.get("cursor") or None, False
+
+
 # Pattern 3: Infinite Scroll/Lazy Loading (HTMX endpoints)
 # ============================================================================
 
+@coalesce_requests
 def products_htmx(request):
-    """HTMX endpoint for paginated products."""
-    page = int(request.GET.get("page", 1))
-    per_page = 10
-
-    products = Product.objects.all()
-    paginator = Paginator(products, per_page)
-    page_obj = paginator.get_page(page)
-
-    return render(
-        request,
-        "examples/partials/product_list.html",
-        {
-            "products": page_obj,
-            "page_obj": page_obj,
-        },
-    )
+    """HTMX endpoint for paginated products, see products_ajax.
+
+    The next page is rendered into the cache in the background right away,
+    so the request its sentinel makes is usually a cache hit.  Pages
+    ``before`` a product are rendered on demand and not prefetched.
+    """
+    try:
+        filters = product_filters(request.GET)
+        cursor, backward = _requested_position(request)
+    except ValueError as exc:
+        return HttpResponse(
+            f'<div class="alert alert-danger">{escape(exc)}</div>',
+            status=400,
+        )
+    page = cached_product_page(cursor, filters) if cursor and not backward else None
+    if page is None:
+        try:
+            page = render_product_page(cursor, filters, backward=backward)
+        except ValueError:
+            return HttpResponse(
+                '<div class="alert alert-danger">Invalid cursor</div>',
+                status=400,
+            )
+
+    html, next_cursor = page
+    if next_cursor and not backward:
+        prefetch_product_page(next_cursor, filters)
+    return HttpResponse(html)
 
 
 # Pattern 4: Modal Dialogs (jQuery endpoints)
 # ============================================================================
 
 @require_http_methods(["GET"])
+@coalesce_requests
 def product_detail_ajax(request, product_id):
     """jQuery AJAX endpoint for product detail modal."""
     product = get_object_or_404(Product, id=product_id)
 
-    data = {
+    return JsonResponse(_product_detail_data(product))
+
+
+def _product_detail_data(product):
+    return {
         "id": product.id,
         "name": product.name,
         "description": product.description,
@@ -357,27 +519,122 @@ def product_detail_ajax(request, product_id):
         "in_stock": product.in_stock,
     }
 
-    return JsonResponse(data)
+
+def _requested_product_ids(request):
+    """Return the distinct ids in ``?ids=1,2,3``, in the order given.
+
+    Raises ``ValueError`` for anything but a list of at most
+    ``MAX_BATCH_PRODUCTS`` integers.
+    """
+    ids = [part for part in request.GET.get("ids", "").split(",") if part.strip()]
+    ids = list(dict.fromkeys(int(product_id) for product_id in ids))
+    if not ids or len(ids) > MAX_BATCH_PRODUCTS:
+        msg = f"Pass between 1 and {MAX_BATCH_PRODUCTS} product ids"
+        raise ValueError(msg)
+    return ids
+
+
+@require_http_methods(["GET"])
+@coalesce_requests
+def product_batch_ajax(request):
+    """jQuery AJAX endpoint returning many product details at once, by id.
+
+    Lets a grid warm all of its modals with one request and one query;
+    unknown ids are left out.
+    """
+    try:
+        ids = _requested_product_ids(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid product ids"}, status=400)
+
+    products = Product.objects.in_bulk(ids)
+    data = {
+        str(product_id): _product_detail_data(products[product_id])
+        for product_id in ids
+        if product_id in products
+    }
+
+    return JsonResponse({"products": data})
 
 
 # Pattern 4: Modal Dialogs (HTMX endpoints)
 # ============================================================================
 
 @require_http_methods(["GET"])
+@coalesce_requests
 def product_detail_htmx(request, product_id):
-    """HTMX endpoint for product detail modal."""
+    """HTMX endpoint for product detail modal, cached per product version."""
     product = get_object_or_404(Product, id=product_id)
 
-    return render(
-        request,
+    return HttpResponse(
+        render_fragment("examples/partials/product_modal.html", product, "product"),
+    )
+
+
+@require_http_methods(["GET"])
+@coalesce_requests
+def product_batch_htmx(request):
+    """HTMX endpoint returning many product modals at once, see product_batch_ajax.
+
+    Each modal comes wrapped in ``<template data-product-id="...">``, ready
+    to be cloned into the page when its card is clicked.
+    """
+    try:
+        ids = _requested_product_ids(request)
+    except ValueError:
+        return HttpResponse(
+            '<div class="alert alert-danger">Invalid product ids</div>',
+            status=400,
+        )
+
+    products = Product.objects.in_bulk(ids)
+    found = [products[product_id] for product_id in ids if product_id in products]
+    fragments = render_fragments(
         "examples/partials/product_modal.html",
-        {"product": product},
+        found,
+        "product",
     )
+    # The fragments were rendered, and escaped, by their own template.
+    html = "".join(
+        format_html(
+            '<template data-product-id="{}">{}</template>',
+            product.id,
+            mark_safe(fragment),  # noqa: S308
+        )
+        for product, fragment in zip(found, fragments, strict=True)
+    )
+
+    return HttpResponse(html)
 
 
 # Pattern 5: Dynamic List Operations (jQuery endpoints)
 # ============================================================================
 
+@require_http_methods(["GET"])
+@coalesce_requests
+def tasks_ajax(request):
+    """jQuery AJAX endpoint for the task list, open tasks first.
+
+    Pass the previous response's ``next_cursor`` as ``cursor`` for the next
+    page.
+    """
+    try:
+        page_obj = task_page(request.GET.get("cursor") or None)
+    except ValueError:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
+
+    return JsonResponse(
+        {
+            "tasks": [
+                {"id": task.id, "title": task.title, "completed": task.completed}
+                for task in page_obj
+            ],
+            "has_next": page_obj.has_next(),
+            "next_cursor": page_obj.next_cursor,
+        },
+    )
+
+
 @require_http_methods(["POST"])
 def task_create_ajax(request):
     """jQuery AJAX endpoint for creating a task."""
@@ -386,7 +643,7 @@ def task_create_ajax(request):
     if not title:
         return JsonResponse({"success": False, "error": "Title is required"}, status=400)
 
-    task = Task.objects.create(title=title)
+    task = create_task(title)
 
     return JsonResponse(
         {
@@ -409,11 +666,16 @@ def task_delete_ajax(request, task_id):
     return JsonResponse({"success": True})
 
 
+@transaction.non_atomic_requests
 @require_http_methods(["POST"])
 def task_toggle_ajax(request, task_id):
-    """jQuery AJAX endpoint for toggling task completion."""
-    task = get_object_or_404(Task, id=task_id)
-    task.toggle_complete()
+    """jQuery AJAX endpoint for toggling task completion.
+
+    One UPDATE in autocommit, so the row is only locked while it is flipped.
+    """
+    task = toggle_task(task_id)
+    if task is None:
+        raise Http404
 
     return JsonResponse(
         {
@@ -427,9 +689,95 @@ def task_toggle_ajax(request, task_id):
     )
 
 
+@require_http_methods(["POST"])
+def task_bulk_ajax(request):
+    """jQuery AJAX endpoint applying one action to many tasks at once.
+
+    POST an ``action`` (toggle, delete or clear_completed) and the
+    ``task_ids``; the action runs as a single UPDATE or DELETE.
+    """
+    try:
+        action, task_ids = bulk_task_request(request.POST)
+    except ValueError as exc:
+        return JsonResponse({"success": False, "error": str(exc)}, status=400)
+
+    tasks, deleted_ids = bulk_task_action(action, task_ids)
+
+    return JsonResponse(
+        {
+            "success": True,
+            "tasks": [
+                {"id": task.id, "title": task.title, "completed": task.completed}
+                for task in tasks
+            ],
+            "deleted": deleted_ids,
+        },
+    )
+
+
+def _requested_move(request):
+    # The ids of the tasks a moved task now follows and precedes, if given.
+    ids = []
+    for name in ("after", "before"):
+        value = request.POST.get(name) or None
+        try:
+            ids.append(int(value) if value is not None else None)
+        except ValueError as exc:
+            msg = "Task ids must be integers"
+            raise ValueError(msg) from exc
+    return ids
+
+
+@require_http_methods(["POST"])
+def task_move_ajax(request, task_id):
+    """jQuery AJAX endpoint for moving a task, e.g. after a drag and drop.
+
+    POST the id of the task it now follows as ``after`` and of the one it
+    now precedes as ``before``; either may be left out at the ends of the
+    list.  Only the moved task's rank changes.
+    """
+    try:
+        after_id, before_id = _requested_move(request)
+        rank = move_task(task_id, after_id=after_id, before_id=before_id)
+    except ValueError as exc:
+        return JsonResponse({"success": False, "error": str(exc)}, status=400)
+    if rank is None:
+        raise Http404
+
+    return JsonResponse({"success": True, "task": {"id": task_id, "order": rank}})
+
+
 # Pattern 5: Dynamic List Operations (HTMX endpoints)
 # ============================================================================
 
+def _task_stats_oob(request):
+    # The task count badge, for a response that has just changed tasks.
+    return render_to_string(
+        "examples/partials/task_stats.html",
+        {"stats": task_stats(fresh=True), "oob": True},
+        request=request,
+    )
+
+
+@require_http_methods(["GET"])
+@coalesce_requests
+def tasks_htmx(request):
+    """HTMX endpoint for the task list, see tasks_ajax."""
+    try:
+        page_obj = task_page(request.GET.get("cursor") or None)
+    except ValueError:
+        return HttpResponse(
+            '<div class="alert alert-danger">Invalid cursor</div>',
+            status=400,
+        )
+
+    return render(
+        request,
+        "examples/partials/task_list.html",
+        {"tasks": page_obj, "page_obj": page_obj},
+    )
+
+
 @require_http_methods(["POST"])
 def task_create_htmx(request):
     """HTMX endpoint for creating a task."""
@@ -441,14 +789,15 @@ def task_create_htmx(request):
             status=400,
         )
 
-    task = Task.objects.create(title=title)
+    task = create_task(title)
 
-    # Return the new task HTML
-    return render(
-        request,
+    # Return the new task HTML, and the updated counts out of band
+    html = render_to_string(
         "examples/partials/task_item.html",
         {"task": task},
+        request=request,
     )
+    return HttpResponse(html + _task_stats_oob(request))
 
 
 @require_http_methods(["DELETE"])
@@ -457,103 +806,128 @@ def task_delete_htmx(request, task_id):
     task = get_object_or_404(Task, id=task_id)
     task.delete()
 
-    # Return empty response - HTMX will remove the element
-    return HttpResponse("")
+    # Return only the updated counts - HTMX will remove the element
+    return HttpResponse(_task_stats_oob(request))
 
 
+@require_http_methods(["POST"])
+def task_move_htmx(request, task_id):
+    """HTMX endpoint for moving a task, see task_move_ajax.
+
+    The browser has already moved the element, so there is nothing to swap.
+    """
+    try:
+        after_id, before_id = _requested_move(request)
+        rank = move_task(task_id, after_id=after_id, before_id=before_id)
+    except ValueError as exc:
+        return HttpResponse(
+            f'<div class="alert alert-danger">{escape(exc)}</div>',
+            status=400,
+        )
+    if rank is None:
+        raise Http404
+
+    return HttpResponse(status=204)
+
+
+@transaction.non_atomic_requests
 @require_http_methods(["POST"])
 def task_toggle_htmx(request, task_id):
-    """HTMX endpoint for toggling task completion."""
-    task = get_object_or_404(Task, id=task_id)
-    task.toggle_complete()
+    """HTMX endpoint for toggling task completion, see task_toggle_ajax."""
+    task = toggle_task(task_id)
+    if task is None:
+        raise Http404
 
-    # Return updated task HTML
-    return render(
-        request,
+    # Return updated task HTML, and the updated counts out of band
+    html = render_to_string(
         "examples/partials/task_item.html",
         {"task": task},
+        request=request,
     )
+    return HttpResponse(html + _task_stats_oob(request))
+
+
+@require_http_methods(["POST"])
+def task_bulk_htmx(request):
+    """HTMX endpoint applying one action to many tasks, see task_bulk_ajax.
+
+    The response updates every affected task out of band: toggled tasks are
+    re-rendered and deleted ones removed, so the triggering element should
+    use ``hx-swap="none"``.
+    """
+    try:
+        action, task_ids = bulk_task_request(request.POST)
+    except ValueError as exc:
+        return HttpResponse(
+            f'<div class="alert alert-danger">{escape(exc)}</div>',
+            status=400,
+        )
+
+    tasks, deleted_ids = bulk_task_action(action, task_ids)
+
+    html = "".join(
+        render_to_string(
+            "examples/partials/task_item.html",
+            {"task": task, "oob": True},
+            request=request,
+        )
+        for task in tasks
+    )
+    html += "".join(
+        format_html('<div id="task-{}" hx-swap-oob="delete"></div>', task_id)
+        for task_id in deleted_ids
+    )
+    return HttpResponse(html + _task_stats_oob(request))
 
 
 # Pattern 6: Dependent Dropdowns (jQuery endpoints)
 # ============================================================================
 
+@cache_control(public=True, max_age=settings.EXAMPLES_GEOGRAPHY_MAX_AGE)
+@condition(etag_func=geography_etag)
 def states_ajax(request):
     """jQuery AJAX endpoint for getting states by country."""
     country_id = request.GET.get("country_id")
-
-    if not country_id:
-        return JsonResponse({"states": []})
-
-    states = State.objects.filter(country_id=country_id)
-
-    data = {
-        "states": [
-            {"id": s.id, "name": s.name, "code": s.code}
-            for s in states
-        ],
-    }
-
-    return JsonResponse(data)
+    return HttpResponse(
+        geography_tree().options_json("states", country_id),
+        content_type="application/json",
+    )
 
 
+@cache_control(public=True, max_age=settings.EXAMPLES_GEOGRAPHY_MAX_AGE)
+@condition(etag_func=geography_etag)
 def cities_ajax(request):
     """jQuery AJAX endpoint for getting cities by state."""
     state_id = request.GET.get("state_id")
-
-    if not state_id:
-        return JsonResponse({"cities": []})
-
-    cities = City.objects.filter(state_id=state_id)
-
-    data = {
-        "cities": [
-            {"id": c.id, "name": c.name}
-            for c in cities
-        ],
-    }
-
-    return JsonResponse(data)
+    return HttpResponse(
+        geography_tree().options_json("cities", state_id),
+        content_type="application/json",
+    )
 
 
 # Pattern 6: Dependent Dropdowns (HTMX endpoints)
 # ============================================================================
 
+@cache_control(public=True, max_age=settings.EXAMPLES_GEOGRAPHY_MAX_AGE)
+@condition(etag_func=geography_etag)
 def states_htmx(request):
     """HTMX endpoint for getting states by country."""
     country_id = request.GET.get("country_id")
-
-    if not country_id:
-        return HttpResponse('<option value="">Select a state</option>')
-
-    states = State.objects.filter(country_id=country_id)
-
-    return render(
-        request,
-        "examples/partials/state_options.html",
-        {"states": states},
-    )
+    return HttpResponse(geography_tree().options_html("states", country_id))
 
 
+@cache_control(public=True, max_age=settings.EXAMPLES_GEOGRAPHY_MAX_AGE)
+@condition(etag_func=geography_etag)
 def cities_htmx(request):
     """HTMX endpoint for getting cities by state."""
     state_id = request.GET.get("state_id")
-
-    if not state_id:
-        return HttpResponse('<option value="">Select a city</option>')
-
-    cities = City.objects.filter(state_id=state_id)
-
-    return render(
-        request,
-        "examples/partials/city_options.html",
-        {"cities": cities},
-    )
+    return HttpResponse(geography_tree().options_html("cities", state_id))
 
 
 # Pattern 7: Polling/Auto-refresh (jQuery endpoints)
 # ============================================================================
 
+@coalesce_requests
 def system_status_ajax(request):
     """jQuery AJAX endpoint for system status polling."""
     # Simulate status changes
@@ -588,6 +962,7 @@ def system_status_ajax(request):
 # Pattern 7: Polling/Auto-refresh (HTMX endpoints)
 # ============================================================================
 
+@coalesce_requests
 def system_status_htmx(request):
     """HTMX endpoint for system status polling."""
     # Simulate status changes
@@ -613,6 +988,7 @@ def system_status_htmx(request):
 # Pattern 8: Interactive Maps (jQuery endpoints)
 # ============================================================================
 
+@coalesce_requests
 def locations_search_ajax(request):
     """jQuery AJAX endpoint for location search with filters."""
     category = request.GET.get("category", "")
@@ -652,6 +1028,7 @@ def locations_search_ajax(request):
 # Pattern 8: Interactive Maps (HTMX endpoints)
 # ============================================================================
 
+@coalesce_requests
 def locations_search_htmx(request):
     """HTMX endpoint for location search with filters."""
     category = request.GET.get("category", "")
@@ -705,6 +1082,7 @@ def notifications_create_ajax(request):
     })
 
 
+@coalesce_requests
 def notifications_list_ajax(request):
     """jQuery AJAX endpoint for getting notification list."""
     notifications = Notification.objects.all()[:10]
@@ -749,6 +1127,7 @@ def notifications_create_htmx(request):
     )
 
 
+@coalesce_requests
 def notifications_list_htmx(request):
     """HTMX endpoint for getting notification list."""
     notifications = Notification.objects.all()[:10]
@@ -758,3 +1137,45 @@ def notifications_list_htmx(request):
         {"notifications": notifications},
     )
 
+
+# Global Search across all examples (jQuery endpoints)
+# ============================================================================
+
+@coalesce_requests
+def global_search_ajax(request):
+    """jQuery AJAX endpoint searching contacts, products, locations and tasks."""
+    query = request.GET.get("q", "").strip()
+
+    results = global_search(query)
+
+    data = [
+        {
+            "type": hit["type"],
+            "id": hit["id"],
+            "title": hit["title"],
+            "subtitle": hit["subtitle"],
+            "rank": hit["rank"],
+        }
+        for hit in merged_hits(results)
+    ]
+
+    return JsonResponse({
+        "results": data,
+        "count": len(data),
+        "timed_out": [result.name for result in results if result.timed_out],
+    })
+
+
+# Global Search across all examples (HTMX endpoints)
+# ============================================================================
+
+@coalesce_requests
+def global_search_htmx(request):
+    """HTMX endpoint searching contacts, products, locations and tasks."""
+    query = request.GET.get("q", "").strip()
+
+    return render(
+        request,
+        "examples/partials/global_search_results.html",
+        {"results": global_search(query), "query": query},
+    )